@@ -1,9 +1,9 @@
 """
 Módulo de configuración - External Configuration Store Pattern
 """
-from .config import settings, check_configuration
+from .config import settings, get_settings, check_configuration
 from .database import (
-    engine,
+    get_engine,
     SessionLocal,
     Base,
     get_db,
@@ -14,8 +14,9 @@ from .database import (
 
 __all__ = [
     "settings",
+    "get_settings",
     "check_configuration",
-    "engine",
+    "get_engine",
     "SessionLocal",
     "Base",
     "get_db",
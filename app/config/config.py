@@ -5,11 +5,30 @@ Permite modificar parámetros sin recompilar ni redeployar la aplicación.
 """
 
 import os
+from functools import cached_property, lru_cache
 from typing import Optional
 from dotenv import load_dotenv
 
-# Cargar variables de entorno desde archivo .env si existe
-load_dotenv()
+# Bandera para cargar el archivo .env una única vez por proceso
+_DOTENV_LOADED = False
+
+
+def _maybe_load_dotenv() -> None:
+    """
+    Cargar variables de entorno desde archivo .env si existe.
+    Es idempotente y se omite en producción, donde la configuración
+    llega directamente como variables de entorno del contenedor.
+    """
+    global _DOTENV_LOADED
+    if _DOTENV_LOADED:
+        return
+    
+    if os.getenv("ENVIRONMENT", "development").lower() not in ("production", "prod"):
+        load_dotenv()
+    _DOTENV_LOADED = True
+
+
+_maybe_load_dotenv()
 
 
 class Settings:
@@ -17,6 +36,10 @@ class Settings:
     Clase de configuración que centraliza todas las variables de entorno.
     Implementa el patrón External Configuration Store para separar
     la configuración del código fuente.
+    
+    Las variables de entorno se leen al instanciar (no al importar el módulo),
+    por lo que siempre reflejan el entorno vigente tras cargar el archivo .env.
+    Usar get_settings() para obtener la instancia compartida.
     """
     
     # =========================================
@@ -24,144 +47,185 @@ class Settings:
     # =========================================
     APP_NAME: str = "Mini Gestor de Proyectos API"
     APP_VERSION: str = "1.0.0"
-    ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
-    
-    # =========================================
-    # CONFIGURACIÓN DEL SERVIDOR
-    # =========================================
-    API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
-    API_PORT: int = int(os.getenv("API_PORT", "8000"))
-    API_RELOAD: bool = os.getenv("API_RELOAD", "true").lower() == "true"
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "info")
-    
-    # =========================================
-    # BASE DE DATOS POSTGRESQL
-    # =========================================
-    POSTGRES_USER: str = os.getenv("POSTGRES_USER", "postgres")
-    POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD", "password")
-    POSTGRES_DB: str = os.getenv("POSTGRES_DB", "gestor_proyectos")
-    POSTGRES_HOST: str = os.getenv("POSTGRES_HOST", "localhost")
-    POSTGRES_PORT: str = os.getenv("POSTGRES_PORT", "5433")
-    
-    # URL completa de conexión
-    DATABASE_URL: str = os.getenv(
-        "DATABASE_URL",
-        f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
-    )
-    
-    # Configuración de reintentos (Retry Pattern)
-    DB_MAX_RETRY_ATTEMPTS: int = int(os.getenv("DB_MAX_RETRY_ATTEMPTS", "5"))
-    DB_RETRY_MIN_WAIT: int = int(os.getenv("DB_RETRY_MIN_WAIT", "1"))
-    DB_RETRY_MAX_WAIT: int = int(os.getenv("DB_RETRY_MAX_WAIT", "10"))
-    
-    # =========================================
-    # REDIS - CACHE-ASIDE PATTERN
-    # =========================================
-    REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
-    REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
-    CACHE_TTL: int = int(os.getenv("CACHE_TTL", "300"))  # 5 minutos por defecto
-    
-    # =========================================
-    # LDAP - FEDERATED IDENTITY PATTERN
-    # =========================================
-    LDAP_SERVER: str = os.getenv("LDAP_SERVER", "ldap://localhost:389")
-    LDAP_BASE_DN: str = os.getenv("LDAP_BASE_DN", "dc=example,dc=org")
-    LDAP_USER_DN_TEMPLATE: str = os.getenv(
-        "LDAP_USER_DN_TEMPLATE",
-        "uid={username},ou=users,dc=example,dc=org"
-    )
-    LDAP_BIND_USER: Optional[str] = os.getenv("LDAP_BIND_USER", None)
-    LDAP_BIND_PASSWORD: Optional[str] = os.getenv("LDAP_BIND_PASSWORD", None)
     
     # =========================================
     # JWT Y SEGURIDAD - GATEKEEPER PATTERN
     # =========================================
-    JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
     JWT_ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
-    
-    # =========================================
-    # GATEKEEPER - RATE LIMITING
-    # =========================================
-    RATE_LIMIT_REQUESTS: int = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
-    RATE_LIMIT_WINDOW_SECONDS: int = int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60"))
     
-    # =========================================
-    # CORS
-    # =========================================
-    CORS_ORIGINS: list = os.getenv("CORS_ORIGINS", "*").split(",")
+    def __init__(self):
+        # =========================================
+        # INFORMACIÓN DE LA APLICACIÓN
+        # =========================================
+        self.ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
+        
+        # =========================================
+        # CONFIGURACIÓN DEL SERVIDOR
+        # =========================================
+        self.API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
+        self.API_PORT: int = int(os.getenv("API_PORT", "8000"))
+        self.API_RELOAD: bool = os.getenv("API_RELOAD", "true").lower() == "true"
+        self.API_WORKERS: int = int(os.getenv("API_WORKERS", "1"))
+        self.LOG_LEVEL: str = os.getenv("LOG_LEVEL", "info")
+        
+        # =========================================
+        # BASE DE DATOS POSTGRESQL
+        # =========================================
+        self.POSTGRES_USER: str = os.getenv("POSTGRES_USER", "postgres")
+        self.POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD", "password")
+        self.POSTGRES_DB: str = os.getenv("POSTGRES_DB", "gestor_proyectos")
+        self.POSTGRES_HOST: str = os.getenv("POSTGRES_HOST", "localhost")
+        self.POSTGRES_PORT: str = os.getenv("POSTGRES_PORT", "5433")
+        
+        # URL completa de conexión
+        self.DATABASE_URL: str = os.getenv(
+            "DATABASE_URL",
+            f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
+            f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        )
+        
+        # Configuración de reintentos (Retry Pattern)
+        self.DB_MAX_RETRY_ATTEMPTS: int = int(os.getenv("DB_MAX_RETRY_ATTEMPTS", "5"))
+        self.DB_RETRY_MIN_WAIT: int = int(os.getenv("DB_RETRY_MIN_WAIT", "1"))
+        self.DB_RETRY_MAX_WAIT: int = int(os.getenv("DB_RETRY_MAX_WAIT", "10"))
+        
+        # Pool de conexiones (ajustar según workers: ~concurrencia esperada / workers)
+        self.DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+        self.DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+        # pre_ping agrega un SELECT 1 por checkout; por defecto solo en desarrollo
+        self.DB_POOL_PRE_PING: bool = os.getenv(
+            "DB_POOL_PRE_PING",
+            "true" if self.is_development() else "false"
+        ).lower() == "true"
+        
+        # =========================================
+        # REDIS - CACHE-ASIDE PATTERN
+        # =========================================
+        self.REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
+        self.REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
+        # Conexiones máximas del pool compartido por los threads del servidor
+        self.REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+        self.CACHE_TTL: int = int(os.getenv("CACHE_TTL", "300"))  # 5 minutos por defecto
+        
+        # =========================================
+        # LDAP - FEDERATED IDENTITY PATTERN
+        # =========================================
+        self.LDAP_SERVER: str = os.getenv("LDAP_SERVER", "ldap://localhost:389")
+        self.LDAP_BASE_DN: str = os.getenv("LDAP_BASE_DN", "dc=example,dc=org")
+        self.LDAP_USER_DN_TEMPLATE: str = os.getenv(
+            "LDAP_USER_DN_TEMPLATE",
+            "uid={username},ou=users,dc=example,dc=org"
+        )
+        self.LDAP_BIND_USER: Optional[str] = os.getenv("LDAP_BIND_USER", None)
+        self.LDAP_BIND_PASSWORD: Optional[str] = os.getenv("LDAP_BIND_PASSWORD", None)
+        
+        # =========================================
+        # JWT Y SEGURIDAD - GATEKEEPER PATTERN
+        # =========================================
+        self.JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
+        self.ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+        
+        # =========================================
+        # GATEKEEPER - RATE LIMITING
+        # =========================================
+        self.RATE_LIMIT_REQUESTS: int = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
+        self.RATE_LIMIT_WINDOW_SECONDS: int = int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60"))
+        
+        # =========================================
+        # CORS
+        # =========================================
+        self.CORS_ORIGINS: list = os.getenv("CORS_ORIGINS", "*").split(",")
     
-    @classmethod
-    def is_development(cls) -> bool:
+    def is_development(self) -> bool:
         """Verifica si estamos en entorno de desarrollo"""
-        return cls.ENVIRONMENT.lower() in ["development", "dev"]
+        return self.ENVIRONMENT.lower() in ["development", "dev"]
     
-    @classmethod
-    def is_production(cls) -> bool:
+    def is_production(self) -> bool:
         """Verifica si estamos en entorno de producción"""
-        return cls.ENVIRONMENT.lower() in ["production", "prod"]
+        return self.ENVIRONMENT.lower() in ["production", "prod"]
     
-    @classmethod
-    def validate_config(cls) -> list[str]:
+    def validate_config(self) -> list[str]:
         """
         Valida la configuración y retorna una lista de advertencias.
         Útil para verificar la configuración al inicio de la aplicación.
+        El resultado se calcula una sola vez por instancia (la configuración es inmutable).
+        """
+        return list(self._config_warnings)
+    
+    def get_config_summary(self) -> dict:
         """
+        Retorna un resumen de la configuración actual (sin datos sensibles).
+        Útil para logging y debugging.
+        Memoizado: seguro de usar en endpoints de monitoreo.
+        """
+        return dict(self._config_summary)
+    
+    @cached_property
+    def _config_warnings(self) -> tuple[str, ...]:
+        """Advertencias de configuración calculadas en el primer acceso"""
         warnings = []
         
         # Verificar secreto JWT en producción
-        if cls.is_production() and cls.JWT_SECRET_KEY == "your-secret-key-change-in-production":
+        if self.is_production() and self.JWT_SECRET_KEY == "your-secret-key-change-in-production":
             warnings.append(
                 "⚠️  CRÍTICO: JWT_SECRET_KEY está usando el valor por defecto en producción!"
             )
         
         # Verificar contraseña de base de datos
-        if cls.is_production() and cls.POSTGRES_PASSWORD == "password":
+        if self.is_production() and self.POSTGRES_PASSWORD == "password":
             warnings.append(
                 "⚠️  ADVERTENCIA: Contraseña de base de datos débil en producción"
             )
         
         # Verificar reload en producción
-        if cls.is_production() and cls.API_RELOAD:
+        if self.is_production() and self.API_RELOAD:
             warnings.append(
                 "⚠️  ADVERTENCIA: API_RELOAD está activado en producción"
             )
         
-        return warnings
+        return tuple(warnings)
     
-    @classmethod
-    def get_config_summary(cls) -> dict:
-        """
-        Retorna un resumen de la configuración actual (sin datos sensibles).
-        Útil para logging y debugging.
-        """
+    @cached_property
+    def _config_summary(self) -> dict:
+        """Resumen de configuración calculado en el primer acceso"""
         return {
-            "app_name": cls.APP_NAME,
-            "version": cls.APP_VERSION,
-            "environment": cls.ENVIRONMENT,
-            "api_host": cls.API_HOST,
-            "api_port": cls.API_PORT,
-            "database_host": cls.POSTGRES_HOST,
-            "database_name": cls.POSTGRES_DB,
-            "redis_host": cls.REDIS_HOST,
-            "redis_port": cls.REDIS_PORT,
-            "cache_ttl": cls.CACHE_TTL,
-            "ldap_server": cls.LDAP_SERVER,
-            "token_expire_minutes": cls.ACCESS_TOKEN_EXPIRE_MINUTES,
-            "reload_enabled": cls.API_RELOAD,
-            "log_level": cls.LOG_LEVEL
+            "app_name": self.APP_NAME,
+            "version": self.APP_VERSION,
+            "environment": self.ENVIRONMENT,
+            "api_host": self.API_HOST,
+            "api_port": self.API_PORT,
+            "database_host": self.POSTGRES_HOST,
+            "database_name": self.POSTGRES_DB,
+            "redis_host": self.REDIS_HOST,
+            "redis_port": self.REDIS_PORT,
+            "cache_ttl": self.CACHE_TTL,
+            "ldap_server": self.LDAP_SERVER,
+            "token_expire_minutes": self.ACCESS_TOKEN_EXPIRE_MINUTES,
+            "reload_enabled": self.API_RELOAD,
+            "log_level": self.LOG_LEVEL
         }
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Retorna la instancia única de configuración (Singleton perezoso).
+    Se crea en la primera llamada y se reutiliza en el resto del proceso.
+    Para recargar la configuración: get_settings.cache_clear().
+    """
+    _maybe_load_dotenv()
+    return Settings()
+
+
 # Instancia global de configuración
-settings = Settings()
+settings = get_settings()
 
 
-# Validar configuración al cargar el módulo
 def check_configuration():
     """
     Verifica la configuración al iniciar la aplicación.
     Muestra advertencias si hay problemas de configuración.
+    Se invoca explícitamente desde el arranque de la API (no al importar).
     """
     warnings = settings.validate_config()
     
@@ -184,6 +248,3 @@ def check_configuration():
         print("="*60 + "\n")
 
 
-# Ejecutar verificación al importar el módulo
-check_configuration()
-
@@ -6,10 +6,12 @@ Incluye mecanismo de retry con backoff exponencial para alta disponibilidad.
 
 import logging
 import time
+from functools import lru_cache
 import psycopg2
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.exc import OperationalError, DBAPIError
 from tenacity import (
     retry,
@@ -23,35 +25,57 @@ from tenacity import (
 # Importar configuración centralizada (External Configuration Store Pattern)
 from .config import settings
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# URL de conexión a PostgreSQL desde configuración externa
-DATABASE_URL = settings.DATABASE_URL
+# URL de conexión a PostgreSQL desde configuración externa (parseada una sola vez)
+DATABASE_URL = make_url(settings.DATABASE_URL)
 
 # Configuración de reintentos desde configuración externa
 MAX_RETRY_ATTEMPTS = settings.DB_MAX_RETRY_ATTEMPTS
 RETRY_MIN_WAIT = settings.DB_RETRY_MIN_WAIT
 RETRY_MAX_WAIT = settings.DB_RETRY_MAX_WAIT
 
-# Crear el motor de base de datos con configuración para ACID
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,      # Verificar conexión antes de usar
-    pool_recycle=300,        # Reciclar conexiones cada 5 minutos
-    pool_size=10,            # Tamaño del pool de conexiones
-    max_overflow=20,         # Conexiones adicionales permitidas
-    pool_timeout=30,         # Timeout para obtener conexión del pool
-    echo=False,              # No mostrar SQL queries en producción
-    connect_args={
-        "connect_timeout": 10,  # Timeout de conexión inicial
-        "options": "-c statement_timeout=30000"  # Timeout de queries (30s)
-    }
-)
+# Clave del advisory lock que serializa las migraciones de arranque entre réplicas
+SCHEMA_MIGRATION_LOCK_KEY = 72140001
+
+
+@lru_cache(maxsize=1)
+def get_engine() -> Engine:
+    """
+    Retorna el motor de base de datos, creándolo en el primer uso (Singleton perezoso).
+    Evita abrir el pool de conexiones al importar el módulo.
+    """
+    # Crear el motor de base de datos con configuración para ACID
+    return create_engine(
+        DATABASE_URL,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,  # Verificar conexión antes de usar
+        pool_recycle=300,        # Reciclar conexiones cada 5 minutos
+        pool_size=settings.DB_POOL_SIZE,          # Tamaño del pool de conexiones
+        max_overflow=settings.DB_MAX_OVERFLOW,    # Conexiones adicionales permitidas
+        pool_timeout=30,         # Timeout para obtener conexión del pool
+        pool_use_lifo=True,      # Reutilizar la conexión más reciente (más "caliente")
+        insertmanyvalues_page_size=1000,         # Filas por INSERT multi-VALUES en inserciones masivas
+        executemany_mode="values_plus_batch",    # psycopg2: agrupar también UPDATE/DELETE con executemany
+        echo=False,              # No mostrar SQL queries en producción
+        connect_args={
+            "connect_timeout": 10,  # Timeout de conexión inicial
+            "options": "-c statement_timeout=30000"  # Timeout de queries (30s)
+        }
+    )
+
 
-# Factory de sesiones para transacciones ACID
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+@lru_cache(maxsize=1)
+def _get_session_factory() -> sessionmaker:
+    """Factory de sesiones ligada al motor perezoso"""
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+
+def SessionLocal(**kwargs) -> Session:
+    """
+    Factory de sesiones para transacciones ACID.
+    Mantiene la interfaz de sessionmaker: SessionLocal() retorna una nueva sesión.
+    """
+    return _get_session_factory()(**kwargs)
 
 # Base para modelos ORM
 Base = declarative_base()
@@ -78,12 +102,92 @@ def test_connection():
         OperationalError: Si no se puede conectar después de todos los reintentos
     """
     logger.info("🔄 Intentando conectar a la base de datos...")
-    with engine.connect() as connection:
+    with get_engine().connect() as connection:
         result = connection.execute(text("SELECT 1"))
         result.fetchone()
         logger.info("✅ Conexión a la base de datos establecida exitosamente")
         return True
 
+def _promover_nombre_proyecto_unico(conn: Connection) -> None:
+    """
+    Convertir ix_proyectos_nombre en índice único en bases creadas antes de la restricción
+    (create_all no modifica índices de tablas existentes).
+    
+    Si ya hay nombres repetidos el índice queda como está y se registra un error:
+    se vuelve a intentar en cada arranque, una vez renombrados los duplicados.
+    """
+    es_unico = conn.execute(text(
+        "SELECT i.indisunique FROM pg_index i "
+        "JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = 'ix_proyectos_nombre'"
+    )).scalar()
+    if es_unico:
+        return
+    
+    duplicados = conn.execute(text(
+        "SELECT nombre FROM proyectos GROUP BY nombre HAVING count(*) > 1 LIMIT 5"
+    )).scalars().all()
+    if duplicados:
+        logger.error(
+            "❌ ix_proyectos_nombre no puede ser único: nombres de proyecto repetidos %s",
+            duplicados
+        )
+        return
+    
+    conn.execute(text("DROP INDEX IF EXISTS ix_proyectos_nombre"))
+    conn.execute(text("CREATE UNIQUE INDEX ix_proyectos_nombre ON proyectos (nombre)"))
+    logger.info("🔧 ix_proyectos_nombre convertido en índice único")
+
+def _crear_indices_proyecto_usuario(conn: Connection) -> None:
+    """
+    Crear uq_proy_usr e ix_proy_usr_reverse en bases anteriores a esos índices.
+    
+    Antes del índice único se eliminan las asignaciones repetidas: la tabla solo
+    tiene las dos claves, así que las filas duplicadas son idénticas.
+    """
+    if conn.execute(text("SELECT to_regclass('uq_proy_usr')")).scalar() is None:
+        eliminadas = conn.execute(text(
+            "DELETE FROM proyecto_usuario a USING proyecto_usuario b "
+            "WHERE a.ctid > b.ctid "
+            "AND a.proyecto_id = b.proyecto_id AND a.usuario_id = b.usuario_id"
+        )).rowcount
+        if eliminadas:
+            logger.warning("⚠️  %d asignaciones proyecto-usuario duplicadas eliminadas", eliminadas)
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_proy_usr ON proyecto_usuario (proyecto_id, usuario_id)"
+        ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_proy_usr_reverse ON proyecto_usuario (usuario_id, proyecto_id)"
+    ))
+
+def _convertir_email_citext(conn: Connection) -> None:
+    """
+    Convertir usuarios.email a CITEXT en bases creadas cuando era VARCHAR.
+    
+    Si hay emails que solo difieren en mayúsculas, el índice único no se podría
+    reconstruir: se registra un error y se reintenta en el próximo arranque.
+    """
+    tipo = conn.execute(text(
+        "SELECT udt_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() "
+        "AND table_name = 'usuarios' AND column_name = 'email'"
+    )).scalar()
+    if tipo is None or tipo == "citext":
+        return
+    
+    duplicados = conn.execute(text(
+        "SELECT lower(email) FROM usuarios GROUP BY lower(email) HAVING count(*) > 1 LIMIT 5"
+    )).scalars().all()
+    if duplicados:
+        logger.error(
+            "❌ usuarios.email no puede pasar a CITEXT: emails repetidos sin distinguir mayúsculas %s",
+            duplicados
+        )
+        return
+    
+    conn.execute(text("ALTER TABLE usuarios ALTER COLUMN email TYPE citext"))
+    logger.info("🔧 usuarios.email convertido a CITEXT")
+
 @retry(
     stop=stop_after_attempt(MAX_RETRY_ATTEMPTS),
     wait=wait_exponential(min=RETRY_MIN_WAIT, max=RETRY_MAX_WAIT),
@@ -97,10 +201,26 @@ def create_tables():
     Se ejecuta al inicio de la aplicación.
     
     Implementa el mismo mecanismo de retry que test_connection.
+    
+    create_all solo crea lo que falta; los cambios sobre tablas existentes
+    (columnas, índices, tipos) se aplican después, de forma idempotente.
     """
     logger.info("📋 Creando/verificando tablas en la base de datos...")
     try:
-        Base.metadata.create_all(bind=engine)
+        with get_engine().begin() as conn:
+            # Tipo CITEXT usado por Usuario.email
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS citext"))
+        Base.metadata.create_all(bind=get_engine())
+        with get_engine().begin() as conn:
+            # Una réplica a la vez; sin statement_timeout (reescrituras de tabla e índices)
+            conn.execute(text("SELECT pg_advisory_xact_lock(:clave)"), {"clave": SCHEMA_MIGRATION_LOCK_KEY})
+            conn.execute(text("SET LOCAL statement_timeout = 0"))
+            _promover_nombre_proyecto_unico(conn)
+            _crear_indices_proyecto_usuario(conn)
+            _convertir_email_citext(conn)
+            # Columnas agregadas después de crear la tabla (create_all no altera tablas existentes)
+            conn.execute(text("ALTER TABLE tareas ADD COLUMN IF NOT EXISTS job_id VARCHAR(36)"))
+            conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_tareas_job_id ON tareas (job_id)"))
         logger.info("✅ Tablas creadas/verificadas correctamente")
     except (OperationalError, DBAPIError) as e:
         logger.error(f"❌ Error al crear tablas: {str(e)}")
@@ -111,8 +231,8 @@ def get_db():
     Generador de sesiones de base de datos.
     Asegura que las transacciones se cierren correctamente (ACID).
     
-    En caso de error de conexión durante una transacción,
-    pool_pre_ping=True intentará reconectar automáticamente.
+    Con DB_POOL_PRE_PING activado, las conexiones caídas se detectan y
+    reemplazan al obtenerlas del pool; pool_recycle renueva las antiguas.
     """
     db = SessionLocal()
     try:
@@ -141,6 +261,7 @@ def check_db_health():
         OperationalError, DBAPIError: Si no se puede conectar después de todos los reintentos
     """
     try:
+        engine = get_engine()
         with engine.connect() as connection:
             start_time = time.time()
             connection.execute(text("SELECT 1"))
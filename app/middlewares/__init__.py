@@ -4,9 +4,8 @@ Capa de middlewares - Manejo de requests y seguridad
 from .gatekeeper import (
     GatekeeperMiddleware,
     PermissionChecker,
-    gatekeeper_middleware_instance,
-    gatekeeper_middleware,
     get_current_user,
+    decode_token_cached,
     require_permission,
     require_role,
     protected,
@@ -16,9 +15,8 @@ from .gatekeeper import (
 __all__ = [
     "GatekeeperMiddleware",
     "PermissionChecker",
-    "gatekeeper_middleware_instance",
-    "gatekeeper_middleware",
     "get_current_user",
+    "decode_token_cached",
     "require_permission",
     "require_role",
     "protected",
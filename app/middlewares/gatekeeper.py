@@ -8,19 +8,72 @@ Valida tokens, verifica permisos, filtra solicitudes maliciosas y reduce la supe
 from typing import Optional, List, Callable
 from fastapi import Request, HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
-from functools import wraps
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from functools import wraps, lru_cache
+from collections import defaultdict, deque
+from cachetools import TTLCache
+import hashlib
+import logging
 import re
 import time
 
 # Importar configuración centralizada (External Configuration Store Pattern)
 from app.config import settings
 from app.services.auth_service import token_service
+from app.services import cache_service as cache
 
+# Hyperscan (opcional): escaneo multi-patrón en una sola pasada lineal.
+# Si no está instalado (p. ej. ARM o desarrollo) se usa la regex combinada.
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+
+logger = logging.getLogger(__name__)
 
 # Configuración del bearer token
 security = HTTPBearer()
 
+# Caché en memoria de tokens ya verificados (evita repetir la verificación HS256).
+# La clave es un hash del token para acotar memoria; la entrada nunca
+# sobrevive al claim "exp" del propio token.
+TOKEN_CACHE_MAXSIZE = 10_000
+TOKEN_CACHE_TTL_SECONDS = 30
+_token_cache: TTLCache = TTLCache(maxsize=TOKEN_CACHE_MAXSIZE, ttl=TOKEN_CACHE_TTL_SECONDS)
+
+
+def decode_token_cached(token: str) -> Optional[dict]:
+    """
+    Decodifica un token JWT reutilizando verificaciones recientes.
+    
+    Args:
+        token: Token JWT a validar
+        
+    Returns:
+        Payload del token si es válido, None en caso contrario
+    """
+    cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    now = time.time()
+    
+    cached = _token_cache.get(cache_key)
+    if cached is not None:
+        payload, expires_at = cached
+        if now < expires_at:
+            return payload
+        _token_cache.pop(cache_key, None)
+    
+    payload = token_service.decode_token(token)
+    if payload:
+        # Acotar la vida de la entrada al vencimiento del token
+        exp = payload.get("exp")
+        expires_at = min(exp, now + TOKEN_CACHE_TTL_SECONDS) if exp else now + TOKEN_CACHE_TTL_SECONDS
+        _token_cache[cache_key] = (payload, expires_at)
+    
+    return payload
+
 
 class GatekeeperMiddleware:
     """
@@ -39,6 +92,14 @@ class GatekeeperMiddleware:
         r"%[0-9a-fA-F]{2}",             # URL encoding sospechoso en exceso
     ]
     
+    # Unión de todos los patrones en una sola expresión compilada:
+    # un único escaneo por string en lugar de un re.search por patrón
+    # (compilada una sola vez al definir la clase; "(?i)" = case-insensitive).
+    # Cada patrón va en un grupo con nombre "p<índice>" para saber cuál coincidió
+    _COMBINED_SUSPICIOUS = re.compile(
+        "(?i)" + "|".join(f"(?P<p{i}>{p})" for i, p in enumerate(SUSPICIOUS_PATTERNS))
+    )
+    
     # Endpoints públicos que no requieren autenticación
     PUBLIC_ENDPOINTS = [
         "/",
@@ -53,129 +114,158 @@ class GatekeeperMiddleware:
         "/demo"
     ]
     
+    # Estructuras precalculadas para la verificación de endpoints públicos
+    PUBLIC_EXACT = frozenset(PUBLIC_ENDPOINTS)
+    PUBLIC_PREFIXES = ("/docs", "/openapi.json", "/redoc")  # Solo docs y openapi
+    
     # Límites de rate limiting por endpoint (requests por minuto)
     RATE_LIMITS = {}
     
-    def __init__(self):
-        self.request_logs = {}  # Para rate limiting simple
+    # Cada cuántas solicitudes se purgan las IPs sin actividad reciente
+    RATE_LIMIT_SWEEP_INTERVAL = 1000
+    
+    # Headers de seguridad agregados a las respuestas de endpoints protegidos
+    SECURITY_HEADERS = (
+        ("X-Content-Type-Options", "nosniff"),
+        ("X-Frame-Options", "DENY"),
+        ("X-XSS-Protection", "1; mode=block"),
+        ("Strict-Transport-Security", "max-age=31536000; includeSubDomains"),
+    )
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.request_logs: defaultdict[str, deque] = defaultdict(deque)  # Ventana deslizante por IP
+        self._requests_since_sweep = 0
+        self._hs_database = self._build_hyperscan_database()
         
-    async def __call__(self, request: Request, call_next):
+        # Límites de rate limiting leídos una sola vez (configurados externamente)
+        self._rl_window = settings.RATE_LIMIT_WINDOW_SECONDS
+        self._rl_max = settings.RATE_LIMIT_REQUESTS
+        
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
         Procesa cada request antes de que llegue a los endpoints.
         Implementa las validaciones de seguridad del Gatekeeper.
-        """
-        start_time = time.time()
         
-        # Debug: Log para requests a endpoints protegidos
-        if not self._is_public_endpoint(request.url.path):
-            print(f"🔐 Gatekeeper procesando: {request.method} {request.url.path}")
-            auth_headers = {k: v for k, v in request.headers.items() if 'auth' in k.lower() or 'token' in k.lower()}
+        Middleware ASGI puro: evita el task group y el stream intermedio
+        que agrega BaseHTTPMiddleware en cada request.
+        """
+        # Solo se filtran requests HTTP (lifespan/websocket pasan directo)
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        # 1. Verificar si es un endpoint público (camino rápido, sin trabajo adicional)
+        path = scope["path"]
+        if path in self.PUBLIC_EXACT or self._is_public_endpoint(path):
+            await self.app(scope, receive, send)
+            return
+        
+        start_time = time.monotonic()
+        request = Request(scope)
+        
+        # Debug: Log para requests a endpoints protegidos (solo si DEBUG está activo)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🔐 Gatekeeper procesando: %s %s", request.method, path)
+            auth_headers = [k for k in request.headers.keys() if 'auth' in k.lower() or 'token' in k.lower()]
             if auth_headers:
-                print(f"   Headers de auth encontrados: {list(auth_headers.keys())}")
-        
-        # 1. Verificar si es un endpoint público
-        if self._is_public_endpoint(request.url.path):
-            response = await call_next(request)
-            return response
+                logger.debug("   Headers de auth encontrados: %s", auth_headers)
         
         # 2. Filtrar solicitudes maliciosas (IDS/IPS básico)
         if self._is_suspicious_request(request):
-            return JSONResponse(
+            response = ORJSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={"detail": "Solicitud rechazada: contenido sospechoso detectado"}
             )
+            await response(scope, receive, send)
+            return
         
         # 3. Rate Limiting básico
-        if not self._check_rate_limit(request):
-            return JSONResponse(
+        if not await self._check_rate_limit(request, now=start_time):
+            response = ORJSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 content={"detail": "Demasiadas solicitudes. Por favor intente más tarde."}
             )
+            await response(scope, receive, send)
+            return
         
         # 4. Validar token JWT
         token = self._extract_token(request)
         if not token:
             # Log detallado para debugging
-            print(f"🚫 Token no encontrado para {request.method} {request.url.path}")
-            print(f"   Headers disponibles: {[h for h in request.headers.keys() if h.lower() in ['authorization', 'authorization-token', 'x-auth-token']]}")
-            return JSONResponse(
+            logger.debug("🚫 Token no encontrado para %s %s", request.method, path)
+            response = ORJSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": "No se proporcionó token de autenticación"},
                 headers={"WWW-Authenticate": "Bearer"}
             )
+            await response(scope, receive, send)
+            return
         
         # 5. Decodificar y validar token
-        payload = token_service.decode_token(token)
+        payload = decode_token_cached(token)
         if not payload:
-            return JSONResponse(
+            response = ORJSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": "Token inválido o expirado"},
                 headers={"WWW-Authenticate": "Bearer"}
             )
+            await response(scope, receive, send)
+            return
         
-        # 6. Agregar información del usuario al request state
+        # 6. Agregar información del usuario al request state (compartido vía scope)
         request.state.user = payload
         
-        # 7. Procesar request
-        response = await call_next(request)
-        
-        # 8. Agregar headers de seguridad a la respuesta
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        
-        # 9. Logging de tiempo de procesamiento
-        process_time = time.time() - start_time
-        response.headers["X-Process-Time"] = str(process_time)
+        async def send_with_security_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # 8. Agregar headers de seguridad a la respuesta
+                headers = MutableHeaders(scope=message)
+                for name, value in self.SECURITY_HEADERS:
+                    headers[name] = value
+                
+                # 9. Logging de tiempo de procesamiento
+                process_time = time.monotonic() - start_time
+                headers["X-Process-Time"] = f"{process_time:.6f}"
+            await send(message)
         
-        return response
+        # 7. Procesar request
+        await self.app(scope, receive, send_with_security_headers)
     
     def _is_public_endpoint(self, path: str) -> bool:
         """Verifica si el endpoint es público"""
-        # Verificar coincidencias exactas primero
-        if path in self.PUBLIC_ENDPOINTS:
-            return True
-        
-        # Verificar paths con trailing slash
-        if path.rstrip('/') in self.PUBLIC_ENDPOINTS:
-            return True
-        
-        # Verificar prefijos específicos (solo para docs y openapi)
-        for endpoint in self.PUBLIC_ENDPOINTS:
-            if endpoint in ["/docs", "/openapi.json", "/redoc"]:
-                if path.startswith(endpoint):
-                    return True
-        
-        return False
+        # Coincidencia exacta, con trailing slash o por prefijo (docs y openapi)
+        return (
+            path in self.PUBLIC_EXACT
+            or path.rstrip('/') in self.PUBLIC_EXACT
+            or path.startswith(self.PUBLIC_PREFIXES)
+        )
     
     def _extract_token(self, request: Request) -> Optional[str]:
         """Extrae el token JWT del header Authorization o alternativas"""
-        # Método 1: Intentar obtener el header Authorization (case-insensitive)
-        auth_header = None
-        for header_name, header_value in request.headers.items():
-            if header_name.lower() == "authorization":
-                auth_header = header_value
-                break
+        # Método 1: Obtener el header Authorization (Headers ya es case-insensitive)
+        auth_header = request.headers.get("authorization")
         
         if auth_header:
-            # Normalizar el header (eliminar espacios extra y hacer case-insensitive)
+            # Normalizar el header (eliminar espacios extra)
             auth_header = auth_header.strip()
             
+            # Normalizar solo el prefijo del esquema, no el token completo
+            prefix = auth_header[:7].lower()
+            
             # Verificar que comience con "Bearer" (case-insensitive)
-            if auth_header.lower().startswith("bearer "):
+            if prefix == "bearer ":
                 # Extraer el token (después de "Bearer ")
                 token = auth_header[7:].strip()  # "Bearer " tiene 7 caracteres
                 if token:
                     return token
-            elif auth_header.lower().startswith("bearer"):
+            elif prefix.startswith("bearer"):
                 # Sin espacio después de Bearer (formato no estándar pero común)
                 token = auth_header[6:].strip()
                 if token:
                     return token
             else:
                 # Asumir que todo el header es el token (fallback)
-                if auth_header and len(auth_header) > 10:  # Los JWT típicamente son largos
+                if len(auth_header) > 10:  # Los JWT típicamente son largos
                     return auth_header
         
         # Método 2: Intentar desde query parameter (fallback para debugging)
@@ -190,7 +280,8 @@ class GatekeeperMiddleware:
                 return token.strip()
         
         # Log para debugging si no se encontró token
-        print(f"⚠️  No se encontró token. Headers recibidos: {list(request.headers.keys())}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("⚠️  No se encontró token. Headers recibidos: %s", list(request.headers.keys()))
         return None
     
     def _is_suspicious_request(self, request: Request) -> bool:
@@ -198,59 +289,161 @@ class GatekeeperMiddleware:
         Detecta patrones sospechosos en la solicitud.
         Implementa un IDS/IPS básico.
         """
-        # Verificar URL
-        url_str = str(request.url)
-        for pattern in self.SUSPICIOUS_PATTERNS:
-            if re.search(pattern, url_str, re.IGNORECASE):
-                print(f"🚨 Patrón sospechoso detectado en URL: {pattern}")
-                return True
+        # Verificar path (esquema y host no contienen datos del atacante;
+        # el query string se revisa a continuación por parámetro)
+        match = self._find_suspicious_pattern(request.url.path)
+        if match:
+            logger.warning("🚨 Patrón sospechoso detectado en URL: %s", match)
+            return True
         
-        # Verificar query parameters
-        for key, value in request.query_params.items():
-            for pattern in self.SUSPICIOUS_PATTERNS:
-                if re.search(pattern, f"{key}={value}", re.IGNORECASE):
-                    print(f"🚨 Patrón sospechoso detectado en query param: {key}")
-                    return True
+        # Verificar query parameters (un solo escaneo sobre todos los pares)
+        if request.query_params:
+            params_str = "&".join(f"{key}={value}" for key, value in request.query_params.items())
+            match = self._find_suspicious_pattern(params_str)
+            if match:
+                logger.warning("🚨 Patrón sospechoso detectado en query params: %s", match)
+                return True
         
         # Verificar headers sospechosos
         suspicious_headers = ['X-Forwarded-For', 'X-Real-IP']
         for header in suspicious_headers:
             value = request.headers.get(header, "")
             if ".." in value or ";" in value:
-                print(f"🚨 Header sospechoso: {header}")
+                logger.warning("🚨 Header sospechoso: %s", header)
                 return True
         
         return False
     
-    def _check_rate_limit(self, request: Request) -> bool:
+    def _build_hyperscan_database(self):
+        """
+        Compila SUSPICIOUS_PATTERNS en una base de datos Hyperscan.
+        Retorna None si Hyperscan no está disponible o la compilación falla.
+        """
+        if hyperscan is None:
+            return None
+        
+        try:
+            database = hyperscan.Database()
+            database.compile(
+                expressions=[p.encode() for p in self.SUSPICIOUS_PATTERNS],
+                ids=list(range(len(self.SUSPICIOUS_PATTERNS))),
+                elements=len(self.SUSPICIOUS_PATTERNS),
+                flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH]
+                * len(self.SUSPICIOUS_PATTERNS)
+            )
+            return database
+        except Exception as e:
+            logger.warning("⚠️  No se pudo compilar Hyperscan, usando regex combinada: %s", e)
+            return None
+    
+    def _find_suspicious_pattern(self, text: str) -> Optional[str]:
+        """
+        Busca cualquier patrón sospechoso en el texto con un único escaneo.
+        Retorna el patrón que coincidió (no el texto del request, que es controlado
+        por el atacante y no debe llegar a los logs) o None si no hay ninguno.
+        """
+        if self._hs_database is None:
+            match = self._COMBINED_SUSPICIOUS.search(text)
+            return self.SUSPICIOUS_PATTERNS[int(match.lastgroup[1:])] if match else None
+        
+        matched_ids = []
+        
+        def on_match(pattern_id, start, end, flags, context):
+            matched_ids.append(pattern_id)
+            return True  # Detener el escaneo en la primera coincidencia
+        
+        try:
+            self._hs_database.scan(text.encode("utf-8", "replace"), match_event_handler=on_match)
+        except hyperscan.error:
+            # El escaneo interrumpido por el callback puede reportarse como error
+            if not matched_ids:
+                raise
+        
+        return self.SUSPICIOUS_PATTERNS[matched_ids[0]] if matched_ids else None
+    
+    async def _check_rate_limit(self, request: Request, now: float) -> bool:
         """
         Implementa rate limiting básico por IP.
         Retorna True si está dentro del límite, False si excede.
+        
+        Si Redis está disponible el contador se comparte entre todos los
+        workers/instancias; si no, se usa la ventana deslizante en memoria.
+        
+        Args:
+            request: Request entrante
+            now: Instante actual de time.monotonic() (reutilizado del request)
         """
         # Obtener IP del cliente
         client_ip = request.client.host if request.client else "unknown"
-        current_time = time.time()
         
-        # Inicializar si no existe
-        if client_ip not in self.request_logs:
-            self.request_logs[client_ip] = []
+        redis_allowed = await self._check_rate_limit_redis(client_ip)
+        if redis_allowed is not None:
+            return redis_allowed
         
-        # Limpiar requests antiguos (configurado externamente)
-        window_seconds = settings.RATE_LIMIT_WINDOW_SECONDS
-        self.request_logs[client_ip] = [
-            timestamp for timestamp in self.request_logs[client_ip]
-            if current_time - timestamp < window_seconds
-        ]
+        # Limpiar requests antiguos
+        cutoff = now - self._rl_window
+        
+        # Purga periódica de IPs inactivas para acotar el uso de memoria
+        self._requests_since_sweep += 1
+        if self._requests_since_sweep >= self.RATE_LIMIT_SWEEP_INTERVAL:
+            self._sweep_request_logs(cutoff)
+        
+        # Obtener (o inicializar) la ventana de la IP con una sola búsqueda
+        timestamps = self.request_logs[client_ip]
+        
+        # Descartar timestamps fuera de la ventana (ordenados cronológicamente)
+        while timestamps and timestamps[0] <= cutoff:
+            timestamps.popleft()
         
-        # Verificar límite (configurado externamente)
-        max_requests = settings.RATE_LIMIT_REQUESTS
-        if len(self.request_logs[client_ip]) >= max_requests:
-            print(f"🚨 Rate limit excedido para IP: {client_ip}")
+        # Verificar límite
+        if len(timestamps) >= self._rl_max:
+            logger.warning("🚨 Rate limit excedido para IP: %s", client_ip)
             return False
         
         # Agregar request actual
-        self.request_logs[client_ip].append(current_time)
+        timestamps.append(now)
         return True
+    
+    async def _check_rate_limit_redis(self, client_ip: str) -> Optional[bool]:
+        """
+        Rate limiting compartido en Redis (ventana fija con INCR + EXPIRE).
+        Retorna None si Redis no está disponible para usar el fallback en memoria.
+        
+        Usa el cliente asíncrono con pool propio y timeouts cortos: el round-trip
+        no bloquea el event loop ni compite con el pool de los handlers.
+        """
+        redis_client = cache.get_async_redis()
+        if not redis_client:
+            return None
+        
+        # La ventana se indexa con hora de pared: debe coincidir entre instancias
+        window_seconds = self._rl_window
+        key = f"ratelimit:{client_ip}:{int(time.time() // window_seconds)}"
+        
+        try:
+            async with redis_client.pipeline() as pipe:
+                pipe.incr(key)
+                pipe.expire(key, window_seconds)
+                count, _ = await pipe.execute()
+        except cache.redis.RedisError as e:
+            logger.warning("⚠️  Error en rate limiting con Redis: %s", e)
+            return None
+        
+        if count > self._rl_max:
+            logger.warning("🚨 Rate limit excedido para IP: %s", client_ip)
+            return False
+        
+        return True
+    
+    def _sweep_request_logs(self, cutoff: float) -> None:
+        """Elimina las IPs cuya última solicitud quedó fuera de la ventana"""
+        self._requests_since_sweep = 0
+        stale_ips = [
+            ip for ip, timestamps in self.request_logs.items()
+            if not timestamps or timestamps[-1] <= cutoff
+        ]
+        for ip in stale_ips:
+            del self.request_logs[ip]
 
 
 class PermissionChecker:
@@ -259,21 +452,21 @@ class PermissionChecker:
     Parte del sistema Gatekeeper para control de acceso granular.
     """
     
-    # Definición de permisos por rol
+    # Definición de permisos por rol (frozensets: pertenencia en O(1))
     ROLE_PERMISSIONS = {
-        "admin": ["*"],  # Acceso total
-        "manager": [
+        "admin": frozenset({"*"}),  # Acceso total
+        "manager": frozenset({
             "usuarios:read",
             "usuarios:create",
             "proyectos:*",
             "tareas:*"
-        ],
-        "desarrollador": [
+        }),
+        "desarrollador": frozenset({
             "usuarios:read",
             "proyectos:read",
             "tareas:read",
             "tareas:update"
-        ]
+        })
     }
     
     @classmethod
@@ -288,11 +481,19 @@ class PermissionChecker:
         Returns:
             True si tiene permiso, False en caso contrario
         """
-        if role not in cls.ROLE_PERMISSIONS:
+        return cls._check_permission(role, permission)
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _check_permission(role: str, permission: str) -> bool:
+        """
+        Resuelve (rol, permiso) una sola vez; el número de combinaciones
+        posibles es pequeño, por lo que el caché alcanza casi 100% de aciertos.
+        """
+        role_perms = PermissionChecker.ROLE_PERMISSIONS.get(role)
+        if role_perms is None:
             return False
         
-        role_perms = cls.ROLE_PERMISSIONS[role]
-        
         # Verificar wildcard total
         if "*" in role_perms:
             return True
@@ -303,35 +504,26 @@ class PermissionChecker:
         
         # Verificar wildcard de recurso (e.g., "proyectos:*")
         resource = permission.split(":")[0]
-        if f"{resource}:*" in role_perms:
-            return True
-        
-        return False
-
-
-# Instancia global del middleware
-gatekeeper_middleware_instance = GatekeeperMiddleware()
-
-# Función middleware compatible con FastAPI/Starlette
-async def gatekeeper_middleware(request: Request, call_next):
-    """
-    Función middleware que delega a la instancia de GatekeeperMiddleware.
-    Compatible con FastAPI/Starlette BaseHTTPMiddleware.
-    """
-    return await gatekeeper_middleware_instance(request, call_next)
+        return f"{resource}:*" in role_perms
 
 
 # Dependency para obtener el usuario actual desde el token
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> dict:
     """
     Dependency que valida el token y retorna la información del usuario.
     Usado en endpoints protegidos para obtener el usuario autenticado.
+    Reutiliza el payload ya validado por GatekeeperMiddleware si existe.
     """
+    user = getattr(request.state, "user", None)
+    if user:
+        return user
+    
     token = credentials.credentials
     
-    payload = token_service.decode_token(token)
+    payload = decode_token_cached(token)
     if not payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -3,7 +3,8 @@ Modelos SQLAlchemy para usuarios, proyectos y tareas.
 Implementa relaciones y restricciones para garantizar integridad ACID.
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table, UniqueConstraint, Index
+from sqlalchemy.dialects.postgresql import CITEXT
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.config.database import Base
@@ -13,7 +14,11 @@ proyecto_usuario_association = Table(
     'proyecto_usuario',
     Base.metadata,
     Column('proyecto_id', Integer, ForeignKey('proyectos.id', ondelete='CASCADE')),
-    Column('usuario_id', Integer, ForeignKey('usuarios.id', ondelete='CASCADE'))
+    Column('usuario_id', Integer, ForeignKey('usuarios.id', ondelete='CASCADE')),
+    # Evita asignaciones duplicadas y sirve de índice para proyecto -> usuarios
+    UniqueConstraint('proyecto_id', 'usuario_id', name='uq_proy_usr'),
+    # Índice inverso para usuario -> proyectos
+    Index('ix_proy_usr_reverse', 'usuario_id', 'proyecto_id')
 )
 
 class Usuario(Base):
@@ -25,7 +30,7 @@ class Usuario(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String(100), nullable=False, index=True)
-    email = Column(String(255), unique=True, nullable=False, index=True)
+    email = Column(CITEXT, unique=True, nullable=False, index=True)  # Comparación sin distinguir mayúsculas
     rol = Column(String(50), default="desarrollador")
     fecha_creacion = Column(DateTime(timezone=True), server_default=func.now())
     fecha_actualizacion = Column(DateTime(timezone=True), onupdate=func.now())
@@ -45,7 +50,7 @@ class Proyecto(Base):
     __tablename__ = "proyectos"
 
     id = Column(Integer, primary_key=True, index=True)
-    nombre = Column(String(200), nullable=False, index=True)
+    nombre = Column(String(200), nullable=False, unique=True, index=True)
     descripcion = Column(Text)
     estado = Column(String(50), default="activo")  # activo, pausado, completado
     fecha_inicio = Column(DateTime(timezone=True), server_default=func.now())
@@ -76,6 +81,10 @@ class Tarea(Base):
     fecha_creacion = Column(DateTime(timezone=True), server_default=func.now())
     fecha_actualizacion = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Job de la cola que creó la tarea (NULL si se creó directamente): hace idempotente
+    # el INSERT del worker ante mensajes entregados más de una vez
+    job_id = Column(String(36), unique=True, index=True, nullable=True)
+
     # Claves foráneas
     proyecto_id = Column(Integer, ForeignKey("proyectos.id", ondelete="CASCADE"), nullable=False)
     usuario_responsable_id = Column(Integer, ForeignKey("usuarios.id", ondelete="SET NULL"), nullable=True)
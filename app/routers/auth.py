@@ -6,7 +6,9 @@ Parte del sistema Gatekeeper para control de acceso centralizado.
 
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from typing import Dict
+from cachetools import TTLCache
 
 from app.schemas import LoginRequest, TokenResponse, UserInfo, ErrorResponse
 from app.services.auth_service import (
@@ -16,7 +18,7 @@ from app.services.auth_service import (
     get_token_service,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
-from app.middlewares.gatekeeper import get_current_user
+from app.middlewares.gatekeeper import get_current_user, PermissionChecker
 
 
 router = APIRouter(
@@ -25,6 +27,22 @@ router = APIRouter(
     responses={401: {"model": ErrorResponse}},
 )
 
+# Caché del estado de LDAP para no abrir una conexión en cada consulta de /status
+LDAP_HEALTH_TTL_SECONDS = 5
+_ldap_health_cache: TTLCache = TTLCache(maxsize=1, ttl=LDAP_HEALTH_TTL_SECONDS)
+
+# Respuesta de permisos precalculada por rol (solo depende del rol)
+_PERMS_BY_ROLE: Dict[str, dict] = {
+    role: {
+        "rol": role,
+        "permissions": sorted(perms),
+        "can_admin": role == "admin",
+        "can_manage_projects": role in ("admin", "manager"),
+        "can_manage_users": role in ("admin", "manager"),
+    }
+    for role, perms in PermissionChecker.ROLE_PERMISSIONS.items()
+}
+
 
 @router.post("/login", response_model=TokenResponse, status_code=status.HTTP_200_OK)
 async def login(
@@ -63,8 +81,9 @@ async def login(
     - Manager: username=`manager`, password=`manager_password`
     - Developer: username=`developer`, password=`developer_password`
     """
-    # Autenticar contra LDAP (Federated Identity)
-    user_info = ldap_service.authenticate_user(
+    # Autenticar contra LDAP (Federated Identity) en el threadpool: el bind es bloqueante
+    user_info = await run_in_threadpool(
+        ldap_service.authenticate_user,
         credentials.username,
         credentials.password
     )
@@ -110,7 +129,7 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user)):
     Authorization: Bearer <token>
     ```
     """
-    return UserInfo(
+    return UserInfo.model_construct(
         username=current_user.get("username", ""),
         email=current_user.get("email", ""),
         nombre=current_user.get("nombre", ""),
@@ -120,14 +139,18 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user)):
 
 
 @router.get("/status")
-async def auth_status():
+async def auth_status(ldap_service: LDAPAuthService = Depends(get_ldap_service)):
     """
     Verificar el estado del sistema de autenticación.
     
     Endpoint público para verificar que el servicio de autenticación está funcionando.
+    El estado de la conexión LDAP se cachea durante LDAP_HEALTH_TTL_SECONDS segundos.
     """
-    ldap_service = get_ldap_service()
-    ldap_connected = ldap_service.verify_ldap_connection()
+    try:
+        ldap_connected = _ldap_health_cache["ldap"]
+    except KeyError:
+        ldap_connected = await run_in_threadpool(ldap_service.verify_ldap_connection)
+        _ldap_health_cache["ldap"] = ldap_connected
     
     return {
         "status": "operational" if ldap_connected else "degraded",
@@ -163,17 +186,20 @@ async def get_user_permissions(current_user: dict = Depends(get_current_user)):
     
     Útil para que el frontend determine qué acciones puede realizar el usuario.
     """
-    from app.middlewares.gatekeeper import PermissionChecker
-    
     role = current_user.get("rol", "desarrollador")
-    permissions = PermissionChecker.ROLE_PERMISSIONS.get(role, [])
+    perms = _PERMS_BY_ROLE.get(role)
+    if perms is None:
+        # Rol desconocido: sin permisos, igual que PermissionChecker
+        perms = {
+            "rol": role,
+            "permissions": [],
+            "can_admin": False,
+            "can_manage_projects": False,
+            "can_manage_users": False,
+        }
     
     return {
         "username": current_user.get("username"),
-        "rol": role,
-        "permissions": permissions,
-        "can_admin": role == "admin",
-        "can_manage_projects": role in ["admin", "manager"],
-        "can_manage_users": role in ["admin", "manager"]
+        **perms
     }
 
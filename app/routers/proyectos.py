@@ -5,16 +5,20 @@ Servicio sin estado (stateless) - cada request es independiente.
 Incluye patrón Cache-Aside para optimización de consultas frecuentes.
 """
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Dict, List, Optional, Tuple, Union
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.config import get_db
-from app.models import Proyecto, Usuario
+from app.models import Proyecto, Usuario, proyecto_usuario_association
 from app.schemas import (
-    ProyectoCreate, ProyectoUpdate, ProyectoResponse, 
-    AsignarUsuarioProyecto, ErrorResponse, SuccessResponse
+    ProyectoCreate, ProyectoUpdate, ProyectoListItem, ProyectoResponse, ProyectoPage,
+    AsignarUsuarioProyecto, ErrorResponse, SuccessResponse, construct_response
 )
 from app.services import cache_service as cache
 
@@ -24,6 +28,72 @@ router = APIRouter(
     responses={404: {"model": ErrorResponse}},
 )
 
+# Índice único que garantiza nombres de proyecto no repetidos
+NOMBRE_UNICO_CONSTRAINT = "ix_proyectos_nombre"
+
+# Tope de registros por página en el listado
+MAX_PAGE_SIZE = 500
+
+
+def _viola_constraint(error: IntegrityError, constraint: str) -> bool:
+    """Indica si el IntegrityError proviene de la restricción indicada"""
+    diag = getattr(error.orig, "diag", None)
+    return getattr(diag, "constraint_name", None) == constraint
+
+
+def _es_nombre_duplicado(error: IntegrityError) -> bool:
+    """Indica si el IntegrityError proviene de la restricción de nombre único"""
+    return _viola_constraint(error, NOMBRE_UNICO_CONSTRAINT)
+
+
+def _usuarios_por_proyecto(db: Session, proyecto_ids: List[int]) -> Dict[int, List[dict]]:
+    """
+    Cargar los usuarios de varios proyectos en una sola consulta Core (sin instancias ORM).
+    Retorna un diccionario proyecto_id -> lista de filas de usuario.
+    """
+    usuarios: Dict[int, List[dict]] = {pid: [] for pid in proyecto_ids}
+    if not proyecto_ids:
+        return usuarios
+    
+    stmt = (
+        select(proyecto_usuario_association.c.proyecto_id, *Usuario.__table__.columns)
+        .join(Usuario.__table__, Usuario.id == proyecto_usuario_association.c.usuario_id)
+        .where(proyecto_usuario_association.c.proyecto_id.in_(proyecto_ids))
+    )
+    for row in db.execute(stmt).mappings():
+        usuario = dict(row)
+        usuarios[usuario.pop("proyecto_id")].append(usuario)
+    
+    return usuarios
+
+
+def _nombres_proyecto_usuario(db: Session, proyecto_id: int, usuario_id: int) -> Tuple[str, str]:
+    """
+    Obtener en una sola consulta los nombres del proyecto y del usuario.
+    Lanza 404 si alguno de los dos no existe.
+    """
+    proyecto_nombre, usuario_nombre = db.execute(
+        select(
+            select(Proyecto.nombre).where(Proyecto.id == proyecto_id).scalar_subquery(),
+            select(Usuario.nombre).where(Usuario.id == usuario_id).scalar_subquery()
+        )
+    ).one()
+    
+    if proyecto_nombre is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Proyecto con ID {proyecto_id} no encontrado"
+        )
+    
+    if usuario_nombre is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Usuario con ID {usuario_id} no encontrado"
+        )
+    
+    return proyecto_nombre, usuario_nombre
+
+
 @router.post("/", response_model=ProyectoResponse, status_code=status.HTTP_201_CREATED)
 async def crear_proyecto(
     proyecto: ProyectoCreate,
@@ -38,42 +108,51 @@ async def crear_proyecto(
     - **fecha_fin**: Fecha de finalización estimada (opcional)
     """
     try:
-        # Verificar si ya existe un proyecto con el mismo nombre
-        proyecto_existente = db.query(Proyecto).filter(Proyecto.nombre == proyecto.nombre).first()
-        if proyecto_existente:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Ya existe un proyecto con el nombre '{proyecto.nombre}'"
-            )
-        
-        # Crear nuevo proyecto
+        # Crear nuevo proyecto (la unicidad del nombre la garantiza la base de datos)
         db_proyecto = Proyecto(**proyecto.model_dump())
         db.add(db_proyecto)
         db.commit()  # Commit explícito para ACID
         db.refresh(db_proyecto)
         
-        # Invalidar caché de listas de proyectos
-        cache.invalidate_proyecto_cache()
+        # Write-through: guardar el proyecto recién creado e invalidar las listas
+        proyecto_dict = jsonable_encoder(construct_response(ProyectoResponse, db_proyecto))
+        cache.set_proyecto_in_cache(db_proyecto.id, orjson.dumps(proyecto_dict))
+        cache.add_proyecto_id_to_cache(db_proyecto.id)
+        cache.bump_proyectos_version()
         
-        return db_proyecto
+        return proyecto_dict
         
-    except IntegrityError:
+    except IntegrityError as e:
         db.rollback()  # Rollback en caso de error para mantener ACID
+        if _es_nombre_duplicado(e):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Ya existe un proyecto con el nombre '{proyecto.nombre}'"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Error de integridad en la base de datos"
         )
 
-@router.get("/", response_model=List[ProyectoResponse])
+# El cuerpo se arma como JSON ya serializado: el modelo solo documenta sus tres formas
+@router.get("/", response_model=Union[List[ProyectoListItem], List[ProyectoResponse], ProyectoPage])
 async def listar_proyectos(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE),
     estado: str = None,
+    include: List[str] = Query(default=[]),
+    cursor: Optional[int] = Query(default=None, ge=0),
     db: Session = Depends(get_db)
 ):
     """
-    Obtener lista de todos los proyectos con sus usuarios asignados.
+    Obtener lista de todos los proyectos.
     Soporta filtrado por estado y paginación para escalabilidad.
+    Los usuarios asignados solo se cargan si se pide `include=usuarios`.
+    
+    **Paginación por cursor (keyset):** si se envía `cursor` (0 para la primera página),
+    se devuelven los proyectos con `id > cursor` ordenados por id, con la forma
+    `{"items": [...], "next_cursor": <id o null>}`. El costo no crece con la profundidad
+    de la página, a diferencia de `skip`.
     
     **Patrón Cache-Aside aplicado:**
     1. Intenta obtener datos desde Redis
@@ -81,50 +160,63 @@ async def listar_proyectos(
     3. Guarda resultado en caché para futuras consultas
     
     - **skip**: Número de registros a omitir (default: 0)
-    - **limit**: Número máximo de registros a devolver (default: 100)
+    - **limit**: Número máximo de registros a devolver (default: 100, máximo: 500)
     - **estado**: Filtrar por estado (activo, pausado, completado)
+    - **include**: Relaciones opcionales a incluir (usuarios)
+    - **cursor**: Último id recibido; activa la paginación por cursor e ignora `skip`
     """
-    #Intentar obtener desde caché (Cache-Aside)
-    cached_proyectos = cache.get_proyectos_list_from_cache(skip, limit, estado)
+    include_usuarios = "usuarios" in include
+    
+    #Versión de las listas leída una sola vez, antes de consultar la base de datos: si una
+    #escritura la incrementa mientras tanto, el resultado se guarda bajo la versión vieja
+    lista_version = cache.get_proyectos_version()
+    
+    #Intentar obtener desde caché (Cache-Aside): se devuelve el JSON tal cual, sin re-serializar
+    cached_proyectos = cache.get_proyectos_list_from_cache(
+        skip, limit, estado, include_usuarios, cursor, version=lista_version
+    )
     if cached_proyectos is not None:
-        return cached_proyectos
+        return Response(content=cached_proyectos, media_type="application/json")
     
-    #Si no está en caché, consultar base de datos
-    query = db.query(Proyecto)
+    #Si no está en caché, consultar base de datos (filas Core, sin hidratar instancias ORM)
+    stmt = select(*Proyecto.__table__.columns).order_by(Proyecto.id)
     
     # Filtrar por estado si se proporciona
     if estado:
-        query = query.filter(Proyecto.estado == estado)
-    
-    proyectos = query.offset(skip).limit(limit).all()
-    
-    #Convertir a dict para serialización y guardar en caché
-    proyectos_dict = [
-        {
-            "id": p.id,
-            "nombre": p.nombre,
-            "descripcion": p.descripcion,
-            "estado": p.estado,
-            "fecha_inicio": p.fecha_inicio.isoformat() if p.fecha_inicio else None,
-            "fecha_fin": p.fecha_fin.isoformat() if p.fecha_fin else None,
-            "fecha_creacion": p.fecha_creacion.isoformat() if p.fecha_creacion else None,
-            "fecha_actualizacion": p.fecha_actualizacion.isoformat() if p.fecha_actualizacion else None,
-            "usuarios": [
-                {
-                    "id": u.id,
-                    "nombre": u.nombre,
-                    "email": u.email,
-                    "rol": u.rol,
-                    "fecha_creacion": u.fecha_creacion.isoformat() if u.fecha_creacion else None,
-                    "fecha_actualizacion": u.fecha_actualizacion.isoformat() if u.fecha_actualizacion else None
-                } for u in p.usuarios
-            ]
-        } for p in proyectos
-    ]
-    
-    cache.set_proyectos_list_in_cache(proyectos_dict, skip, limit, estado)
-    
-    return proyectos_dict
+        stmt = stmt.where(Proyecto.estado == estado)
+    
+    # Keyset: búsqueda en el índice de la PK en lugar de descartar `skip` filas
+    if cursor is not None:
+        stmt = stmt.where(Proyecto.id > cursor)
+    else:
+        stmt = stmt.offset(skip)
+    
+    proyectos = db.execute(stmt.limit(limit)).mappings().all()
+    
+    if include_usuarios:
+        # Una sola consulta adicional para los usuarios de todos los proyectos (evita N+1)
+        usuarios = _usuarios_por_proyecto(db, [p["id"] for p in proyectos])
+        items = [construct_response(ProyectoResponse, {**p, "usuarios": usuarios[p["id"]]}) for p in proyectos]
+    else:
+        items = [construct_response(ProyectoListItem, p) for p in proyectos]
+    
+    #Serializar cada proyecto una sola vez; la lista se arma uniendo esos mismos bytes
+    items_json = {p["id"]: orjson.dumps(jsonable_encoder(item)) for p, item in zip(proyectos, items)}
+    proyectos_json = b"[" + b",".join(items_json.values()) + b"]"
+    if cursor is not None:
+        # Hay página siguiente solo si esta vino completa
+        next_cursor = proyectos[-1]["id"] if len(proyectos) == limit else None
+        proyectos_json = b'{"items":' + proyectos_json + b',"next_cursor":' + orjson.dumps(next_cursor) + b"}"
+    
+    #Guardar la lista y, si los elementos son completos (con usuarios), precargar también
+    #el detalle de cada proyecto: todo en un solo round-trip a Redis
+    cache.set_proyectos_list_in_cache(
+        proyectos_json, skip, limit, estado, include_usuarios, cursor,
+        proyectos_items=items_json if include_usuarios else None,
+        version=lista_version
+    )
+    
+    return Response(content=proyectos_json, media_type="application/json")
 
 @router.get("/{proyecto_id}", response_model=ProyectoResponse)
 async def obtener_proyecto(
@@ -142,13 +234,15 @@ async def obtener_proyecto(
     
     - **proyecto_id**: ID único del proyecto
     """
-    #Intentar obtener desde caché (Cache-Aside)
+    #Intentar obtener desde caché (Cache-Aside): se devuelve el JSON tal cual, sin re-parsear ni re-validar
     cached_proyecto = cache.get_proyecto_from_cache(proyecto_id)
     if cached_proyecto is not None:
-        return cached_proyecto
+        return Response(content=cached_proyecto, media_type="application/json")
     
-    #Si no está en caché, consultar base de datos
-    proyecto = db.query(Proyecto).filter(Proyecto.id == proyecto_id).first()
+    #Si no está en caché, consultar base de datos (filas Core, sin hidratar instancias ORM)
+    proyecto = db.execute(
+        select(*Proyecto.__table__.columns).where(Proyecto.id == proyecto_id)
+    ).mappings().first()
     
     if not proyecto:
         raise HTTPException(
@@ -156,31 +250,15 @@ async def obtener_proyecto(
             detail=f"Proyecto con ID {proyecto_id} no encontrado"
         )
     
-    #Convertir a dict para serialización y guardar en caché
-    proyecto_dict = {
-        "id": proyecto.id,
-        "nombre": proyecto.nombre,
-        "descripcion": proyecto.descripcion,
-        "estado": proyecto.estado,
-        "fecha_inicio": proyecto.fecha_inicio.isoformat() if proyecto.fecha_inicio else None,
-        "fecha_fin": proyecto.fecha_fin.isoformat() if proyecto.fecha_fin else None,
-        "fecha_creacion": proyecto.fecha_creacion.isoformat() if proyecto.fecha_creacion else None,
-        "fecha_actualizacion": proyecto.fecha_actualizacion.isoformat() if proyecto.fecha_actualizacion else None,
-        "usuarios": [
-            {
-                "id": u.id,
-                "nombre": u.nombre,
-                "email": u.email,
-                "rol": u.rol,
-                "fecha_creacion": u.fecha_creacion.isoformat() if u.fecha_creacion else None,
-                "fecha_actualizacion": u.fecha_actualizacion.isoformat() if u.fecha_actualizacion else None
-            } for u in proyecto.usuarios
-        ]
-    }
-    
-    cache.set_proyecto_in_cache(proyecto_id, proyecto_dict)
-    
-    return proyecto_dict
+    #Serializar una sola vez a bytes JSON, guardar en caché y responder con los mismos bytes
+    usuarios = _usuarios_por_proyecto(db, [proyecto_id])[proyecto_id]
+    proyecto_json = orjson.dumps(
+        jsonable_encoder(construct_response(ProyectoResponse, {**proyecto, "usuarios": usuarios}))
+    )
+    
+    cache.set_proyecto_in_cache(proyecto_id, proyecto_json)
+    
+    return Response(content=proyecto_json, media_type="application/json")
 
 @router.put("/{proyecto_id}", response_model=ProyectoResponse)
 async def actualizar_proyecto(
@@ -199,7 +277,7 @@ async def actualizar_proyecto(
     - **fecha_fin**: Nueva fecha de finalización (opcional)
     """
     # Buscar proyecto existente
-    db_proyecto = db.query(Proyecto).filter(Proyecto.id == proyecto_id).first()
+    db_proyecto = db.get(Proyecto, proyecto_id)
     
     if not db_proyecto:
         raise HTTPException(
@@ -211,32 +289,27 @@ async def actualizar_proyecto(
         # Actualizar solo los campos proporcionados
         update_data = proyecto_update.model_dump(exclude_unset=True)
         
-        # Verificar nombre único si se está actualizando
-        if "nombre" in update_data:
-            existing_nombre = db.query(Proyecto).filter(
-                Proyecto.nombre == update_data["nombre"],
-                Proyecto.id != proyecto_id
-            ).first()
-            if existing_nombre:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Ya existe un proyecto con el nombre '{update_data['nombre']}'"
-                )
-        
-        # Aplicar actualizaciones
+        # Aplicar actualizaciones (la unicidad del nombre la garantiza la base de datos)
         for field, value in update_data.items():
             setattr(db_proyecto, field, value)
         
         db.commit()  # Commit explícito para ACID
         db.refresh(db_proyecto)
         
-        # Invalidar caché del proyecto actualizado
-        cache.invalidate_proyecto_cache(proyecto_id)
+        # Write-through: reemplazar el proyecto cacheado e invalidar las listas
+        proyecto_dict = jsonable_encoder(construct_response(ProyectoResponse, db_proyecto))
+        cache.set_proyecto_in_cache(proyecto_id, orjson.dumps(proyecto_dict))
+        cache.bump_proyectos_version()
         
-        return db_proyecto
+        return proyecto_dict
         
-    except IntegrityError:
+    except IntegrityError as e:
         db.rollback()
+        if _es_nombre_duplicado(e):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Ya existe un proyecto con el nombre '{update_data['nombre']}'"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Error de integridad en la base de datos"
@@ -253,7 +326,7 @@ async def eliminar_proyecto(
     
     - **proyecto_id**: ID único del proyecto a eliminar
     """
-    db_proyecto = db.query(Proyecto).filter(Proyecto.id == proyecto_id).first()
+    db_proyecto = db.get(Proyecto, proyecto_id)
     
     if not db_proyecto:
         raise HTTPException(
@@ -267,6 +340,7 @@ async def eliminar_proyecto(
         
         # Invalidar caché del proyecto eliminado
         cache.invalidate_proyecto_cache(proyecto_id)
+        cache.remove_proyecto_id_from_cache(proyecto_id)
         
     except IntegrityError:
         db.rollback()
@@ -288,53 +362,45 @@ async def asignar_usuario_proyecto(
     - **proyecto_id**: ID único del proyecto
     - **usuario_id**: ID único del usuario a asignar
     """
-    # Verificar que el proyecto existe
-    proyecto = db.query(Proyecto).filter(Proyecto.id == proyecto_id).first()
-    if not proyecto:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Proyecto con ID {proyecto_id} no encontrado"
-        )
-    
-    # Verificar que el usuario existe (validación cruzada con GestorUsuarios)
-    usuario = db.query(Usuario).filter(Usuario.id == asignacion.usuario_id).first()
-    if not usuario:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Usuario con ID {asignacion.usuario_id} no encontrado"
-        )
-    
-    # Verificar si el usuario ya está asignado al proyecto
-    if usuario in proyecto.usuarios:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"El usuario {usuario.nombre} ya está asignado al proyecto {proyecto.nombre}"
-        )
+    # Verificar en un solo round-trip que el proyecto y el usuario existen (validación cruzada)
+    proyecto_nombre, usuario_nombre = _nombres_proyecto_usuario(db, proyecto_id, asignacion.usuario_id)
     
     try:
-        # Asignar usuario al proyecto
-        proyecto.usuarios.append(usuario)
+        # Asignar usuario al proyecto con un único INSERT; uq_proy_usr descarta duplicados.
+        # ON CONFLICT exige ese índice único: create_tables lo garantiza al arrancar
+        stmt = pg_insert(proyecto_usuario_association).values(
+            proyecto_id=proyecto_id,
+            usuario_id=asignacion.usuario_id
+        ).on_conflict_do_nothing(index_elements=["proyecto_id", "usuario_id"])
+        result = db.execute(stmt)
         db.commit()  # Commit explícito para ACID
         
-        # Invalidar caché del proyecto modificado
-        cache.invalidate_proyecto_cache(proyecto_id)
-        
-        return SuccessResponse(
-            message=f"Usuario {usuario.nombre} asignado exitosamente al proyecto {proyecto.nombre}",
-            data={
-                "proyecto_id": proyecto_id,
-                "usuario_id": asignacion.usuario_id,
-                "proyecto_nombre": proyecto.nombre,
-                "usuario_nombre": usuario.nombre
-            }
-        )
-        
     except IntegrityError:
+        # Proyecto o usuario eliminados entre la verificación y el INSERT
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Error al asignar usuario al proyecto"
         )
+    
+    if result.rowcount == 0:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"El usuario {usuario_nombre} ya está asignado al proyecto {proyecto_nombre}"
+        )
+    
+    # Invalidar caché del proyecto modificado
+    cache.invalidate_proyecto_cache(proyecto_id)
+    
+    return SuccessResponse.model_construct(
+        message=f"Usuario {usuario_nombre} asignado exitosamente al proyecto {proyecto_nombre}",
+        data={
+            "proyecto_id": proyecto_id,
+            "usuario_id": asignacion.usuario_id,
+            "proyecto_nombre": proyecto_nombre,
+            "usuario_nombre": usuario_nombre
+        }
+    )
 
 @router.delete("/{proyecto_id}/desasignar_usuario/{usuario_id}", response_model=SuccessResponse)
 async def desasignar_usuario_proyecto(
@@ -348,50 +414,33 @@ async def desasignar_usuario_proyecto(
     - **proyecto_id**: ID único del proyecto
     - **usuario_id**: ID único del usuario a desasignar
     """
-    # Verificar que el proyecto existe
-    proyecto = db.query(Proyecto).filter(Proyecto.id == proyecto_id).first()
-    if not proyecto:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Proyecto con ID {proyecto_id} no encontrado"
+    # Verificar en un solo round-trip que el proyecto y el usuario existen
+    proyecto_nombre, usuario_nombre = _nombres_proyecto_usuario(db, proyecto_id, usuario_id)
+    
+    # Desasignar usuario del proyecto con un único DELETE sobre la tabla de asociación
+    result = db.execute(
+        delete(proyecto_usuario_association).where(
+            proyecto_usuario_association.c.proyecto_id == proyecto_id,
+            proyecto_usuario_association.c.usuario_id == usuario_id
         )
+    )
+    db.commit()  # Commit explícito para ACID
     
-    # Verificar que el usuario existe
-    usuario = db.query(Usuario).filter(Usuario.id == usuario_id).first()
-    if not usuario:
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Usuario con ID {usuario_id} no encontrado"
+            detail=f"El usuario {usuario_nombre} no está asignado al proyecto {proyecto_nombre}"
         )
     
-    # Verificar si el usuario está asignado al proyecto
-    if usuario not in proyecto.usuarios:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"El usuario {usuario.nombre} no está asignado al proyecto {proyecto.nombre}"
-        )
+    # Invalidar caché del proyecto modificado
+    cache.invalidate_proyecto_cache(proyecto_id)
     
-    try:
-        # Desasignar usuario del proyecto
-        proyecto.usuarios.remove(usuario)
-        db.commit()  # Commit explícito para ACID
-        
-        # Invalidar caché del proyecto modificado
-        cache.invalidate_proyecto_cache(proyecto_id)
-        
-        return SuccessResponse(
-            message=f"Usuario {usuario.nombre} desasignado exitosamente del proyecto {proyecto.nombre}",
-            data={
-                "proyecto_id": proyecto_id,
-                "usuario_id": usuario_id,
-                "proyecto_nombre": proyecto.nombre,
-                "usuario_nombre": usuario.nombre
-            }
-        )
-        
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Error al desasignar usuario del proyecto"
-        )
\ No newline at end of file
+    return SuccessResponse.model_construct(
+        message=f"Usuario {usuario_nombre} desasignado exitosamente del proyecto {proyecto_nombre}",
+        data={
+            "proyecto_id": proyecto_id,
+            "usuario_id": usuario_id,
+            "proyecto_nombre": proyecto_nombre,
+            "usuario_nombre": usuario_nombre
+        }
+    )
@@ -5,29 +5,52 @@ Servicio sin estado (stateless) - cada request es independiente.
 Incluye patrón Cache-Aside para optimización de consultas frecuentes.
 """
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import List, Optional, Union
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import bindparam, delete, exists, lambda_stmt, select, update
+from sqlalchemy.orm import Session, aliased, selectinload
 from sqlalchemy.exc import IntegrityError
 
 from app.config import get_db
-from app.models import Tarea, Usuario, Proyecto
+from app.models import Tarea, Usuario, Proyecto, proyecto_usuario_association
 from app.schemas import (
-    TareaCreate, TareaUpdate, TareaResponse, 
+    TareaCreate, TareaUpdate, TareaResponse, TareaPage,
     AsignarUsuarioTarea, ErrorResponse, SuccessResponse,
-    JobResponse, JobStatusResponse, JobResultResponse
+    JobResponse, JobStatusResponse, JobResultResponse, construct_response
 )
 from app.services import cache_service as cache
 from app.services import queue_service as queue
 
+# Los endpoints son `def` (no `async def`): usan Session y Redis síncronos, por lo que
+# FastAPI los ejecuta en su threadpool sin bloquear el event loop.
 router = APIRouter(
     prefix="/tareas",
     tags=["tareas"],
     responses={404: {"model": ErrorResponse}},
+    default_response_class=ORJSONResponse,
+)
+
+# Código SQLSTATE de PostgreSQL para violación de clave foránea
+FOREIGN_KEY_VIOLATION = "23503"
+
+# Tope de registros por página en los listados
+MAX_PAGE_SIZE = 500
+
+# Tamaño de lote al recorrer listados grandes con un cursor del servidor
+TAREAS_YIELD_PER = 200
+
+# Consulta de detalle construida una sola vez: lambda_stmt cachea la construcción
+# y compilación del SELECT; por request solo cambia el parámetro tarea_id
+_STMT_GET_TAREA = lambda_stmt(
+    lambda: select(Tarea)
+    .options(selectinload(Tarea.usuario_responsable))
+    .where(Tarea.id == bindparam("tarea_id"))
 )
 
 @router.post("/", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
-async def crear_tarea(
+def crear_tarea(
     tarea: TareaCreate,
     db: Session = Depends(get_db)
 ):
@@ -59,25 +82,26 @@ async def crear_tarea(
     - **message**: Mensaje descriptivo
     """
     # Pre-validación: verificar que el proyecto existe
-    # Esto evita encolar solicitudes inválidas
-    proyecto = db.query(Proyecto).filter(Proyecto.id == tarea.proyecto_id).first()
-    if not proyecto:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Proyecto con ID {tarea.proyecto_id} no encontrado"
-        )
+    # Esto evita encolar solicitudes inválidas. Primero se consulta el conjunto
+    # de IDs en Redis; solo si no figura se confirma contra PostgreSQL.
+    if not cache.proyecto_id_in_cache(tarea.proyecto_id):
+        proyecto_existe = db.scalar(select(Proyecto.id).where(Proyecto.id == tarea.proyecto_id))
+        if proyecto_existe is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Proyecto con ID {tarea.proyecto_id} no encontrado"
+            )
+        cache.add_proyecto_id_to_cache(tarea.proyecto_id)
     
     try:
         # Convertir a dict para serialización en cola
         tarea_data = tarea.model_dump()
         
-        # Encolar solicitud para procesamiento asíncrono
-        job_id = queue.enqueue_tarea_creation(tarea_data)
-        
-        # Obtener tamaño de cola para informar posición aproximada
-        queue_size = queue.get_queue_size()
+        # Encolar solicitud para procesamiento asíncrono; el mismo round-trip
+        # devuelve el tamaño de la cola para informar posición aproximada
+        job_id, queue_size = queue.enqueue_tarea_creation(tarea_data)
         
-        return JobResponse(
+        return JobResponse.model_construct(
             job_id=job_id,
             message=f"Solicitud encolada exitosamente. Use GET /tareas/jobs/{job_id} para consultar el estado.",
             status=queue.JobStatus.PENDING,
@@ -97,14 +121,17 @@ async def obtener_estado_job(job_id: str):
     
     **Estados posibles:**
     - **pending**: Encolado, esperando procesamiento
-    - **processing**: Siendo procesado por el worker
+    - **processing**: Siendo procesado por el worker (solo en lotes que se anticipan lentos;
+      los rápidos pasan directo a completed o failed)
     - **completed**: Completado exitosamente
     - **failed**: Falló el procesamiento
     
+    Para seguir el job sin polling, preferir GET /tareas/jobs/{job_id}/stream (SSE).
+    
     - **job_id**: ID único del job (retornado al crear la tarea)
     """
     try:
-        job_status = queue.get_job_status(job_id)
+        job_status = await queue.get_job_status_async(job_id)
         
         if not job_status:
             raise HTTPException(
@@ -112,7 +139,7 @@ async def obtener_estado_job(job_id: str):
                 detail=f"Job con ID {job_id} no encontrado o expiró (TTL: 1 hora)"
             )
         
-        return JobStatusResponse(**job_status)
+        return construct_response(JobStatusResponse, job_status)
         
     except Exception as e:
         raise HTTPException(
@@ -133,7 +160,7 @@ async def obtener_resultado_job(job_id: str):
     """
     try:
         # Obtener estado del job
-        job_status = queue.get_job_status(job_id)
+        job_status = await queue.get_job_status_async(job_id)
         
         if not job_status:
             raise HTTPException(
@@ -143,7 +170,7 @@ async def obtener_resultado_job(job_id: str):
         
         # Si está completado, obtener resultado
         if job_status["status"] == queue.JobStatus.COMPLETED:
-            result = queue.get_job_result(job_id)
+            result = await queue.get_job_result_async(job_id)
             
             return JobResultResponse(
                 job_id=job_id,
@@ -175,8 +202,61 @@ async def obtener_resultado_job(job_id: str):
         )
 
 
+@router.get("/jobs/{job_id}/stream")
+async def stream_estado_job(job_id: str):
+    """
+    Seguir el estado de un job mediante Server-Sent Events (recomendado frente al polling).
+    
+    Envía el estado actual y luego cada transición publicada por el worker
+    (evento `data:` con los mismos campos que GET /tareas/jobs/{job_id}).
+    El stream se cierra al llegar a `completed` o `failed`.
+    Si el proceso ya tiene el máximo de streams abiertos responde 503 (usar polling).
+    
+    - **job_id**: ID único del job
+    """
+    eventos = queue.stream_job_events(job_id)
+    
+    # El primer evento es el estado actual: si no existe, responder 404 antes de abrir el stream
+    try:
+        estado_inicial = await anext(eventos, None)
+    except queue.JobEventsLimitExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{str(e)}; consultar GET /tareas/jobs/{job_id}",
+            headers={"Retry-After": str(queue.JOB_EVENTS_HEARTBEAT_SECONDS)}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al consultar estado del job: {str(e)}"
+        )
+    if estado_inicial is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job con ID {job_id} no encontrado o expiró (TTL: 1 hora)"
+        )
+    
+    async def sse():
+        try:
+            yield b"data: " + orjson.dumps(estado_inicial) + b"\n\n"
+            async for job_status in eventos:
+                if job_status is None:
+                    yield b": keepalive\n\n"
+                else:
+                    yield b"data: " + orjson.dumps(job_status) + b"\n\n"
+        finally:
+            # Liberar la suscripción también si el cliente se desconecta
+            await eventos.aclose()
+    
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/queue/stats")
-async def obtener_estadisticas_cola():
+def obtener_estadisticas_cola():
     """
     Obtener estadísticas de la cola de procesamiento.
     
@@ -185,7 +265,14 @@ async def obtener_estadisticas_cola():
     **Retorna:**
     - **queue_size**: Número de tareas pendientes en la cola
     - **redis_available**: Estado de conexión a Redis
-    - **queue_name**: Nombre de la cola
+    - **queue_name**: Nombre de la cola (Redis Stream)
+    - **pending_count**: Mensajes entregados a un worker y aún sin confirmar
+    - **enqueued_total / completed_total / failed_total**: Contadores acumulados de jobs
+    - **enqueued_per_minute / completed_per_minute**: Jobs por minuto en los últimos 60 minutos,
+      del más antiguo al actual (`window_start`: epoch del primer minuto)
+    - **p95_duration_ms**: Percentil 95 de duración de procesamiento (últimos 1000 jobs)
+    - **avg_batch_size / ema_latency_ms**: Tamaño medio de lote del worker y latencia
+      media móvil por mensaje (entradas del tamaño de lote adaptativo)
     """
     try:
         stats = queue.get_queue_stats()
@@ -200,33 +287,55 @@ async def obtener_estadisticas_cola():
         )
 
 
-@router.get("/", response_model=List[TareaResponse])
-async def listar_tareas(
-    skip: int = 0,
-    limit: int = 100,
+# El cuerpo se arma como JSON ya serializado: el modelo solo documenta sus dos formas
+@router.get("/", response_model=Union[List[TareaResponse], TareaPage])
+def listar_tareas(
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE),
     proyecto_id: int = None,
     estado: str = None,
     usuario_responsable_id: int = None,
+    cursor: Optional[int] = Query(default=None, ge=0),
     db: Session = Depends(get_db)
 ):
     """
     Obtener lista de todas las tareas con filtros opcionales.
     Soporta filtrado por proyecto, estado, usuario responsable y paginación.
     
+    **Paginación por cursor (keyset):** si se envía `cursor` (0 para la primera página),
+    se devuelven las tareas con `id > cursor` ordenadas por id, con la forma
+    `{"items": [...], "next_cursor": <id o null>}`. El costo no crece con la profundidad
+    de la página, a diferencia de `skip`.
+    
     **Patrón Cache-Aside aplicado:**
     1. Intenta obtener datos desde Redis
     2. Si no existe en caché (cache miss), consulta PostgreSQL
     3. Guarda resultado en caché para futuras consultas
     
     - **skip**: Número de registros a omitir (default: 0)
-    - **limit**: Número máximo de registros a devolver (default: 100)
+    - **limit**: Número máximo de registros a devolver (default: 100, máximo: 500)
     - **proyecto_id**: Filtrar por proyecto específico
     - **estado**: Filtrar por estado (pendiente, en_progreso, completada)
     - **usuario_responsable_id**: Filtrar por usuario responsable
+    - **cursor**: Último id recibido; activa la paginación por cursor e ignora `skip`
     """
+    # PASO 1: Intentar obtener desde caché: se devuelve el JSON tal cual, sin re-serializar
+    # La versión se lee una sola vez: la misma se usa para guardar lo leído de la base
+    lista_version = cache.get_tareas_version()
+    cached_tareas = cache.get_tareas_list_from_cache(
+        skip, limit, proyecto_id, estado, usuario_responsable_id, cursor, version=lista_version
+    )
+    if cached_tareas is not None:
+        return Response(content=cached_tareas, media_type="application/json")
     
-    #Si no está en caché, consultar base de datos
-    query = db.query(Tarea)
+    # PASO 2: Si no está en caché, consultar base de datos
+    # selectinload: responsables de toda la página en una sola consulta (evita N+1)
+    # ORDER BY id: paginación determinista sobre el índice de la PK
+    query = (
+        db.query(Tarea)
+        .options(selectinload(Tarea.usuario_responsable))
+        .order_by(Tarea.id)
+    )
     
     # Aplicar filtros
     if proyecto_id:
@@ -236,41 +345,36 @@ async def listar_tareas(
     if usuario_responsable_id:
         query = query.filter(Tarea.usuario_responsable_id == usuario_responsable_id)
     
-    tareas = query.offset(skip).limit(limit).all()
-    
-    # PASO 3: Convertir a dict para serialización y guardar en caché
-    tareas_dict = [
-        {
-            "id": t.id,
-            "titulo": t.titulo,
-            "descripcion": t.descripcion,
-            "estado": t.estado,
-            "prioridad": t.prioridad,
-            "fecha_creacion": t.fecha_creacion.isoformat() if t.fecha_creacion else None,
-            "fecha_actualizacion": t.fecha_actualizacion.isoformat() if t.fecha_actualizacion else None,
-            "fecha_vencimiento": t.fecha_vencimiento.isoformat() if t.fecha_vencimiento else None,
-            "proyecto_id": t.proyecto_id,
-            "usuario_responsable_id": t.usuario_responsable_id,
-            "usuario_responsable": {
-                "id": t.usuario_responsable.id,
-                "nombre": t.usuario_responsable.nombre,
-                "email": t.usuario_responsable.email,
-                "rol": t.usuario_responsable.rol,
-                "fecha_creacion": t.usuario_responsable.fecha_creacion.isoformat() if t.usuario_responsable.fecha_creacion else None,
-                "fecha_actualizacion": t.usuario_responsable.fecha_actualizacion.isoformat() if t.usuario_responsable.fecha_actualizacion else None
-            } if t.usuario_responsable else None,
-            "proyecto": {
-                "id": t.proyecto.id,
-                "nombre": t.proyecto.nombre,
-                "estado": t.proyecto.estado
-            } if t.proyecto else None
-        } for t in tareas
-    ]
-    
-    return tareas_dict
+    # yield_per: las filas se consumen por lotes con un cursor del servidor, así nunca
+    # conviven en memoria todos los objetos ORM de una página grande
+    # Keyset: búsqueda en el índice de la PK en lugar de descartar `skip` filas
+    if cursor is not None:
+        query = query.filter(Tarea.id > cursor)
+    else:
+        query = query.offset(skip)
+    tareas = query.limit(limit).yield_per(TAREAS_YIELD_PER)
+    
+    # PASO 3: Serializar cada tarea una sola vez; la lista se arma uniendo esos mismos bytes
+    tareas_items = {
+        t.id: construct_response(TareaResponse, t).model_dump_json().encode()
+        for t in tareas
+    }
+    tareas_json = b"[" + b",".join(tareas_items.values()) + b"]"
+    if cursor is not None:
+        # Hay página siguiente solo si esta vino completa
+        next_cursor = next(reversed(tareas_items)) if len(tareas_items) == limit else None
+        tareas_json = b'{"items":' + tareas_json + b',"next_cursor":' + orjson.dumps(next_cursor) + b"}"
+    
+    # Guardar la lista y precargar cada tarea individual en un solo round-trip a Redis
+    cache.set_tareas_list_in_cache(
+        tareas_json, skip, limit, proyecto_id, estado, usuario_responsable_id,
+        tareas_items=tareas_items, cursor=cursor, version=lista_version
+    )
+    
+    return Response(content=tareas_json, media_type="application/json")
 
 @router.get("/{tarea_id}", response_model=TareaResponse)
-async def obtener_tarea(
+def obtener_tarea(
     tarea_id: int,
     db: Session = Depends(get_db)
 ):
@@ -288,10 +392,10 @@ async def obtener_tarea(
     # PASO 1: Intentar obtener desde caché (Cache-Aside)
     cached_tarea = cache.get_tarea_from_cache(tarea_id)
     if cached_tarea is not None:
-        return cached_tarea
+        return Response(content=cached_tarea, media_type="application/json")
     
-    # PASO 2: Si no está en caché, consultar base de datos
-    tarea = db.query(Tarea).filter(Tarea.id == tarea_id).first()
+    # PASO 2: Si no está en caché, consultar base de datos (con relaciones precargadas)
+    tarea = db.execute(_STMT_GET_TAREA, {"tarea_id": tarea_id}).scalar_one_or_none()
     
     if not tarea:
         raise HTTPException(
@@ -299,39 +403,15 @@ async def obtener_tarea(
             detail=f"Tarea con ID {tarea_id} no encontrada"
         )
     
-    # PASO 3: Convertir a dict para serialización y guardar en caché
-    tarea_dict = {
-        "id": tarea.id,
-        "titulo": tarea.titulo,
-        "descripcion": tarea.descripcion,
-        "estado": tarea.estado,
-        "prioridad": tarea.prioridad,
-        "fecha_creacion": tarea.fecha_creacion.isoformat() if tarea.fecha_creacion else None,
-        "fecha_actualizacion": tarea.fecha_actualizacion.isoformat() if tarea.fecha_actualizacion else None,
-        "fecha_vencimiento": tarea.fecha_vencimiento.isoformat() if tarea.fecha_vencimiento else None,
-        "proyecto_id": tarea.proyecto_id,
-        "usuario_responsable_id": tarea.usuario_responsable_id,
-        "usuario_responsable": {
-            "id": tarea.usuario_responsable.id,
-            "nombre": tarea.usuario_responsable.nombre,
-            "email": tarea.usuario_responsable.email,
-            "rol": tarea.usuario_responsable.rol,
-            "fecha_creacion": tarea.usuario_responsable.fecha_creacion.isoformat() if tarea.usuario_responsable.fecha_creacion else None,
-            "fecha_actualizacion": tarea.usuario_responsable.fecha_actualizacion.isoformat() if tarea.usuario_responsable.fecha_actualizacion else None
-        } if tarea.usuario_responsable else None,
-        "proyecto": {
-            "id": tarea.proyecto.id,
-            "nombre": tarea.proyecto.nombre,
-            "estado": tarea.proyecto.estado
-        } if tarea.proyecto else None
-    }
+    # PASO 3: Serializar una sola vez a bytes JSON y guardar en caché
+    tarea_json = construct_response(TareaResponse, tarea).model_dump_json().encode()
     
-    cache.set_tarea_in_cache(tarea_id, tarea_dict)
+    cache.set_tarea_in_cache(tarea_id, tarea_json)
     
-    return tarea_dict
+    return Response(content=tarea_json, media_type="application/json")
 
 @router.put("/{tarea_id}", response_model=TareaResponse)
-async def actualizar_tarea(
+def actualizar_tarea(
     tarea_id: int,
     tarea_update: TareaUpdate,
     db: Session = Depends(get_db)
@@ -349,49 +429,52 @@ async def actualizar_tarea(
     - **fecha_vencimiento**: Nueva fecha de vencimiento (opcional)
     - **proyecto_id**: Nuevo proyecto (opcional)
     """
-    # Buscar tarea existente
-    db_tarea = db.query(Tarea).filter(Tarea.id == tarea_id).first()
-    
-    if not db_tarea:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Tarea con ID {tarea_id} no encontrada"
-        )
+    # Actualizar solo los campos proporcionados
+    update_data = tarea_update.model_dump(exclude_unset=True)
     
     try:
-        # Actualizar solo los campos proporcionados
-        update_data = tarea_update.model_dump(exclude_unset=True)
+        if update_data:
+            # UPDATE ... RETURNING: actualiza y devuelve la fila en un solo round-trip.
+            # La existencia de proyecto_id la valida la FK (IntegrityError -> 404)
+            db_tarea = db.execute(
+                update(Tarea)
+                .where(Tarea.id == tarea_id)
+                .values(**update_data)
+                .returning(Tarea)
+            ).scalar_one_or_none()
+        else:
+            db_tarea = db.get(Tarea, tarea_id)
         
-        # Validar proyecto_id si se está actualizando
-        if "proyecto_id" in update_data:
-            proyecto = db.query(Proyecto).filter(Proyecto.id == update_data["proyecto_id"]).first()
-            if not proyecto:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Proyecto con ID {update_data['proyecto_id']} no encontrado"
-                )
+        if db_tarea is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Tarea con ID {tarea_id} no encontrada"
+            )
         
-        # Aplicar actualizaciones
-        for field, value in update_data.items():
-            setattr(db_tarea, field, value)
+        # Serializar antes del commit (el commit expira la instancia)
+        tarea_response = construct_response(TareaResponse, db_tarea)
         
         db.commit()  # Commit explícito para ACID
-        db.refresh(db_tarea)
         
         # Invalidar caché de la tarea actualizada
         cache.invalidate_tarea_cache(tarea_id)
         
-        return db_tarea
+        return tarea_response
         
-    except IntegrityError:
+    except IntegrityError as e:
         db.rollback()
+        if getattr(e.orig, "pgcode", None) == FOREIGN_KEY_VIOLATION:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Proyecto con ID {update_data['proyecto_id']} no encontrado"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Error de integridad en la base de datos"
         )
 
 @router.delete("/{tarea_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def eliminar_tarea(
+def eliminar_tarea(
     tarea_id: int,
     db: Session = Depends(get_db)
 ):
@@ -400,16 +483,18 @@ async def eliminar_tarea(
     
     - **tarea_id**: ID único de la tarea a eliminar
     """
-    db_tarea = db.query(Tarea).filter(Tarea.id == tarea_id).first()
-    
-    if not db_tarea:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Tarea con ID {tarea_id} no encontrada"
-        )
-    
     try:
-        db.delete(db_tarea)
+        # DELETE ... RETURNING: un solo round-trip, sin cargar la tarea en memoria
+        deleted_id = db.execute(
+            delete(Tarea).where(Tarea.id == tarea_id).returning(Tarea.id)
+        ).scalar_one_or_none()
+        
+        if deleted_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Tarea con ID {tarea_id} no encontrada"
+            )
+        
         db.commit()  # Commit explícito para ACID
         
         # Invalidar caché de la tarea eliminada
@@ -423,7 +508,7 @@ async def eliminar_tarea(
         )
 
 @router.post("/{tarea_id}/asignar_usuario", response_model=SuccessResponse)
-async def asignar_usuario_tarea(
+def asignar_usuario_tarea(
     tarea_id: int,
     asignacion: AsignarUsuarioTarea,
     db: Session = Depends(get_db)
@@ -436,17 +521,37 @@ async def asignar_usuario_tarea(
     - **tarea_id**: ID único de la tarea
     - **usuario_id**: ID único del usuario a asignar como responsable
     """
+    # Validación cruzada completa en un solo round-trip: tarea, proyecto, usuario a asignar,
+    # pertenencia del usuario al proyecto y responsable actual
+    responsable_actual = aliased(Usuario)
+    stmt = (
+        select(
+            Tarea,
+            Proyecto.nombre,
+            select(Usuario.nombre).where(Usuario.id == asignacion.usuario_id).scalar_subquery(),
+            exists().where(
+                proyecto_usuario_association.c.proyecto_id == Tarea.proyecto_id,
+                proyecto_usuario_association.c.usuario_id == asignacion.usuario_id
+            ),
+            responsable_actual.nombre
+        )
+        .join(Proyecto, Proyecto.id == Tarea.proyecto_id)
+        .outerjoin(responsable_actual, responsable_actual.id == Tarea.usuario_responsable_id)
+        .where(Tarea.id == tarea_id)
+    )
+    row = db.execute(stmt).first()
+    
     # Verificar que la tarea existe
-    tarea = db.query(Tarea).filter(Tarea.id == tarea_id).first()
-    if not tarea:
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Tarea con ID {tarea_id} no encontrada"
         )
     
+    tarea, proyecto_nombre, usuario_nombre, es_miembro, responsable_nombre = row
+    
     # Verificar que el usuario existe (validación cruzada con GestorUsuarios)
-    usuario = db.query(Usuario).filter(Usuario.id == asignacion.usuario_id).first()
-    if not usuario:
+    if usuario_nombre is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Usuario con ID {asignacion.usuario_id} no encontrado"
@@ -454,40 +559,38 @@ async def asignar_usuario_tarea(
     
     # Verificar que el usuario está asignado al proyecto de la tarea
     # (validación cruzada completa entre los tres componentes)
-    proyecto = tarea.proyecto
-    if usuario not in proyecto.usuarios:
+    if not es_miembro:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"El usuario {usuario.nombre} no está asignado al proyecto {proyecto.nombre}. " +
+            detail=f"El usuario {usuario_nombre} no está asignado al proyecto {proyecto_nombre}. " +
                    f"Debe asignarse al proyecto antes de asignar tareas."
         )
     
     # Verificar si la tarea ya tiene un responsable asignado
-    if tarea.usuario_responsable_id is not None:
-        usuario_actual = db.query(Usuario).filter(Usuario.id == tarea.usuario_responsable_id).first()
-        if usuario_actual:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"La tarea ya tiene asignado como responsable a {usuario_actual.nombre}. " +
-                       f"Use PUT para cambiar el responsable."
-            )
+    if responsable_nombre is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"La tarea ya tiene asignado como responsable a {responsable_nombre}. " +
+                   f"Use PUT para cambiar el responsable."
+        )
     
     try:
-        # Asignar usuario responsable a la tarea
+        # Asignar usuario responsable a la tarea (título leído antes del commit, que expira la instancia)
+        tarea_titulo = tarea.titulo
         tarea.usuario_responsable_id = asignacion.usuario_id
         db.commit()  # Commit explícito para ACID
         
         # Invalidar caché de la tarea modificada
         cache.invalidate_tarea_cache(tarea_id)
         
-        return SuccessResponse(
-            message=f"Usuario {usuario.nombre} asignado como responsable de la tarea '{tarea.titulo}'",
+        return SuccessResponse.model_construct(
+            message=f"Usuario {usuario_nombre} asignado como responsable de la tarea '{tarea_titulo}'",
             data={
                 "tarea_id": tarea_id,
                 "usuario_id": asignacion.usuario_id,
-                "tarea_titulo": tarea.titulo,
-                "usuario_nombre": usuario.nombre,
-                "proyecto_nombre": proyecto.nombre
+                "tarea_titulo": tarea_titulo,
+                "usuario_nombre": usuario_nombre,
+                "proyecto_nombre": proyecto_nombre
             }
         )
         
@@ -499,7 +602,7 @@ async def asignar_usuario_tarea(
         )
 
 @router.delete("/{tarea_id}/desasignar_usuario", response_model=SuccessResponse)
-async def desasignar_usuario_tarea(
+def desasignar_usuario_tarea(
     tarea_id: int,
     db: Session = Depends(get_db)
 ):
@@ -508,38 +611,56 @@ async def desasignar_usuario_tarea(
     
     - **tarea_id**: ID único de la tarea
     """
-    # Verificar que la tarea existe
-    tarea = db.query(Tarea).filter(Tarea.id == tarea_id).first()
-    if not tarea:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Tarea con ID {tarea_id} no encontrada"
-        )
-    
-    # Verificar si la tarea tiene un responsable asignado
-    if tarea.usuario_responsable_id is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"La tarea '{tarea.titulo}' no tiene un usuario responsable asignado"
+    # UPDATE ... RETURNING: desasigna solo si hay responsable y devuelve el título y el
+    # nombre del responsable anterior (leído de la fila bloqueada antes de actualizarla)
+    anterior = (
+        select(Tarea.id, Tarea.usuario_responsable_id)
+        .where(Tarea.id == tarea_id, Tarea.usuario_responsable_id.is_not(None))
+        .with_for_update()
+        .subquery()
+    )
+    stmt = (
+        update(Tarea)
+        .where(Tarea.id == anterior.c.id)
+        .values(usuario_responsable_id=None)
+        .returning(
+            Tarea.titulo,
+            select(Usuario.nombre)
+            .where(Usuario.id == anterior.c.usuario_responsable_id)
+            .scalar_subquery()
         )
-    
-    # Obtener información del usuario antes de desasignar
-    usuario_responsable = tarea.usuario_responsable
-    usuario_nombre = usuario_responsable.nombre if usuario_responsable else "Usuario eliminado"
+        .execution_options(synchronize_session=False)
+    )
     
     try:
-        # Desasignar usuario responsable
-        tarea.usuario_responsable_id = None
+        row = db.execute(stmt).first()
+        
+        if row is None:
+            # Distinguir entre tarea inexistente y tarea sin responsable (camino poco frecuente)
+            titulo = db.scalar(select(Tarea.titulo).where(Tarea.id == tarea_id))
+            if titulo is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Tarea con ID {tarea_id} no encontrada"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"La tarea '{titulo}' no tiene un usuario responsable asignado"
+            )
+        
+        tarea_titulo, usuario_nombre = row
+        usuario_nombre = usuario_nombre or "Usuario eliminado"
+        
         db.commit()  # Commit explícito para ACID
         
         # Invalidar caché de la tarea modificada
         cache.invalidate_tarea_cache(tarea_id)
         
-        return SuccessResponse(
-            message=f"Usuario {usuario_nombre} desasignado como responsable de la tarea '{tarea.titulo}'",
+        return SuccessResponse.model_construct(
+            message=f"Usuario {usuario_nombre} desasignado como responsable de la tarea '{tarea_titulo}'",
             data={
                 "tarea_id": tarea_id,
-                "tarea_titulo": tarea.titulo,
+                "tarea_titulo": tarea_titulo,
                 "usuario_anterior": usuario_nombre
             }
         )
@@ -549,4 +670,4 @@ async def desasignar_usuario_tarea(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Error al desasignar usuario responsable de la tarea"
-        )
\ No newline at end of file
+        )
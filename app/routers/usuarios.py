@@ -4,23 +4,48 @@ Implementa endpoints CRUD con validación y manejo de errores.
 Servicio sin estado (stateless) - cada request es independiente.
 """
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import delete, update
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
 from app.config import get_db
 from app.models import Usuario
-from app.schemas import UsuarioCreate, UsuarioUpdate, UsuarioResponse, ErrorResponse
+from app.schemas import (
+    UsuarioCreate, UsuarioUpdate, UsuarioResponse, UsuarioPage, ErrorResponse, construct_response
+)
 
+# Los endpoints son `def` (no `async def`): usan Session síncrona, por lo que
+# FastAPI los ejecuta en su threadpool sin bloquear el event loop.
 router = APIRouter(
     prefix="/usuarios",
     tags=["usuarios"],
     responses={404: {"model": ErrorResponse}},
+    default_response_class=ORJSONResponse,
 )
 
+# Código SQLSTATE de violación de unicidad e índice único de usuarios.email
+UNIQUE_VIOLATION = "23505"
+EMAIL_UNICO_CONSTRAINT = "ix_usuarios_email"
+
+# Tope de registros por página en el listado
+MAX_PAGE_SIZE = 500
+
+
+def _es_email_duplicado(error: IntegrityError) -> bool:
+    """Indica si el IntegrityError proviene del índice único de email"""
+    diag = getattr(error.orig, "diag", None)
+    return (
+        getattr(error.orig, "pgcode", None) == UNIQUE_VIOLATION
+        and getattr(diag, "constraint_name", None) == EMAIL_UNICO_CONSTRAINT
+    )
+
+
 @router.post("/", response_model=UsuarioResponse, status_code=status.HTTP_201_CREATED)
-async def crear_usuario(
+def crear_usuario(
     usuario: UsuarioCreate,
     db: Session = Depends(get_db)
 ):
@@ -32,15 +57,7 @@ async def crear_usuario(
     - **rol**: Rol del usuario (admin, manager, desarrollador)
     """
     try:
-        # Verificar si el email ya existe
-        db_usuario_existante = db.query(Usuario).filter(Usuario.email == usuario.email).first()
-        if db_usuario_existante:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"El email {usuario.email} ya está registrado"
-            )
-        
-        # Crear nuevo usuario
+        # Crear nuevo usuario (la unicidad del email la garantiza la base de datos)
         db_usuario = Usuario(**usuario.model_dump())
         db.add(db_usuario)
         db.commit()  # Commit explícito para ACID
@@ -48,31 +65,53 @@ async def crear_usuario(
         
         return db_usuario
         
-    except IntegrityError:
+    except IntegrityError as e:
         db.rollback()  # Rollback en caso de error para mantener ACID
+        if _es_email_duplicado(e):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El email {usuario.email} ya está registrado"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Error de integridad en la base de datos"
         )
 
-@router.get("/", response_model=List[UsuarioResponse])
-async def listar_usuarios(
-    skip: int = 0,
-    limit: int = 100,
+@router.get("/", response_model=Union[List[UsuarioResponse], UsuarioPage])
+def listar_usuarios(
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[int] = Query(default=None, ge=0),
     db: Session = Depends(get_db)
 ):
     """
     Obtener lista de todos los usuarios.
     Soporta paginación para escalabilidad.
     
+    **Paginación por cursor (keyset):** si se envía `cursor` (0 para la primera página),
+    se devuelven los usuarios con `id > cursor` ordenados por id, con la forma
+    `{"items": [...], "next_cursor": <id o null>}`.
+    
     - **skip**: Número de registros a omitir (default: 0)
-    - **limit**: Número máximo de registros a devolver (default: 100)
+    - **limit**: Número máximo de registros a devolver (default: 100, máximo: 500)
+    - **cursor**: Último id recibido; activa la paginación por cursor e ignora `skip`
     """
-    usuarios = db.query(Usuario).offset(skip).limit(limit).all()
-    return usuarios
+    # ORDER BY id: paginación determinista sobre el índice de la PK
+    query = db.query(Usuario).order_by(Usuario.id)
+    
+    if cursor is None:
+        return query.offset(skip).limit(limit).all()
+    
+    # Keyset: búsqueda en el índice de la PK en lugar de descartar `skip` filas
+    usuarios = query.filter(Usuario.id > cursor).limit(limit).all()
+    next_cursor = usuarios[-1].id if len(usuarios) == limit else None
+    return ORJSONResponse(content={
+        "items": jsonable_encoder([construct_response(UsuarioResponse, u) for u in usuarios]),
+        "next_cursor": next_cursor
+    })
 
 @router.get("/{usuario_id}", response_model=UsuarioResponse)
-async def obtener_usuario(
+def obtener_usuario(
     usuario_id: int,
     db: Session = Depends(get_db)
 ):
@@ -81,7 +120,7 @@ async def obtener_usuario(
     
     - **usuario_id**: ID único del usuario
     """
-    usuario = db.query(Usuario).filter(Usuario.id == usuario_id).first()
+    usuario = db.get(Usuario, usuario_id)
     
     if not usuario:
         raise HTTPException(
@@ -92,7 +131,7 @@ async def obtener_usuario(
     return usuario
 
 @router.put("/{usuario_id}", response_model=UsuarioResponse)
-async def actualizar_usuario(
+def actualizar_usuario(
     usuario_id: int,
     usuario_update: UsuarioUpdate,
     db: Session = Depends(get_db)
@@ -106,49 +145,49 @@ async def actualizar_usuario(
     - **email**: Nuevo email (opcional)
     - **rol**: Nuevo rol (opcional)
     """
-    # Buscar usuario existente
-    db_usuario = db.query(Usuario).filter(Usuario.id == usuario_id).first()
-    
-    if not db_usuario:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Usuario con ID {usuario_id} no encontrado"
-        )
+    # Actualizar solo los campos proporcionados
+    update_data = usuario_update.model_dump(exclude_unset=True)
     
     try:
-        # Actualizar solo los campos proporcionados
-        update_data = usuario_update.model_dump(exclude_unset=True)
+        if update_data:
+            # UPDATE ... RETURNING: actualiza y devuelve la fila en un solo round-trip
+            # (la unicidad del email la garantiza la base de datos)
+            db_usuario = db.execute(
+                update(Usuario)
+                .where(Usuario.id == usuario_id)
+                .values(**update_data)
+                .returning(Usuario)
+            ).scalar_one_or_none()
+        else:
+            db_usuario = db.get(Usuario, usuario_id)
         
-        # Verificar email único si se está actualizando
-        if "email" in update_data:
-            existing_email = db.query(Usuario).filter(
-                Usuario.email == update_data["email"],
-                Usuario.id != usuario_id
-            ).first()
-            if existing_email:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"El email {update_data['email']} ya está en uso"
-                )
+        if db_usuario is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Usuario con ID {usuario_id} no encontrado"
+            )
         
-        # Aplicar actualizaciones
-        for field, value in update_data.items():
-            setattr(db_usuario, field, value)
+        # Serializar antes del commit (el commit expira la instancia)
+        usuario_response = construct_response(UsuarioResponse, db_usuario)
         
         db.commit()  # Commit explícito para ACID
-        db.refresh(db_usuario)
         
-        return db_usuario
+        return usuario_response
         
-    except IntegrityError:
+    except IntegrityError as e:
         db.rollback()
+        if _es_email_duplicado(e):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El email {update_data['email']} ya está en uso"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Error de integridad en la base de datos"
         )
 
 @router.delete("/{usuario_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def eliminar_usuario(
+def eliminar_usuario(
     usuario_id: int,
     db: Session = Depends(get_db)
 ):
@@ -158,16 +197,18 @@ async def eliminar_usuario(
     
     - **usuario_id**: ID único del usuario a eliminar
     """
-    db_usuario = db.query(Usuario).filter(Usuario.id == usuario_id).first()
-    
-    if not db_usuario:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Usuario con ID {usuario_id} no encontrado"
-        )
-    
     try:
-        db.delete(db_usuario)
+        # DELETE ... RETURNING: un solo round-trip; las FK resuelven SET NULL / CASCADE en la BD
+        deleted_id = db.execute(
+            delete(Usuario).where(Usuario.id == usuario_id).returning(Usuario.id)
+        ).scalar_one_or_none()
+        
+        if deleted_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Usuario con ID {usuario_id} no encontrado"
+            )
+        
         db.commit()  # Commit explícito para ACID
         
     except IntegrityError:
@@ -7,12 +7,15 @@ from .schemas import (
     UsuarioCreate,
     UsuarioUpdate,
     UsuarioResponse,
+    UsuarioPage,
     
     # Proyectos
     ProyectoBase,
     ProyectoCreate,
     ProyectoUpdate,
+    ProyectoListItem,
     ProyectoResponse,
+    ProyectoPage,
     AsignarUsuarioProyecto,
     
     # Tareas
@@ -20,6 +23,7 @@ from .schemas import (
     TareaCreate,
     TareaUpdate,
     TareaResponse,
+    TareaPage,
     AsignarUsuarioTarea,
     
     # Respuestas genéricas
@@ -34,7 +38,10 @@ from .schemas import (
     # Autenticación
     LoginRequest,
     TokenResponse,
-    UserInfo
+    UserInfo,
+    
+    # Construcción sin validación
+    construct_response
 )
 
 __all__ = [
@@ -43,12 +50,15 @@ __all__ = [
     "UsuarioCreate",
     "UsuarioUpdate",
     "UsuarioResponse",
+    "UsuarioPage",
     
     # Proyectos
     "ProyectoBase",
     "ProyectoCreate",
     "ProyectoUpdate",
+    "ProyectoListItem",
     "ProyectoResponse",
+    "ProyectoPage",
     "AsignarUsuarioProyecto",
     
     # Tareas
@@ -56,6 +66,7 @@ __all__ = [
     "TareaCreate",
     "TareaUpdate",
     "TareaResponse",
+    "TareaPage",
     "AsignarUsuarioTarea",
     
     # Respuestas genéricas
@@ -70,6 +81,9 @@ __all__ = [
     # Autenticación
     "LoginRequest",
     "TokenResponse",
-    "UserInfo"
+    "UserInfo",
+    
+    # Construcción sin validación
+    "construct_response"
 ]
 
@@ -3,17 +3,26 @@ Schemas Pydantic para validación de datos de entrada y salida.
 Implementa validación estricta para mantener integridad de datos (ACID).
 """
 
+from collections.abc import Mapping
 from datetime import datetime
-from typing import List, Optional
+from typing import Annotated, Any, List, Literal, Optional, Type, TypeVar, Union, get_args
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Valores permitidos: Literal se valida como pertenencia a un conjunto (sin regex)
+RolUsuario = Literal["admin", "manager", "desarrollador"]
+EstadoProyecto = Literal["activo", "pausado", "completado"]
+EstadoTarea = Literal["pendiente", "en_progreso", "completada"]
+PrioridadTarea = Literal["alta", "media", "baja"]
+
 # ===== SCHEMAS PARA USUARIOS =====
 
 class UsuarioBase(BaseModel):
     """Schema base para usuarios"""
     nombre: str = Field(..., min_length=2, max_length=100, description="Nombre del usuario")
     email: EmailStr = Field(..., description="Email único del usuario")
-    rol: str = Field(default="desarrollador", pattern="^(admin|manager|desarrollador)$", description="Rol del usuario")
+    rol: RolUsuario = Field(default="desarrollador", description="Rol del usuario")
 
 class UsuarioCreate(UsuarioBase):
     """Schema para crear usuario"""
@@ -21,9 +30,9 @@ class UsuarioCreate(UsuarioBase):
 
 class UsuarioUpdate(BaseModel):
     """Schema para actualizar usuario (campos opcionales)"""
-    nombre: Optional[str] = Field(None, min_length=2, max_length=100)
+    nombre: Optional[Annotated[str, Field(min_length=2, max_length=100)]] = None
     email: Optional[EmailStr] = None
-    rol: Optional[str] = Field(None, pattern="^(admin|manager|desarrollador)$")
+    rol: Optional[RolUsuario] = None
 
 class UsuarioResponse(UsuarioBase):
     """Schema de respuesta para usuario"""
@@ -38,8 +47,8 @@ class UsuarioResponse(UsuarioBase):
 class ProyectoBase(BaseModel):
     """Schema base para proyectos"""
     nombre: str = Field(..., min_length=3, max_length=200, description="Nombre del proyecto")
-    descripcion: Optional[str] = Field(None, max_length=1000, description="Descripción del proyecto")
-    estado: str = Field(default="activo", pattern="^(activo|pausado|completado)$", description="Estado del proyecto")
+    descripcion: Optional[Annotated[str, Field(max_length=1000)]] = Field(None, description="Descripción del proyecto")
+    estado: EstadoProyecto = Field(default="activo", description="Estado del proyecto")
     fecha_fin: Optional[datetime] = Field(None, description="Fecha de finalización estimada")
 
 class ProyectoCreate(ProyectoBase):
@@ -48,21 +57,24 @@ class ProyectoCreate(ProyectoBase):
 
 class ProyectoUpdate(BaseModel):
     """Schema para actualizar proyecto"""
-    nombre: Optional[str] = Field(None, min_length=3, max_length=200)
-    descripcion: Optional[str] = Field(None, max_length=1000)
-    estado: Optional[str] = Field(None, pattern="^(activo|pausado|completado)$")
+    nombre: Optional[Annotated[str, Field(min_length=3, max_length=200)]] = None
+    descripcion: Optional[Annotated[str, Field(max_length=1000)]] = None
+    estado: Optional[EstadoProyecto] = None
     fecha_fin: Optional[datetime] = None
 
-class ProyectoResponse(ProyectoBase):
-    """Schema de respuesta para proyecto"""
+class ProyectoListItem(ProyectoBase):
+    """Schema de respuesta para proyecto sin usuarios (listados)"""
     id: int
     fecha_inicio: datetime
     fecha_creacion: datetime
     fecha_actualizacion: Optional[datetime] = None
-    usuarios: List[UsuarioResponse] = []
     
     model_config = ConfigDict(from_attributes=True)
 
+class ProyectoResponse(ProyectoListItem):
+    """Schema de respuesta para proyecto"""
+    usuarios: List[UsuarioResponse] = []
+
 class AsignarUsuarioProyecto(BaseModel):
     """Schema para asignar usuario a proyecto"""
     usuario_id: int = Field(..., gt=0, description="ID del usuario a asignar")
@@ -72,9 +84,9 @@ class AsignarUsuarioProyecto(BaseModel):
 class TareaBase(BaseModel):
     """Schema base para tareas"""
     titulo: str = Field(..., min_length=3, max_length=200, description="Título de la tarea")
-    descripcion: Optional[str] = Field(None, max_length=1000, description="Descripción de la tarea")
-    estado: str = Field(default="pendiente", pattern="^(pendiente|en_progreso|completada)$", description="Estado de la tarea")
-    prioridad: str = Field(default="media", pattern="^(alta|media|baja)$", description="Prioridad de la tarea")
+    descripcion: Optional[Annotated[str, Field(max_length=1000)]] = Field(None, description="Descripción de la tarea")
+    estado: EstadoTarea = Field(default="pendiente", description="Estado de la tarea")
+    prioridad: PrioridadTarea = Field(default="media", description="Prioridad de la tarea")
     fecha_vencimiento: Optional[datetime] = Field(None, description="Fecha de vencimiento")
     proyecto_id: int = Field(..., gt=0, description="ID del proyecto al que pertenece")
 
@@ -84,12 +96,12 @@ class TareaCreate(TareaBase):
 
 class TareaUpdate(BaseModel):
     """Schema para actualizar tarea"""
-    titulo: Optional[str] = Field(None, min_length=3, max_length=200)
-    descripcion: Optional[str] = Field(None, max_length=1000)
-    estado: Optional[str] = Field(None, pattern="^(pendiente|en_progreso|completada)$")
-    prioridad: Optional[str] = Field(None, pattern="^(alta|media|baja)$")
+    titulo: Optional[Annotated[str, Field(min_length=3, max_length=200)]] = None
+    descripcion: Optional[Annotated[str, Field(max_length=1000)]] = None
+    estado: Optional[EstadoTarea] = None
+    prioridad: Optional[PrioridadTarea] = None
     fecha_vencimiento: Optional[datetime] = None
-    proyecto_id: Optional[int] = Field(None, gt=0)
+    proyecto_id: Optional[Annotated[int, Field(gt=0)]] = None
 
 class TareaResponse(TareaBase):
     """Schema de respuesta para tarea"""
@@ -105,17 +117,41 @@ class AsignarUsuarioTarea(BaseModel):
     """Schema para asignar usuario responsable a tarea"""
     usuario_id: int = Field(..., gt=0, description="ID del usuario responsable")
 
+# ===== SCHEMAS DE PAGINACIÓN POR CURSOR (KEYSET) =====
+# Forma de los listados cuando se envía `cursor`; next_cursor es None en la última página
+
+class UsuarioPage(BaseModel):
+    """Página de usuarios paginada por cursor"""
+    items: List[UsuarioResponse]
+    next_cursor: Optional[int] = None
+
+class ProyectoPage(BaseModel):
+    """Página de proyectos paginada por cursor (con usuarios solo si include=usuarios)"""
+    items: List[Union[ProyectoResponse, ProyectoListItem]]
+    next_cursor: Optional[int] = None
+
+class TareaPage(BaseModel):
+    """Página de tareas paginada por cursor"""
+    items: List[TareaResponse]
+    next_cursor: Optional[int] = None
+
 # ===== SCHEMAS DE RESPUESTA GENÉRICA =====
+# Los schemas solo de salida son inmutables (frozen): se construyen una vez con
+# model_construct/construct_response y se serializan sin modificarse
 
 class ErrorResponse(BaseModel):
     """Schema para respuestas de error"""
     detail: str
     code: Optional[str] = None
+    
+    model_config = ConfigDict(frozen=True)
 
 class SuccessResponse(BaseModel):
     """Schema para respuestas exitosas"""
     message: str
     data: Optional[dict] = None
+    
+    model_config = ConfigDict(frozen=True)
 
 # ===== SCHEMAS PARA QUEUE-BASED LOAD LEVELING =====
 
@@ -125,6 +161,8 @@ class JobResponse(BaseModel):
     message: str = Field(..., description="Mensaje descriptivo")
     status: str = Field(..., description="Estado del job (pending, processing, completed, failed)")
     queue_position: Optional[int] = Field(None, description="Posición aproximada en la cola")
+    
+    model_config = ConfigDict(frozen=True)
 
 class JobStatusResponse(BaseModel):
     """Schema de respuesta para estado de job"""
@@ -134,6 +172,8 @@ class JobStatusResponse(BaseModel):
     error: Optional[str] = None
     created_at: Optional[str] = None
     updated_at: Optional[str] = None
+    
+    model_config = ConfigDict(frozen=True)
 
 class JobResultResponse(BaseModel):
     """Schema de respuesta para resultado de job completado"""
@@ -141,6 +181,8 @@ class JobResultResponse(BaseModel):
     status: str
     result: Optional[TareaResponse] = None
     error: Optional[str] = None
+    
+    model_config = ConfigDict(frozen=True)
 
 # ===== SCHEMAS PARA AUTENTICACIÓN (Gatekeeper + Federated Identity) =====
 
@@ -155,6 +197,8 @@ class TokenResponse(BaseModel):
     token_type: str = Field(default="bearer", description="Tipo de token")
     expires_in: int = Field(..., description="Tiempo de expiración en segundos")
     user: dict = Field(..., description="Información del usuario autenticado")
+    
+    model_config = ConfigDict(frozen=True)
 
 class UserInfo(BaseModel):
     """Schema para información del usuario actual"""
@@ -163,4 +207,45 @@ class UserInfo(BaseModel):
     nombre: str
     rol: str
     ldap_dn: Optional[str] = None
+    
+    model_config = ConfigDict(frozen=True)
 
+# ===== CONSTRUCCIÓN SIN VALIDACIÓN (DATOS CONFIABLES) =====
+
+def _nested_model(annotation: Any) -> Optional[Type[BaseModel]]:
+    """Schema anidado de un campo (X, Optional[X] o List[X]), si lo hay"""
+    for arg in (annotation, *get_args(annotation)):
+        if isinstance(arg, type) and issubclass(arg, BaseModel):
+            return arg
+    return None
+
+
+def construct_response(model: Type[ModelT], data: Any) -> ModelT:
+    """
+    Construir un schema de respuesta con model_construct, sin re-validar.
+    
+    Solo para datos confiables (filas/instancias leídas de la base de datos, que ya
+    cumplen las restricciones). La entrada HTTP sigue usando model_validate.
+    Acepta un mapping o un objeto con atributos (instancia ORM) y construye
+    también los schemas anidados (p. ej. usuario_responsable, usuarios).
+    """
+    values = {}
+    for name, field in model.model_fields.items():
+        if isinstance(data, Mapping):
+            if name not in data:
+                continue
+            value = data[name]
+        elif hasattr(data, name):
+            value = getattr(data, name)
+        else:
+            continue
+        
+        nested = _nested_model(field.annotation)
+        if nested is not None and value is not None:
+            if isinstance(value, (list, tuple)):
+                value = [construct_response(nested, item) for item in value]
+            elif not isinstance(value, BaseModel):
+                value = construct_response(nested, value)
+        values[name] = value
+    
+    return model.model_construct(**values)
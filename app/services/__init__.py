@@ -4,20 +4,30 @@ Capa de servicios - Lógica de negocio
 from .cache_service import (
     init_redis,
     close_redis,
+    close_async_redis,
     get_redis,
+    get_async_redis,
     get_from_cache,
     set_in_cache,
+    get_raw_from_cache,
+    set_raw_in_cache,
     delete_from_cache,
     invalidate_pattern,
     build_cache_key,
     get_proyecto_from_cache,
     set_proyecto_in_cache,
     invalidate_proyecto_cache,
+    get_proyectos_version,
+    bump_proyectos_version,
+    proyecto_id_in_cache,
+    add_proyecto_id_to_cache,
+    remove_proyecto_id_from_cache,
     get_proyectos_list_from_cache,
     set_proyectos_list_in_cache,
     get_tarea_from_cache,
     set_tarea_in_cache,
     invalidate_tarea_cache,
+    get_tareas_version,
     get_tareas_list_from_cache,
     set_tareas_list_in_cache,
     get_cache_stats
@@ -27,13 +37,23 @@ from .queue_service import (
     JobStatus,
     enqueue_tarea_creation,
     get_job_status,
+    get_job_status_async,
     get_job_result,
+    get_job_result_async,
     update_job_status,
+    update_jobs_status,
     save_job_result,
     get_queue_size,
     dequeue_tarea_creation,
+    dequeue_tarea_batch,
+    claim_stale_tarea_messages,
+    ack_tarea_messages,
+    record_worker_batch,
+    complete_tarea_batch,
     requeue_tarea_creation,
     get_queue_stats,
+    stream_job_events,
+    JobEventsLimitExceeded,
     TAREA_QUEUE,
     REDIS_HOST,
     REDIS_PORT,
@@ -53,20 +73,30 @@ __all__ = [
     # Cache
     "init_redis",
     "close_redis",
+    "close_async_redis",
     "get_redis",
+    "get_async_redis",
     "get_from_cache",
     "set_in_cache",
+    "get_raw_from_cache",
+    "set_raw_in_cache",
     "delete_from_cache",
     "invalidate_pattern",
     "build_cache_key",
     "get_proyecto_from_cache",
     "set_proyecto_in_cache",
     "invalidate_proyecto_cache",
+    "get_proyectos_version",
+    "bump_proyectos_version",
+    "proyecto_id_in_cache",
+    "add_proyecto_id_to_cache",
+    "remove_proyecto_id_from_cache",
     "get_proyectos_list_from_cache",
     "set_proyectos_list_in_cache",
     "get_tarea_from_cache",
     "set_tarea_in_cache",
     "invalidate_tarea_cache",
+    "get_tareas_version",
     "get_tareas_list_from_cache",
     "set_tareas_list_in_cache",
     "get_cache_stats",
@@ -75,13 +105,23 @@ __all__ = [
     "JobStatus",
     "enqueue_tarea_creation",
     "get_job_status",
+    "get_job_status_async",
     "get_job_result",
+    "get_job_result_async",
     "update_job_status",
+    "update_jobs_status",
     "save_job_result",
     "get_queue_size",
     "dequeue_tarea_creation",
+    "dequeue_tarea_batch",
+    "claim_stale_tarea_messages",
+    "ack_tarea_messages",
+    "record_worker_batch",
+    "complete_tarea_batch",
     "requeue_tarea_creation",
     "get_queue_stats",
+    "stream_job_events",
+    "JobEventsLimitExceeded",
     "TAREA_QUEUE",
     "REDIS_HOST",
     "REDIS_PORT",
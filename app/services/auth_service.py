@@ -4,20 +4,37 @@ Delega la autenticación a un proveedor externo (LDAP) en lugar de gestionar con
 Aumenta la seguridad al evitar almacenar credenciales en la aplicación.
 """
 
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
-from ldap3 import Server, Connection, ALL, SUBTREE
-from ldap3.core.exceptions import LDAPException, LDAPBindError
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import base64
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+import time
+from typing import TYPE_CHECKING, Optional, Dict, Any
+from datetime import timedelta
+import orjson
+from cachetools import TTLCache
+
+# ldap3 (y pyasn1) se importa recién al primer uso: el arranque de cada worker
+# no paga su carga si nadie hace login
+if TYPE_CHECKING:
+    from ldap3 import Connection, Server
 
 # Importar configuración centralizada (External Configuration Store Pattern)
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 # Configuración JWT desde configuración externa
 SECRET_KEY = settings.JWT_SECRET_KEY
 ALGORITHM = settings.JWT_ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
+ACCESS_TOKEN_EXPIRE_SECONDS = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+# HS256 implementado con hmac + hashlib (SHA-256 en C): la clave y el header son
+# fijos, así que se codifican una sola vez al importar el módulo
+_SECRET_KEY_BYTES = SECRET_KEY.encode()
 
 # Configuración LDAP desde configuración externa
 LDAP_SERVER = settings.LDAP_SERVER
@@ -26,8 +43,35 @@ LDAP_USER_DN_TEMPLATE = settings.LDAP_USER_DN_TEMPLATE
 LDAP_BIND_USER = settings.LDAP_BIND_USER
 LDAP_BIND_PASSWORD = settings.LDAP_BIND_PASSWORD
 
-# Context para hashing (usado solo para fallback local si es necesario)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Segundos para abrir el socket LDAP: un servidor caído falla rápido en lugar de
+# retener threads del threadpool
+LDAP_CONNECT_TIMEOUT = 2
+
+# Logins exitosos recientes: un reintento con las mismas credenciales dentro de la
+# ventana no vuelve a consultar LDAP. La clave es un HMAC de (DN, contraseña) con una
+# sal aleatoria por proceso, nunca la contraseña; los intentos fallidos no se guardan.
+LOGIN_CACHE_MAXSIZE = 2048
+LOGIN_CACHE_TTL_SECONDS = 300
+_LOGIN_CACHE_SALT = secrets.token_bytes(32)
+
+
+# Mapeo exacto employeeType -> rol de la aplicación (valores usados en el directorio)
+_ROLE_MAP = {
+    "admin": "admin",
+    "administrator": "admin",
+    "manager": "manager",
+    "developer": "desarrollador",
+    "desarrollador": "desarrollador",
+}
+
+
+def _match_role(employee_type: str) -> str:
+    """Mapeo por subcadena para valores de employeeType fuera de _ROLE_MAP"""
+    if "admin" in employee_type:
+        return "admin"
+    if "manager" in employee_type:
+        return "manager"
+    return "desarrollador"
 
 
 class LDAPAuthService:
@@ -37,9 +81,90 @@ class LDAPAuthService:
     """
     
     def __init__(self):
-        self.server = Server(LDAP_SERVER, get_info=ALL)
+        self._server: Optional["Server"] = None
+        self._auth_server: Optional["Server"] = None
         self.base_dn = LDAP_BASE_DN
         self.user_dn_template = LDAP_USER_DN_TEMPLATE
+        # Una conexión abierta por thread del threadpool: cada login hace un rebind sobre
+        # el mismo socket en lugar de pagar DNS + TCP (+ TLS) por intento
+        self._local = threading.local()
+        self._login_cache: TTLCache = TTLCache(maxsize=LOGIN_CACHE_MAXSIZE, ttl=LOGIN_CACHE_TTL_SECONDS)
+        self._login_cache_lock = threading.Lock()
+    
+    @staticmethod
+    def _login_cache_key(user_dn: str, password: str) -> bytes:
+        """Huella de las credenciales para la caché de logins (no reversible)"""
+        return hmac.new(
+            _LOGIN_CACHE_SALT,
+            user_dn.encode() + b"\x00" + password.encode(),
+            hashlib.sha256
+        ).digest()
+    
+    @property
+    def server(self) -> "Server":
+        """Servidor LDAP con DSE y schema (verificación/administración), creado en el primer uso"""
+        if self._server is None:
+            from ldap3 import Server, ALL
+            self._server = Server(LDAP_SERVER, get_info=ALL, connect_timeout=LDAP_CONNECT_TIMEOUT)
+        return self._server
+    
+    @property
+    def auth_server(self) -> "Server":
+        """
+        Servidor LDAP para los binds de login: sin get_info, el bind no dispara la
+        lectura de DSE y schema, que la autenticación no necesita.
+        """
+        if self._auth_server is None:
+            from ldap3 import Server, NONE
+            self._auth_server = Server(LDAP_SERVER, get_info=NONE, connect_timeout=LDAP_CONNECT_TIMEOUT)
+        return self._auth_server
+    
+    def _user_connection(self, fresh: bool = False) -> "Connection":
+        """
+        Obtiene la conexión LDAP reutilizable del thread actual (abierta, sin bind propio).
+        
+        Args:
+            fresh: Descartar la conexión existente y abrir una nueva
+            
+        Returns:
+            Conexión LDAP abierta
+        """
+        from ldap3 import Connection
+        from ldap3.core.exceptions import LDAPException
+        
+        conn = getattr(self._local, "conn", None)
+        if fresh and conn is not None:
+            try:
+                conn.unbind()
+            except LDAPException:
+                pass
+            conn = None
+        
+        if conn is None or conn.closed:
+            conn = Connection(self.auth_server)
+            conn.open()
+            self._local.conn = conn
+        return conn
+    
+    def _bind_as_user(self, user_dn: str, password: str) -> "Connection":
+        """
+        Hace bind con las credenciales del usuario sobre la conexión del thread.
+        Si el servidor cerró el socket, reabre la conexión y reintenta una vez.
+        
+        Raises:
+            LDAPBindError: Si las credenciales son inválidas
+        """
+        from ldap3.core.exceptions import LDAPBindError, LDAPCommunicationError
+        
+        for fresh in (False, True):
+            conn = self._user_connection(fresh=fresh)
+            try:
+                if conn.rebind(user=user_dn, password=password):
+                    return conn
+                raise LDAPBindError(f"Credenciales inválidas para {user_dn}")
+            except LDAPCommunicationError:
+                if fresh:
+                    raise
         
     def authenticate_user(self, username: str, password: str) -> Optional[Dict[str, Any]]:
         """
@@ -53,38 +178,42 @@ class LDAPAuthService:
         Returns:
             Dict con información del usuario si la autenticación es exitosa, None en caso contrario
         """
+        from ldap3.core.exceptions import LDAPException, LDAPBindError
+        
         try:
             # Construir DN del usuario
             user_dn = self.user_dn_template.format(username=username)
             
-            # Intentar bind con las credenciales del usuario
-            conn = Connection(
-                self.server,
-                user=user_dn,
-                password=password,
-                auto_bind=True
-            )
+            # Login repetido con las mismas credenciales dentro de la ventana: sin LDAP
+            cache_key = self._login_cache_key(user_dn, password)
+            with self._login_cache_lock:
+                cached = self._login_cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
+            
+            # Intentar bind con las credenciales del usuario (socket reutilizado)
+            conn = self._bind_as_user(user_dn, password)
             
             # Si llegamos aquí, la autenticación fue exitosa
-            print(f"✅ Autenticación exitosa para usuario: {username}")
+            logger.info("✅ Autenticación exitosa para usuario: %s", username)
             
             # Buscar información adicional del usuario usando la conexión autenticada
             user_info = self._get_user_info(conn, username, user_dn)
-            
-            conn.unbind()
+            with self._login_cache_lock:
+                self._login_cache[cache_key] = dict(user_info)
             return user_info
             
         except LDAPBindError as e:
-            print(f"❌ Error de autenticación LDAP para {username}: {str(e)}")
+            logger.warning("❌ Error de autenticación LDAP para %s: %s", username, e)
             return None
         except LDAPException as e:
-            print(f"❌ Error LDAP: {str(e)}")
+            logger.warning("❌ Error LDAP: %s", e)
             return None
         except Exception as e:
-            print(f"❌ Error inesperado durante autenticación: {str(e)}")
+            logger.warning("❌ Error inesperado durante autenticación: %s", e)
             return None
     
-    def _get_user_info(self, conn: Connection, username: str, user_dn: str) -> Dict[str, Any]:
+    def _get_user_info(self, conn: "Connection", username: str, user_dn: str) -> Dict[str, Any]:
         """
         Obtiene información adicional del usuario desde LDAP.
         
@@ -123,14 +252,9 @@ class LDAPAuthService:
                     employee_type = str(employee_type_raw).lower().strip()
                     
                     # Mapear employeeType a roles de la aplicación
-                    if "admin" in employee_type:
-                        role = "admin"
-                    elif "manager" in employee_type:
-                        role = "manager"
-                    elif "developer" in employee_type or "desarrollador" in employee_type:
-                        role = "desarrollador"
+                    role = _ROLE_MAP.get(employee_type) or _match_role(employee_type)
                 
-                print(f"✅ Usuario autenticado: {username} | Rol: {role}")
+                logger.info("✅ Usuario autenticado: %s | Rol: %s", username, role)
                 
                 return {
                     "username": str(entry.uid) if hasattr(entry, 'uid') else username,
@@ -141,7 +265,7 @@ class LDAPAuthService:
                 }
             else:
                 # Si no se encuentran entradas, devolver datos básicos
-                print(f"⚠️  No se encontró información LDAP para {username}, usando valores por defecto")
+                logger.warning("⚠️  No se encontró información LDAP para %s, usando valores por defecto", username)
                 return {
                     "username": username,
                     "email": f"{username}@example.org",
@@ -151,7 +275,7 @@ class LDAPAuthService:
                 }
                 
         except Exception as e:
-            print(f"⚠️  Error obteniendo información del usuario: {str(e)}")
+            logger.warning("⚠️  Error obteniendo información del usuario: %s", e)
             # Devolver información básica en caso de error
             return {
                 "username": username,
@@ -168,6 +292,8 @@ class LDAPAuthService:
         Returns:
             True si la conexión es exitosa, False en caso contrario
         """
+        from ldap3 import Connection
+        
         try:
             if LDAP_BIND_USER and LDAP_BIND_PASSWORD:
                 conn = Connection(
@@ -182,10 +308,28 @@ class LDAPAuthService:
             conn.unbind()
             return True
         except Exception as e:
-            print(f"❌ Error verificando conexión LDAP: {str(e)}")
+            logger.warning("❌ Error verificando conexión LDAP: %s", e)
             return False
 
 
+def _b64url_encode(data: bytes) -> bytes:
+    """Base64url sin relleno, como exige JWT"""
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64url_decode(segment: bytes) -> bytes:
+    """Inverso de _b64url_encode (repone el relleno); lanza ValueError si es inválido"""
+    return base64.urlsafe_b64decode(segment + b"=" * (-len(segment) % 4))
+
+
+def _hs256(signing_input: bytes) -> bytes:
+    """Firma HMAC-SHA256 con la clave secreta de la aplicación"""
+    return hmac.new(_SECRET_KEY_BYTES, signing_input, hashlib.sha256).digest()
+
+
+_HEADER_B64 = _b64url_encode(orjson.dumps({"alg": ALGORITHM, "typ": "JWT"}))
+
+
 class TokenService:
     """
     Servicio para generación y validación de tokens JWT.
@@ -204,21 +348,13 @@ class TokenService:
         Returns:
             Token JWT codificado
         """
-        to_encode = data.copy()
-        
-        if expires_delta:
-            expire = datetime.utcnow() + expires_delta
-        else:
-            expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        # Claims temporales como segundos desde epoch (NumericDate de JWT)
+        now = int(time.time())
+        ttl = int(expires_delta.total_seconds()) if expires_delta is not None else ACCESS_TOKEN_EXPIRE_SECONDS
+        to_encode = {**data, "exp": now + ttl, "iat": now, "type": "access"}
         
-        to_encode.update({
-            "exp": expire,
-            "iat": datetime.utcnow(),
-            "type": "access"
-        })
-        
-        encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-        return encoded_jwt
+        signing_input = _HEADER_B64 + b"." + _b64url_encode(orjson.dumps(to_encode))
+        return (signing_input + b"." + _b64url_encode(_hs256(signing_input))).decode()
     
     @staticmethod
     def decode_token(token: str) -> Optional[Dict[str, Any]]:
@@ -232,17 +368,34 @@ class TokenService:
             Dict con los datos del token si es válido, None en caso contrario
         """
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            header_b64, payload_b64, signature_b64 = token.encode().split(b".")
+            
+            # Solo se acepta HS256 (rechaza "none" y cualquier otro algoritmo)
+            if orjson.loads(_b64url_decode(header_b64)).get("alg") != ALGORITHM:
+                raise ValueError("algoritmo no permitido")
+            
+            expected = _hs256(header_b64 + b"." + payload_b64)
+            if not hmac.compare_digest(expected, _b64url_decode(signature_b64)):
+                raise ValueError("firma inválida")
+            
+            payload = orjson.loads(_b64url_decode(payload_b64))
+            if not isinstance(payload, dict):
+                raise ValueError("payload inválido")
+            
+            exp = payload.get("exp")
+            if exp is not None and (not isinstance(exp, (int, float)) or exp <= time.time()):
+                raise ValueError("token expirado")
+            
             return payload
-        except JWTError as e:
-            print(f"❌ Error validando token: {str(e)}")
+        except (ValueError, AttributeError) as e:
+            logger.debug("❌ Error validando token: %s", e)
             return None
     
     @staticmethod
     def verify_token_signature(token: str) -> bool:
         """
-        Verifica solo la firma del token sin decodificarlo completamente.
-        Útil para validaciones rápidas.
+        Verifica la firma (y vigencia) del token.
+        Reutiliza decode_token en lugar de repetir la decodificación por separado.
         
         Args:
             token: Token JWT a verificar
@@ -250,11 +403,7 @@ class TokenService:
         Returns:
             True si la firma es válida, False en caso contrario
         """
-        try:
-            jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            return True
-        except JWTError:
-            return False
+        return TokenService.decode_token(token) is not None
 
 
 # Instancia global del servicio LDAP
@@ -3,54 +3,139 @@ Módulo de caché usando Redis - Implementa patrón Cache-Aside
 Proporciona funciones para optimizar consultas frecuentes reduciendo carga en la base de datos.
 """
 
-import json
+import logging
+import threading
+import orjson
 import redis
-from typing import Optional, Any, Union
+import redis.asyncio as aioredis
+from cachetools import TTLCache
+from typing import Dict, Optional, Any, Union
 from datetime import datetime
 
 # Importar configuración centralizada (External Configuration Store Pattern)
 from app.config import settings
 
+# Logging en lugar de print: los mensajes por operación son DEBUG y se descartan
+# en el chequeo de nivel, sin formatear ni escribir en stdout
+logger = logging.getLogger(__name__)
+
 # Configuración de Redis desde configuración externa
 REDIS_HOST = settings.REDIS_HOST
 REDIS_PORT = settings.REDIS_PORT
+REDIS_MAX_CONNECTIONS = settings.REDIS_MAX_CONNECTIONS
 CACHE_TTL = settings.CACHE_TTL
 
+# Versión de las listas de proyectos (invalidación O(1) por cambio de clave)
+PROYECTOS_VERSION_KEY = "proyectos:version"
+
+# Versión de las listas de tareas (se incrementa en cada escritura)
+TAREAS_VERSION_KEY = "tareas:version"
+
+# Conjunto de IDs de proyectos existentes (pre-validación sin consultar PostgreSQL)
+PROYECTOS_IDS_KEY = "proyectos:ids"
+
+# Caché L1 en proceso para lecturas de un solo elemento (proyecto/tarea): evita el
+# round-trip a Redis en lecturas repetidas. TTL corto porque otra instancia puede
+# modificar el elemento; las escrituras locales la actualizan o invalidan al momento.
+L1_CACHE_MAXSIZE = 1024
+L1_CACHE_TTL_SECONDS = 5
+_l1_cache: TTLCache = TTLCache(maxsize=L1_CACHE_MAXSIZE, ttl=L1_CACHE_TTL_SECONDS)
+_l1_lock = threading.Lock()  # Los handlers síncronos corren en varios threads
+
+# Claves por tramo de SCAN y por pipeline de UNLINK al invalidar por patrón
+INVALIDATE_BATCH_SIZE = 500
+
+# Claves de tareas pre-codificadas en bytes (rutas calientes de listado y detalle)
+TAREA_KEY_FORMAT = b"tarea:%d"
+TAREAS_LIST_PREFIX = b"tareas:list"
+
+# Estadísticas de la caché reutilizadas durante un segundo (endpoints de monitoreo
+# consultados con frecuencia no golpean Redis en cada llamada)
+STATS_CACHE_TTL_SECONDS = 1
+_stats_cache: TTLCache = TTLCache(maxsize=1, ttl=STATS_CACHE_TTL_SECONDS)
+
+# Timeouts del cliente asíncrono del rate limiter: corre en el event loop, por lo
+# que ante un Redis lento o un pool agotado falla rápido y usa el fallback en memoria
+RATE_LIMIT_MAX_CONNECTIONS = 20
+RATE_LIMIT_TIMEOUT_SECONDS = 0.25
+
+# Precarga de elementos individuales desde un listado, condicionada a la versión:
+# si hubo una escritura desde que se leyó la base (versión distinta), no escribe nada,
+# porque los datos del listado pueden ser anteriores a la invalidación del elemento.
+# KEYS: [1] clave de versión, [2..] claves de los elementos
+# ARGV: [1] versión leída antes de consultar la base, [2] TTL, [3..] JSON de cada elemento
+WARM_ITEMS_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[1]) or '0') ~= tonumber(ARGV[1]) then
+    return 0
+end
+for i = 2, #KEYS do
+    redis.call('SET', KEYS[i], ARGV[i + 1], 'EX', tonumber(ARGV[2]), 'NX')
+end
+return #KEYS - 1
+"""
+
 # Cliente Redis global
 redis_client: Optional[redis.Redis] = None
 
+# Script de precarga registrado al conectar (EVALSHA)
+_warm_items_script = None
+
+# Cliente asíncrono para el Gatekeeper (pool propio, separado del de los handlers)
+async_redis_client: Optional[aioredis.Redis] = None
+
 
 def init_redis() -> redis.Redis:
     """
     Inicializar conexión a Redis con reintentos.
     Se llama al inicio de la aplicación.
     """
-    global redis_client
+    global redis_client, async_redis_client, _warm_items_script
     
     try:
-        redis_client = redis.Redis(
+        # Pool único y acotado: los handlers síncronos corren en el threadpool y cada
+        # thread toma una conexión; si se agotan, espera en lugar de abrir sockets sin límite.
+        # Con hiredis instalado, redis-py parsea las respuestas en C automáticamente.
+        # Sin decode_responses: los valores llegan como bytes y van directo a orjson o al
+        # cuerpo de la respuesta HTTP, sin una pasada extra de decodificación UTF-8.
+        pool = redis.BlockingConnectionPool(
             host=REDIS_HOST,
             port=REDIS_PORT,
             db=0,
-            decode_responses=True,
+            decode_responses=False,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            timeout=5,
             socket_connect_timeout=5,
             socket_timeout=5,
             retry_on_timeout=True,
             health_check_interval=30
         )
+        redis_client = redis.Redis(connection_pool=pool)
         
         # Verificar conexión
         redis_client.ping()
-        print(f"✅ Redis conectado exitosamente en {REDIS_HOST}:{REDIS_PORT}")
+        logger.info("✅ Redis conectado exitosamente en %s:%s", REDIS_HOST, REDIS_PORT)
+        _warm_items_script = redis_client.register_script(WARM_ITEMS_SCRIPT)
+        
+        # Cliente asíncrono del rate limiter: no bloquea el event loop y su pool no
+        # compite con el de los handlers; la conexión se abre recién al primer uso
+        async_redis_client = aioredis.Redis(connection_pool=aioredis.BlockingConnectionPool(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            db=0,
+            max_connections=RATE_LIMIT_MAX_CONNECTIONS,
+            timeout=RATE_LIMIT_TIMEOUT_SECONDS,
+            socket_connect_timeout=RATE_LIMIT_TIMEOUT_SECONDS,
+            socket_timeout=RATE_LIMIT_TIMEOUT_SECONDS
+        ))
         return redis_client
         
     except redis.ConnectionError as e:
-        print(f"⚠️  Advertencia: No se pudo conectar a Redis: {str(e)}")
-        print("⚠️  La aplicación continuará sin caché")
+        logger.warning("⚠️  Advertencia: No se pudo conectar a Redis: %s", e)
+        logger.warning("⚠️  La aplicación continuará sin caché")
         redis_client = None
         return None
     except Exception as e:
-        print(f"⚠️  Error inesperado al conectar Redis: {str(e)}")
+        logger.warning("⚠️  Error inesperado al conectar Redis: %s", e)
         redis_client = None
         return None
 
@@ -65,13 +150,29 @@ def close_redis():
     if redis_client:
         try:
             redis_client.close()
-            print("🛑 Conexión Redis cerrada")
+            logger.info("🛑 Conexión Redis cerrada")
         except Exception as e:
-            print(f"⚠️  Error al cerrar Redis: {str(e)}")
+            logger.warning("⚠️  Error al cerrar Redis: %s", e)
     
     redis_client = None
 
 
+async def close_async_redis():
+    """
+    Cerrar el cliente asíncrono del rate limiter.
+    Se llama al apagar la aplicación (desde el event loop).
+    """
+    global async_redis_client
+    
+    if async_redis_client:
+        try:
+            await async_redis_client.aclose()
+        except Exception as e:
+            logger.warning("⚠️  Error al cerrar Redis asíncrono: %s", e)
+    
+    async_redis_client = None
+
+
 def get_redis() -> Optional[redis.Redis]:
     """
     Obtener cliente Redis activo.
@@ -80,28 +181,71 @@ def get_redis() -> Optional[redis.Redis]:
     return redis_client
 
 
-def serialize_value(value: Any) -> str:
+def get_async_redis() -> Optional[aioredis.Redis]:
+    """
+    Obtener el cliente Redis asíncrono (para código que corre en el event loop).
+    Retorna None si Redis no está disponible.
+    """
+    return async_redis_client
+
+
+def serialize_value(value: Any) -> Union[str, bytes]:
     """
     Serializar valor para almacenar en Redis.
-    Maneja objetos complejos convirtiéndolos a JSON.
+    Maneja objetos complejos convirtiéndolos a JSON (orjson: datetime nativo, bytes
+    que redis-py envía sin re-codificar).
     """
     if isinstance(value, (dict, list)):
-        return json.dumps(value, default=str)
+        return orjson.dumps(value, default=str)
     return str(value)
 
 
-def deserialize_value(value: str, value_type: type = dict) -> Any:
+def deserialize_value(value: Union[str, bytes], value_type: type = dict) -> Any:
     """
     Deserializar valor desde Redis.
     """
     try:
         if value_type in (dict, list):
-            return json.loads(value)
+            return orjson.loads(value)
         return value
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         return value
 
 
+def _l1_get(key: Union[str, bytes]) -> Optional[bytes]:
+    """Leer de la caché L1 en proceso"""
+    with _l1_lock:
+        return _l1_cache.get(key)
+
+
+def _l1_set(key: Union[str, bytes], value: bytes) -> None:
+    """Guardar en la caché L1 en proceso"""
+    with _l1_lock:
+        _l1_cache[key] = value
+
+
+def _l1_pop(key: Union[str, bytes]) -> None:
+    """Descartar una clave de la caché L1 en proceso"""
+    with _l1_lock:
+        _l1_cache.pop(key, None)
+
+
+def _get_item_from_cache(key: Union[str, bytes]) -> Optional[bytes]:
+    """
+    Lectura de un elemento individual: primero L1 en proceso, luego Redis.
+    Lo leído de Redis se guarda en L1 para las lecturas siguientes.
+    """
+    value = _l1_get(key)
+    if value is not None:
+        logger.debug("🎯 Cache L1 HIT: %s", key)
+        return value
+    
+    value = get_raw_from_cache(key)
+    if value is not None:
+        _l1_set(key, value)
+    return value
+
+
 def get_from_cache(key: str) -> Optional[Any]:
     """
     Obtener valor desde la caché.
@@ -118,15 +262,65 @@ def get_from_cache(key: str) -> Optional[Any]:
     try:
         value = redis_client.get(key)
         if value:
-            print(f"🎯 Cache HIT: {key}")
+            logger.debug("🎯 Cache HIT: %s", key)
             return deserialize_value(value)
-        print(f"❌ Cache MISS: {key}")
+        logger.debug("❌ Cache MISS: %s", key)
+        return None
+    except redis.RedisError as e:
+        logger.warning("⚠️  Error al leer de caché %s: %s", key, e)
+        return None
+
+
+def get_raw_from_cache(key: Union[str, bytes]) -> Optional[bytes]:
+    """
+    Obtener el JSON almacenado tal cual, sin deserializarlo.
+    Permite devolverlo directamente como cuerpo de la respuesta HTTP.
+    
+    Args:
+        key: Clave de caché
+        
+    Returns:
+        JSON almacenado (bytes) o None si no existe o Redis no está disponible
+    """
+    if not redis_client:
+        return None
+    
+    try:
+        value = redis_client.get(key)
+        if value:
+            logger.debug("🎯 Cache HIT: %s", key)
+            return value
+        logger.debug("❌ Cache MISS: %s", key)
         return None
     except redis.RedisError as e:
-        print(f"⚠️  Error al leer de caché {key}: {str(e)}")
+        logger.warning("⚠️  Error al leer de caché %s: %s", key, e)
         return None
 
 
+def set_raw_in_cache(key: Union[str, bytes], raw: Union[str, bytes], ttl: int = CACHE_TTL) -> bool:
+    """
+    Guardar JSON ya serializado en la caché con TTL.
+    
+    Args:
+        key: Clave de caché
+        raw: JSON ya codificado (str o bytes)
+        ttl: Tiempo de vida en segundos (default: CACHE_TTL)
+        
+    Returns:
+        True si se guardó exitosamente, False en caso contrario
+    """
+    if not redis_client:
+        return False
+    
+    try:
+        redis_client.setex(key, ttl, raw)
+        logger.debug("💾 Cache SET: %s (TTL: %ss)", key, ttl)
+        return True
+    except redis.RedisError as e:
+        logger.warning("⚠️  Error al escribir en caché %s: %s", key, e)
+        return False
+
+
 def set_in_cache(key: str, value: Any, ttl: int = CACHE_TTL) -> bool:
     """
     Guardar valor en la caché con TTL (Time To Live).
@@ -145,14 +339,14 @@ def set_in_cache(key: str, value: Any, ttl: int = CACHE_TTL) -> bool:
     try:
         serialized = serialize_value(value)
         redis_client.setex(key, ttl, serialized)
-        print(f"💾 Cache SET: {key} (TTL: {ttl}s)")
+        logger.debug("💾 Cache SET: %s (TTL: %ss)", key, ttl)
         return True
     except redis.RedisError as e:
-        print(f"⚠️  Error al escribir en caché {key}: {str(e)}")
+        logger.warning("⚠️  Error al escribir en caché %s: %s", key, e)
         return False
 
 
-def delete_from_cache(key: str) -> bool:
+def delete_from_cache(key: Union[str, bytes]) -> bool:
     """
     Eliminar una clave específica de la caché.
     
@@ -162,16 +356,18 @@ def delete_from_cache(key: str) -> bool:
     Returns:
         True si se eliminó exitosamente, False en caso contrario
     """
+    _l1_pop(key)
+    
     if not redis_client:
         return False
     
     try:
         deleted = redis_client.delete(key)
         if deleted:
-            print(f"🗑️  Cache DELETE: {key}")
+            logger.debug("🗑️  Cache DELETE: %s", key)
         return deleted > 0
     except redis.RedisError as e:
-        print(f"⚠️  Error al eliminar de caché {key}: {str(e)}")
+        logger.warning("⚠️  Error al eliminar de caché %s: %s", key, e)
         return False
 
 
@@ -190,14 +386,22 @@ def invalidate_pattern(pattern: str) -> int:
         return 0
     
     try:
-        keys = redis_client.keys(pattern)
-        if keys:
-            deleted = redis_client.delete(*keys)
-            print(f"🗑️  Cache INVALIDATE: {pattern} ({deleted} claves)")
-            return deleted
-        return 0
+        # SCAN recorre el keyspace por tramos (KEYS bloquea todo el servidor) y UNLINK
+        # libera la memoria en segundo plano; los borrados se envían en pipelines por lote
+        deleted = 0
+        pipe = redis_client.pipeline(transaction=False)
+        for key in redis_client.scan_iter(match=pattern, count=INVALIDATE_BATCH_SIZE):
+            pipe.unlink(key)
+            deleted += 1
+            if deleted % INVALIDATE_BATCH_SIZE == 0:
+                pipe.execute()
+        pipe.execute()
+        
+        if deleted:
+            logger.debug("🗑️  Cache INVALIDATE: %s (%s claves)", pattern, deleted)
+        return deleted
     except redis.RedisError as e:
-        print(f"⚠️  Error al invalidar patrón {pattern}: {str(e)}")
+        logger.warning("⚠️  Error al invalidar patrón %s: %s", pattern, e)
         return 0
 
 
@@ -214,135 +418,402 @@ def build_cache_key(*parts: Union[str, int]) -> str:
     return ":".join(str(part) for part in parts)
 
 
+def _queue_items_warmup(
+    pipe: redis.client.Pipeline,
+    version_key: str,
+    version: int,
+    items: Dict[Union[str, bytes], bytes],
+    ttl: int
+) -> None:
+    """
+    Encolar en el pipeline la precarga de elementos individuales (WARM_ITEMS_SCRIPT).
+    Solo se escriben si la versión de las listas sigue siendo la leída antes de la
+    consulta, y solo las claves ausentes (SET NX).
+    """
+    if not items:
+        return
+    _warm_items_script(
+        keys=[version_key, *items.keys()],
+        args=[version, ttl, *items.values()],
+        client=pipe
+    )
+
+
 # Funciones específicas para el dominio de la aplicación
 
-def get_proyecto_from_cache(proyecto_id: int) -> Optional[dict]:
+def _build_proyecto_key(proyecto_id: int) -> str:
     """
-    Obtener proyecto específico desde caché (patrón Cache-Aside).
+    Construir la clave de un proyecto con un f-string (forma fija, sin generador ni join).
     """
-    key = build_cache_key("proyecto", proyecto_id)
-    return get_from_cache(key)
+    return f"proyecto:{proyecto_id}"
 
 
-def set_proyecto_in_cache(proyecto_id: int, proyecto_data: dict) -> bool:
+def get_proyecto_from_cache(proyecto_id: int) -> Optional[bytes]:
     """
-    Guardar proyecto en caché.
+    Obtener proyecto específico desde caché como JSON ya serializado (patrón Cache-Aside).
+    El JSON guardado ya tiene la forma de ProyectoResponse: no se re-parsea ni re-valida.
     """
-    key = build_cache_key("proyecto", proyecto_id)
-    return set_in_cache(key, proyecto_data)
+    key = _build_proyecto_key(proyecto_id)
+    return _get_item_from_cache(key)
+
+
+def set_proyecto_in_cache(proyecto_id: int, proyecto_json: bytes) -> bool:
+    """
+    Guardar proyecto en caché (JSON ya serializado).
+    """
+    key = _build_proyecto_key(proyecto_id)
+    _l1_set(key, proyecto_json)
+    return set_raw_in_cache(key, proyecto_json)
+
+
+def get_proyectos_version() -> int:
+    """
+    Obtener la versión actual de las listas de proyectos.
+    Forma parte de la clave de caché de cada lista, de modo que incrementarla
+    invalida todas las listas en O(1) sin recorrer claves.
+    """
+    if not redis_client:
+        return 0
+    
+    try:
+        return int(redis_client.get(PROYECTOS_VERSION_KEY) or 0)
+    except redis.RedisError as e:
+        logger.warning("⚠️  Error al leer versión de proyectos: %s", e)
+        return 0
+
+
+def bump_proyectos_version() -> int:
+    """
+    Incrementar la versión de las listas de proyectos.
+    Las listas cacheadas con la versión anterior dejan de leerse y expiran por TTL.
+    """
+    if not redis_client:
+        return 0
+    
+    try:
+        version = redis_client.incr(PROYECTOS_VERSION_KEY)
+        logger.debug("🗑️  Cache INVALIDATE: proyectos:list (versión %s)", version)
+        return version
+    except redis.RedisError as e:
+        logger.warning("⚠️  Error al incrementar versión de proyectos: %s", e)
+        return 0
 
 
 def invalidate_proyecto_cache(proyecto_id: int = None):
     """
     Invalidar caché de proyectos.
     Si se proporciona proyecto_id, invalida solo ese proyecto.
-    Si no, invalida todos los proyectos.
+    Las listas se invalidan siempre incrementando su versión.
     """
+    # Invalidar lista de proyectos (cualquier filtro/paginación). La versión se
+    # incrementa antes de eliminar el proyecto: una precarga desde un listado que
+    # lea la versión vieja o bien se descarta, o bien corre antes y el DELETE la borra
+    bump_proyectos_version()
+    
     if proyecto_id:
-        key = build_cache_key("proyecto", proyecto_id)
+        key = _build_proyecto_key(proyecto_id)
         delete_from_cache(key)
+
+
+def proyecto_id_in_cache(proyecto_id: int) -> bool:
+    """
+    Indica si el ID figura en el conjunto de proyectos existentes.
+    False significa "desconocido": el llamador debe confirmar contra la base de datos.
+    """
+    if not redis_client:
+        return False
     
-    # Invalidar lista de proyectos (cualquier filtro/paginación)
-    invalidate_pattern("proyectos:list:*")
+    try:
+        return bool(redis_client.sismember(PROYECTOS_IDS_KEY, proyecto_id))
+    except redis.RedisError as e:
+        logger.warning("⚠️  Error al consultar %s: %s", PROYECTOS_IDS_KEY, e)
+        return False
 
 
-def get_proyectos_list_from_cache(skip: int, limit: int, estado: Optional[str] = None) -> Optional[list]:
+def add_proyecto_id_to_cache(proyecto_id: int) -> bool:
     """
-    Obtener lista de proyectos desde caché.
+    Registrar un proyecto existente en el conjunto de IDs.
     """
-    key_parts = ["proyectos", "list", f"skip={skip}", f"limit={limit}"]
-    if estado:
-        key_parts.append(f"estado={estado}")
+    if not redis_client:
+        return False
+    
+    try:
+        redis_client.sadd(PROYECTOS_IDS_KEY, proyecto_id)
+        return True
+    except redis.RedisError as e:
+        logger.warning("⚠️  Error al escribir en %s: %s", PROYECTOS_IDS_KEY, e)
+        return False
+
+
+def remove_proyecto_id_from_cache(proyecto_id: int) -> bool:
+    """
+    Quitar un proyecto eliminado del conjunto de IDs.
+    """
+    if not redis_client:
+        return False
     
-    key = build_cache_key(*key_parts)
-    return get_from_cache(key)
+    try:
+        redis_client.srem(PROYECTOS_IDS_KEY, proyecto_id)
+        return True
+    except redis.RedisError as e:
+        logger.warning("⚠️  Error al eliminar de %s: %s", PROYECTOS_IDS_KEY, e)
+        return False
 
 
-def set_proyectos_list_in_cache(proyectos_data: list, skip: int, limit: int, estado: Optional[str] = None) -> bool:
+def _build_proyectos_list_key(
+    skip: int,
+    limit: int,
+    estado: Optional[str] = None,
+    include_usuarios: bool = False,
+    cursor: Optional[int] = None,
+    version: Optional[int] = None
+) -> str:
     """
-    Guardar lista de proyectos en caché.
+    Construir la clave de una lista de proyectos para la versión indicada
+    (o la vigente si no se pasa).
+    Con cursor, la clave no depende de skip (la paginación por cursor lo ignora).
     """
-    key_parts = ["proyectos", "list", f"skip={skip}", f"limit={limit}"]
+    if version is None:
+        version = get_proyectos_version()
+    
+    key_parts = [f"proyectos:list:v={version}"]
+    if cursor is not None:
+        key_parts.append(f"cursor={cursor}")
+    else:
+        key_parts.append(f"skip={skip}")
+    key_parts.append(f"limit={limit}")
     if estado:
         key_parts.append(f"estado={estado}")
+    if include_usuarios:
+        key_parts.append("include=usuarios")
+    
+    return ":".join(key_parts)
+
+
+def get_proyectos_list_from_cache(
+    skip: int,
+    limit: int,
+    estado: Optional[str] = None,
+    include_usuarios: bool = False,
+    cursor: Optional[int] = None,
+    version: Optional[int] = None
+) -> Optional[bytes]:
+    """
+    Obtener lista de proyectos desde caché como JSON ya serializado.
+    """
+    if not redis_client:
+        return None
     
-    key = build_cache_key(*key_parts)
-    return set_in_cache(key, proyectos_data)
+    return get_raw_from_cache(_build_proyectos_list_key(skip, limit, estado, include_usuarios, cursor, version))
+
+
+def set_proyectos_list_in_cache(
+    proyectos_json: bytes,
+    skip: int,
+    limit: int,
+    estado: Optional[str] = None,
+    include_usuarios: bool = False,
+    cursor: Optional[int] = None,
+    proyectos_items: Optional[Dict[int, bytes]] = None,
+    version: Optional[int] = None,
+    ttl: int = CACHE_TTL
+) -> bool:
+    """
+    Guardar lista de proyectos en caché (JSON ya serializado).
+    Si se pasan proyectos_items (id -> JSON con la forma de ProyectoResponse), también
+    precarga la caché individual de cada proyecto; todo en un único pipeline.
+    La precarga solo escribe claves ausentes (SET NX), para no pisar un write-through
+    concurrente, y se omite si la versión cambió desde la lectura: asignar o
+    desasignar usuarios elimina el proyecto y la lista podría volver a cachear
+    la lista de miembros anterior.
+    Pasar la versión leída antes de consultar la base de datos evita guardar datos
+    viejos bajo una versión nueva si hubo una escritura entremedio.
+    """
+    if not redis_client:
+        return False
+    
+    if version is None:
+        version = get_proyectos_version()
+    key = _build_proyectos_list_key(skip, limit, estado, include_usuarios, cursor, version)
+    
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.setex(key, ttl, proyectos_json)
+        _queue_items_warmup(
+            pipe,
+            PROYECTOS_VERSION_KEY,
+            version,
+            {_build_proyecto_key(proyecto_id): proyecto_json for proyecto_id, proyecto_json in (proyectos_items or {}).items()},
+            ttl
+        )
+        pipe.execute()
+        logger.debug("💾 Cache SET: %s + %s proyectos (TTL: %ss)", key, len(proyectos_items or {}), ttl)
+        return True
+    except redis.RedisError as e:
+        logger.warning("⚠️  Error al escribir en caché %s: %s", key, e)
+        return False
+
+
+def _build_tarea_key(tarea_id: int) -> bytes:
+    """
+    Construir la clave de una tarea directamente en bytes (redis-py no la re-codifica).
+    """
+    return TAREA_KEY_FORMAT % tarea_id
 
 
-def get_tarea_from_cache(tarea_id: int) -> Optional[dict]:
+def get_tarea_from_cache(tarea_id: int) -> Optional[bytes]:
     """
-    Obtener tarea específica desde caché (patrón Cache-Aside).
+    Obtener tarea específica desde caché como JSON ya serializado (patrón Cache-Aside).
     """
-    key = build_cache_key("tarea", tarea_id)
-    return get_from_cache(key)
+    return _get_item_from_cache(_build_tarea_key(tarea_id))
 
 
-def set_tarea_in_cache(tarea_id: int, tarea_data: dict) -> bool:
+def set_tarea_in_cache(tarea_id: int, tarea_json: bytes) -> bool:
     """
-    Guardar tarea en caché.
+    Guardar tarea en caché (JSON ya serializado).
     """
-    key = build_cache_key("tarea", tarea_id)
-    return set_in_cache(key, tarea_data)
+    key = _build_tarea_key(tarea_id)
+    _l1_set(key, tarea_json)
+    return set_raw_in_cache(key, tarea_json)
+
+
+def get_tareas_version() -> int:
+    """
+    Obtener la versión actual de las listas de tareas.
+    Forma parte de la clave de caché de cada lista, de modo que incrementarla
+    invalida todas las listas en O(1) sin recorrer claves.
+    """
+    if not redis_client:
+        return 0
+    
+    try:
+        return int(redis_client.get(TAREAS_VERSION_KEY) or 0)
+    except redis.RedisError as e:
+        logger.warning("⚠️  Error al leer versión de tareas: %s", e)
+        return 0
 
 
 def invalidate_tarea_cache(tarea_id: int = None):
     """
     Invalidar caché de tareas.
-    Si se proporciona tarea_id, invalida solo esa tarea.
-    Si no, invalida todas las tareas.
+    Si se proporciona tarea_id, elimina además esa tarea individual.
+    Las listas (cualquier filtro/paginación) se invalidan incrementando su versión:
+    las entradas anteriores dejan de leerse y expiran por TTL.
     """
     if tarea_id:
-        key = build_cache_key("tarea", tarea_id)
-        delete_from_cache(key)
+        _l1_pop(_build_tarea_key(tarea_id))
+    
+    if not redis_client:
+        return
     
-    # Invalidar lista de tareas (cualquier filtro/paginación)
-    invalidate_pattern("tareas:list:*")
+    try:
+        # La versión se incrementa antes del UNLINK: una precarga desde un listado
+        # que lea la versión vieja o bien se descarta, o bien corre antes y el UNLINK
+        # la borra (ver WARM_ITEMS_SCRIPT)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.incr(TAREAS_VERSION_KEY)
+        if tarea_id:
+            pipe.unlink(_build_tarea_key(tarea_id))
+        version = pipe.execute()[0]
+        logger.debug("🗑️  Cache INVALIDATE: tareas:list (versión %s)", version)
+    except redis.RedisError as e:
+        logger.warning("⚠️  Error al invalidar caché de tareas: %s", e)
 
 
-def get_tareas_list_from_cache(
-    skip: int, 
-    limit: int, 
+def _build_tareas_list_key(
+    skip: int,
+    limit: int,
     proyecto_id: Optional[int] = None,
     estado: Optional[str] = None,
-    usuario_responsable_id: Optional[int] = None
-) -> Optional[list]:
+    usuario_responsable_id: Optional[int] = None,
+    cursor: Optional[int] = None,
+    version: Optional[int] = None
+) -> bytes:
     """
-    Obtener lista de tareas desde caché.
+    Construir la clave de una lista de tareas directamente en bytes, para la versión
+    indicada (o la vigente si no se pasa).
+    Con cursor, la clave no depende de skip (la paginación por cursor lo ignora).
     """
-    key_parts = ["tareas", "list", f"skip={skip}", f"limit={limit}"]
+    if version is None:
+        version = get_tareas_version()
+    
+    # Se arma con bytes %-format y b":".join: una sola pasada, sin .encode() en redis-py
+    key_parts = [TAREAS_LIST_PREFIX, b"v=%d" % version]
+    if cursor is not None:
+        key_parts.append(b"cursor=%d" % cursor)
+    else:
+        key_parts.append(b"skip=%d" % skip)
+    key_parts.append(b"limit=%d" % limit)
     if proyecto_id:
-        key_parts.append(f"proyecto={proyecto_id}")
+        key_parts.append(b"proyecto=%d" % proyecto_id)
     if estado:
-        key_parts.append(f"estado={estado}")
+        key_parts.append(b"estado=" + estado.encode())
     if usuario_responsable_id:
-        key_parts.append(f"usuario={usuario_responsable_id}")
+        key_parts.append(b"usuario=%d" % usuario_responsable_id)
     
-    key = build_cache_key(*key_parts)
-    return get_from_cache(key)
+    return b":".join(key_parts)
+
+
+def get_tareas_list_from_cache(
+    skip: int, 
+    limit: int, 
+    proyecto_id: Optional[int] = None,
+    estado: Optional[str] = None,
+    usuario_responsable_id: Optional[int] = None,
+    cursor: Optional[int] = None,
+    version: Optional[int] = None
+) -> Optional[bytes]:
+    """
+    Obtener lista de tareas desde caché como JSON ya serializado.
+    """
+    key = _build_tareas_list_key(skip, limit, proyecto_id, estado, usuario_responsable_id, cursor, version)
+    return get_raw_from_cache(key)
 
 
 def set_tareas_list_in_cache(
-    tareas_data: list, 
+    tareas_json: bytes, 
     skip: int, 
     limit: int,
     proyecto_id: Optional[int] = None,
     estado: Optional[str] = None,
-    usuario_responsable_id: Optional[int] = None
+    usuario_responsable_id: Optional[int] = None,
+    tareas_items: Optional[Dict[int, bytes]] = None,
+    cursor: Optional[int] = None,
+    version: Optional[int] = None,
+    ttl: int = CACHE_TTL
 ) -> bool:
     """
-    Guardar lista de tareas en caché.
+    Guardar lista de tareas en caché (JSON ya serializado).
+    Si se pasan tareas_items (id -> JSON), también precarga la caché individual
+    de cada tarea; todo se envía en un único pipeline (un solo round-trip).
+    Pasar la versión leída antes de consultar la base de datos evita guardar datos
+    viejos bajo una versión nueva si hubo una escritura entremedio; la precarga
+    además se omite si la versión cambió, porque las escrituras eliminan la tarea
+    individual y la lista podría volver a cachear la copia anterior.
     """
-    key_parts = ["tareas", "list", f"skip={skip}", f"limit={limit}"]
-    if proyecto_id:
-        key_parts.append(f"proyecto={proyecto_id}")
-    if estado:
-        key_parts.append(f"estado={estado}")
-    if usuario_responsable_id:
-        key_parts.append(f"usuario={usuario_responsable_id}")
+    if not redis_client:
+        return False
     
-    key = build_cache_key(*key_parts)
-    return set_in_cache(key, tareas_data)
+    if version is None:
+        version = get_tareas_version()
+    key = _build_tareas_list_key(skip, limit, proyecto_id, estado, usuario_responsable_id, cursor, version)
+    
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.setex(key, ttl, tareas_json)
+        _queue_items_warmup(
+            pipe,
+            TAREAS_VERSION_KEY,
+            version,
+            {_build_tarea_key(tarea_id): tarea_json for tarea_id, tarea_json in (tareas_items or {}).items()},
+            ttl
+        )
+        pipe.execute()
+        logger.debug("💾 Cache SET: %s + %s tareas (TTL: %ss)", key, len(tareas_items or {}), ttl)
+        return True
+    except redis.RedisError as e:
+        logger.warning("⚠️  Error al escribir en caché %s: %s", key, e)
+        return False
 
 
 def get_cache_stats() -> dict:
@@ -356,24 +827,37 @@ def get_cache_stats() -> dict:
             "message": "Redis no está disponible"
         }
     
+    cached = _stats_cache.get("stats")
+    if cached is not None:
+        return cached
+    
     try:
-        info = redis_client.info()
-        hits = info.get("keyspace_hits", 0)
-        misses = info.get("keyspace_misses", 0)
+        # Solo las secciones de INFO que se usan, en un único round-trip
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.info("stats")
+        pipe.info("clients")
+        pipe.info("memory")
+        pipe.dbsize()
+        stats, clients, memory, total_keys = pipe.execute()
+        
+        hits = stats.get("keyspace_hits", 0)
+        misses = stats.get("keyspace_misses", 0)
         total_requests = hits + misses
         
         # Calcular hit rate, evitando división por cero
         hit_rate = (hits / total_requests * 100) if total_requests > 0 else 0.0
         
-        return {
+        result = {
             "available": True,
-            "connected_clients": info.get("connected_clients", 0),
-            "used_memory_human": info.get("used_memory_human", "N/A"),
-            "total_keys": redis_client.dbsize(),
+            "connected_clients": clients.get("connected_clients", 0),
+            "used_memory_human": memory.get("used_memory_human", "N/A"),
+            "total_keys": total_keys,
             "hits": hits,
             "misses": misses,
             "hit_rate": round(hit_rate, 2)
         }
+        _stats_cache["stats"] = result
+        return result
     except redis.RedisError as e:
         return {
             "available": False,
@@ -2,37 +2,108 @@
 Módulo de gestión de colas para patrón Queue-Based Load Leveling.
 Utiliza Redis como broker de mensajes para desacoplar la recepción 
 de solicitudes de su procesamiento.
+
+La cola es un Redis Stream consumido por un consumer group: cada worker lee con
+XREADGROUP y confirma con XACK; los mensajes de un worker caído quedan pendientes
+y otro los reclama con XAUTOCLAIM (entrega at-least-once, varios workers sin
+coordinación).
 """
 
-import json
+import math
+import socket
+import time
 import uuid
-from typing import Optional, Dict, Any
+from typing import AsyncIterator, Optional, Dict, Any, List, Tuple
 from datetime import datetime
+import orjson
 import redis
+import redis.asyncio as aioredis
 import os
 
 # Configuración de Redis
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_DB_QUEUE = int(os.getenv("REDIS_DB_QUEUE", "1"))  # DB separada para colas
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
 
 # Nombres de colas
-TAREA_QUEUE = "tareas:queue"
-JOB_STATUS_PREFIX = "job:status:"
+TAREA_QUEUE = "tareas:stream"             # Stream con los mensajes de creación de tareas
+TAREA_CONSUMER_GROUP = "workers"          # Consumer group compartido por los workers
+JOB_STATUS_PREFIX = "tareas:job:"         # Hash con el estado de cada job
 JOB_RESULT_PREFIX = "job:result:"
+JOBS_BY_TIME = "tareas:jobs:by_time"      # Sorted set (timestamp -> job_id) para limpieza
+JOB_EVENTS_PREFIX = "jobs:"               # Canal Pub/Sub por job (+ job_id)
+
+# Contadores de jobs mantenidos con INCR (estadísticas O(1), sin recorrer jobs)
+JOBS_ENQUEUED_TOTAL = "jobs:enqueued_total"
+JOBS_COMPLETED_TOTAL = "jobs:completed_total"
+JOBS_FAILED_TOTAL = "jobs:failed_total"
+JOBS_ENQUEUED_PER_MINUTE_PREFIX = "jobs:enqueued:"   # + epoch del minuto
+JOBS_COMPLETED_PER_MINUTE_PREFIX = "jobs:completed:" # + epoch del minuto
+JOB_DURATIONS = "jobs:durations_ms"                  # Lista acotada con las últimas duraciones
+WORKER_METRICS = "jobs:worker_metrics"               # Hash: lotes, mensajes y latencia EMA
 
 # TTL para estados de jobs (1 hora)
 JOB_TTL = 3600
 
+# Nombre de este proceso dentro del consumer group
+CONSUMER_NAME = f"{socket.gethostname()}:{os.getpid()}"
+
+# Tiempo sin confirmar tras el cual un mensaje entregado se considera abandonado
+# (worker caído) y puede reclamarlo otro consumidor
+PENDING_CLAIM_IDLE_MS = 60_000
+
+# Duración máxima de una suscripción a eventos de un job y latido para mantenerla viva
+JOB_EVENTS_MAX_SECONDS = 300
+JOB_EVENTS_HEARTBEAT_SECONDS = 15
+
+# Máximo de suscripciones SSE simultáneas por proceso: cada una retiene una conexión
+# Pub/Sub hasta JOB_EVENTS_MAX_SECONDS; las que exceden el tope se rechazan
+JOB_EVENTS_MAX_STREAMS = int(os.getenv("JOB_EVENTS_MAX_STREAMS", "100"))
+
+# TTL de los contadores por minuto (14 días)
+METRICS_TTL = 14 * 24 * 3600
+
+# Ventana de métricas expuesta en /queue/stats y muestras para el percentil de duración
+METRICS_WINDOW_MINUTES = 60
+JOB_DURATION_SAMPLES = 1000
+
+# Encolado atómico en un solo round-trip:
+# HSET estado + EXPIRE, XADD del mensaje al stream, ZADD por tiempo y poda de entradas vencidas,
+# y actualización de contadores. Retorna {job_id, largo de la cola}.
+# KEYS: [1] hash del job, [2] cola, [3] sorted set por tiempo,
+#       [4] total encolados, [5] encolados del minuto actual
+# ARGV: [1] job_id, [2] mensaje JSON, [3] timestamp ISO, [4] epoch, [5] TTL,
+#       [6] mensaje de estado, [7] TTL de métricas
+ENQUEUE_SCRIPT = """
+redis.call('HSET', KEYS[1],
+    'status', 'pending', 'job_id', ARGV[1],
+    'created_at', ARGV[3], 'updated_at', ARGV[3], 'message', ARGV[6])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[5]))
+redis.call('XADD', KEYS[2], '*', 'data', ARGV[2])
+local queue_size = redis.call('XLEN', KEYS[2])
+redis.call('ZADD', KEYS[3], tonumber(ARGV[4]), ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', tonumber(ARGV[4]) - tonumber(ARGV[5]))
+redis.call('INCR', KEYS[4])
+if redis.call('INCR', KEYS[5]) == 1 then
+    redis.call('EXPIRE', KEYS[5], tonumber(ARGV[7]))
+end
+return {ARGV[1], queue_size}
+"""
+
 # Conexión a Redis para colas
 try:
-    redis_client = redis.Redis(
+    # Pool acotado compartido por los threads (ver cache_service.init_redis).
+    # Sin decode_responses: los payloads JSON llegan como bytes y orjson los parsea
+    # directamente, sin decodificarlos antes a str
+    redis_client = redis.Redis(connection_pool=redis.BlockingConnectionPool(
         host=REDIS_HOST,
         port=REDIS_PORT,
         db=REDIS_DB_QUEUE,
-        decode_responses=True,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=5,
         socket_connect_timeout=5
-    )
+    ))
     # Verificar conexión
     redis_client.ping()
     print(f"✓ Conexión exitosa a Redis Queue (DB {REDIS_DB_QUEUE})")
@@ -40,6 +111,61 @@ except redis.ConnectionError as e:
     print(f"✗ Error al conectar con Redis Queue: {e}")
     redis_client = None
 
+# Cliente asíncrono para los endpoints que solo consultan Redis (estado/resultado de
+# jobs y suscripciones Pub/Sub): esperan en el event loop sin ocupar un thread del
+# threadpool. La conexión se abre recién al primer uso.
+async_redis_client = aioredis.Redis(connection_pool=aioredis.BlockingConnectionPool(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    db=REDIS_DB_QUEUE,
+    decode_responses=True,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=5,
+    socket_connect_timeout=5
+))
+
+# Pool propio para las suscripciones Pub/Sub (conexiones de larga duración): los streams
+# abiertos no agotan el pool de async_redis_client, que atiende las consultas de estado.
+# Su tamaño coincide con el tope de streams, por lo que nunca hay que esperar conexión
+pubsub_redis_client = aioredis.Redis(connection_pool=aioredis.ConnectionPool(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    db=REDIS_DB_QUEUE,
+    decode_responses=True,
+    max_connections=JOB_EVENTS_MAX_STREAMS,
+    socket_connect_timeout=5
+))
+
+# Suscripciones a eventos de jobs abiertas en este proceso (solo se modifica
+# desde el event loop, sin await entre la verificación y el incremento)
+_active_job_streams = 0
+
+
+class JobEventsLimitExceeded(Exception):
+    """Se alcanzó el máximo de suscripciones simultáneas a eventos de jobs"""
+
+
+def ensure_consumer_group() -> None:
+    """
+    Crear el stream y su consumer group si no existen (idempotente).
+    El grupo arranca desde el inicio del stream: no se pierden mensajes encolados
+    antes de que existiera.
+    """
+    if not redis_client:
+        return
+    
+    try:
+        redis_client.xgroup_create(TAREA_QUEUE, TAREA_CONSUMER_GROUP, id="0", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+ensure_consumer_group()
+
+# Script Lua registrado una vez (EVALSHA; se envía el cuerpo solo si Redis no lo tiene)
+_enqueue_script = redis_client.register_script(ENQUEUE_SCRIPT) if redis_client else None
+
 
 class JobStatus:
     """Estados posibles de un job"""
@@ -49,7 +175,28 @@ class JobStatus:
     FAILED = "failed"
 
 
-def enqueue_tarea_creation(tarea_data: Dict[str, Any]) -> str:
+# Claves por job armadas directamente en bytes: el cliente no las re-codifica
+_JOB_STATUS_PREFIX_BYTES = JOB_STATUS_PREFIX.encode()
+_JOB_RESULT_PREFIX_BYTES = JOB_RESULT_PREFIX.encode()
+_JOB_EVENTS_PREFIX_BYTES = JOB_EVENTS_PREFIX.encode()
+
+
+def _job_status_key(job_id: str) -> bytes:
+    """Clave del hash de estado de un job"""
+    return _JOB_STATUS_PREFIX_BYTES + job_id.encode()
+
+
+def _job_result_key(job_id: str) -> bytes:
+    """Clave del resultado de un job"""
+    return _JOB_RESULT_PREFIX_BYTES + job_id.encode()
+
+
+def _job_events_channel(job_id: str) -> bytes:
+    """Canal Pub/Sub con las transiciones de un job"""
+    return _JOB_EVENTS_PREFIX_BYTES + job_id.encode()
+
+
+def enqueue_tarea_creation(tarea_data: Dict[str, Any]) -> Tuple[str, int]:
     """
     Encolar solicitud de creación de tarea.
     
@@ -57,7 +204,8 @@ def enqueue_tarea_creation(tarea_data: Dict[str, Any]) -> str:
         tarea_data: Datos de la tarea a crear
         
     Returns:
-        job_id: ID único del job para seguimiento
+        (job_id, queue_size): ID único del job para seguimiento y largo de la
+        cola tras encolar (posición aproximada), obtenidos en el mismo round-trip
     """
     if not redis_client:
         raise Exception("Redis no está disponible")
@@ -74,25 +222,28 @@ def enqueue_tarea_creation(tarea_data: Dict[str, Any]) -> str:
         "retry_count": 0
     }
     
-    # Guardar estado inicial del job
-    job_status = {
-        "status": JobStatus.PENDING,
-        "job_id": job_id,
-        "created_at": datetime.utcnow().isoformat(),
-        "updated_at": datetime.utcnow().isoformat(),
-        "message": "Solicitud encolada, esperando procesamiento"
-    }
-    
-    redis_client.setex(
-        f"{JOB_STATUS_PREFIX}{job_id}",
-        JOB_TTL,
-        json.dumps(job_status)
+    # Guardar estado inicial y encolar el mensaje de forma atómica (un solo round-trip)
+    now = time.time()
+    _, queue_size = _enqueue_script(
+        keys=[
+            _job_status_key(job_id),
+            TAREA_QUEUE,
+            JOBS_BY_TIME,
+            JOBS_ENQUEUED_TOTAL,
+            f"{JOBS_ENQUEUED_PER_MINUTE_PREFIX}{int(now // 60) * 60}"
+        ],
+        args=[
+            job_id,
+            orjson.dumps(message),
+            message["timestamp"],
+            now,
+            JOB_TTL,
+            "Solicitud encolada, esperando procesamiento",
+            METRICS_TTL
+        ]
     )
     
-    # Encolar mensaje en la cola de tareas
-    redis_client.rpush(TAREA_QUEUE, json.dumps(message))
-    
-    return job_id
+    return job_id, int(queue_size)
 
 
 def get_job_status(job_id: str) -> Optional[Dict[str, Any]]:
@@ -108,12 +259,21 @@ def get_job_status(job_id: str) -> Optional[Dict[str, Any]]:
     if not redis_client:
         raise Exception("Redis no está disponible")
     
-    status_data = redis_client.get(f"{JOB_STATUS_PREFIX}{job_id}")
+    status_data = redis_client.hgetall(_job_status_key(job_id))
     
     if not status_data:
         return None
     
-    return json.loads(status_data)
+    return {field.decode(): value.decode() for field, value in status_data.items()}
+
+
+async def get_job_status_async(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Versión asíncrona de get_job_status (handlers async de FastAPI).
+    """
+    status_data = await async_redis_client.hgetall(_job_status_key(job_id))
+    
+    return status_data or None
 
 
 def get_job_result(job_id: str) -> Optional[Dict[str, Any]]:
@@ -129,19 +289,33 @@ def get_job_result(job_id: str) -> Optional[Dict[str, Any]]:
     if not redis_client:
         raise Exception("Redis no está disponible")
     
-    result_data = redis_client.get(f"{JOB_RESULT_PREFIX}{job_id}")
+    result_data = redis_client.get(_job_result_key(job_id))
+    
+    if not result_data:
+        return None
+    
+    return orjson.loads(result_data)
+
+
+async def get_job_result_async(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Versión asíncrona de get_job_result (handlers async de FastAPI).
+    """
+    result_data = await async_redis_client.get(_job_result_key(job_id))
     
     if not result_data:
         return None
     
-    return json.loads(result_data)
+    return orjson.loads(result_data)
 
 
 def update_job_status(
     job_id: str, 
     status: str, 
     message: str, 
-    error: Optional[str] = None
+    error: Optional[str] = None,
+    duration_ms: Optional[float] = None,
+    result: Optional[Dict[str, Any]] = None
 ) -> None:
     """
     Actualizar estado de un job.
@@ -151,25 +325,134 @@ def update_job_status(
         status: Nuevo estado (pending, processing, completed, failed)
         message: Mensaje descriptivo
         error: Mensaje de error (opcional)
+        duration_ms: Duración del procesamiento, registrada para métricas (opcional)
+        result: Resultado del job, guardado en la misma transacción que el
+            estado y antes de publicarlo (opcional; ver save_job_result)
+    """
+    if not redis_client:
+        raise Exception("Redis no está disponible")
+    
+    pipe = redis_client.pipeline()
+    _queue_job_status(pipe, job_id, status, message, error, duration_ms, result)
+    pipe.execute()
+
+
+def update_jobs_status(updates: List[Dict[str, Any]]) -> None:
+    """
+    Actualizar el estado de varios jobs en un solo round-trip (lotes del worker).
+    
+    Args:
+        updates: Argumentos de update_job_status para cada job
+            (job_id, status, message y opcionalmente error, duration_ms, result)
     """
     if not redis_client:
         raise Exception("Redis no está disponible")
     
-    job_status = {
+    if not updates:
+        return
+    
+    # Un solo timestamp para todo el lote
+    updated_at = datetime.utcnow().isoformat()
+    pipe = redis_client.pipeline()
+    for update in updates:
+        _queue_job_status(pipe, updated_at=updated_at, **update)
+    pipe.execute()
+
+
+def _queue_job_status(
+    pipe: redis.client.Pipeline,
+    job_id: str,
+    status: str,
+    message: str,
+    error: Optional[str] = None,
+    duration_ms: Optional[float] = None,
+    result: Optional[Dict[str, Any]] = None,
+    updated_at: Optional[str] = None
+) -> None:
+    """
+    Agregar a un pipeline los comandos que registran el estado de un job
+    (ver update_job_status). updated_at permite reutilizar un timestamp ISO ya calculado.
+    """
+    # Solo los campos que cambian en una transición (job_id y created_at ya están
+    # en el hash desde el encolado)
+    changes = {
         "status": status,
-        "job_id": job_id,
-        "updated_at": datetime.utcnow().isoformat(),
+        "updated_at": updated_at or datetime.utcnow().isoformat(),
         "message": message
     }
     
     if error:
-        job_status["error"] = error
+        changes["error"] = error
+    
+    # Actualizar los campos que cambian y renovar el TTL
+    key = _job_status_key(job_id)
+    if result is not None:
+        pipe.setex(_job_result_key(job_id), JOB_TTL, orjson.dumps(result))
+    pipe.hset(key, mapping=changes)
+    if not error:
+        pipe.hdel(key, "error")  # Descartar el error de un intento anterior
+    pipe.expire(key, JOB_TTL)
+    # Notificar la transición a los clientes suscritos (GET /tareas/jobs/{id}/stream)
+    pipe.publish(_job_events_channel(job_id), orjson.dumps({"job_id": job_id, **changes}))
+    if status == JobStatus.COMPLETED:
+        pipe.incr(JOBS_COMPLETED_TOTAL)
+        completed_minute_key = f"{JOBS_COMPLETED_PER_MINUTE_PREFIX}{int(time.time() // 60) * 60}"
+        pipe.incr(completed_minute_key)
+        pipe.expire(completed_minute_key, METRICS_TTL)
+        if duration_ms is not None:
+            # Ventana deslizante de las últimas JOB_DURATION_SAMPLES duraciones
+            pipe.lpush(JOB_DURATIONS, round(duration_ms, 3))
+            pipe.ltrim(JOB_DURATIONS, 0, JOB_DURATION_SAMPLES - 1)
+
+
+async def stream_job_events(job_id: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Emitir el estado de un job y luego cada transición publicada por el worker.
     
-    redis_client.setex(
-        f"{JOB_STATUS_PREFIX}{job_id}",
-        JOB_TTL,
-        json.dumps(job_status)
-    )
+    Se suscribe al canal del job antes de leer el estado actual, así no se pierde
+    una transición ocurrida entre ambas operaciones. Termina cuando el job llega a
+    un estado final, cuando expira o al superar JOB_EVENTS_MAX_SECONDS.
+    
+    Args:
+        job_id: ID del job
+        
+    Yields:
+        Estado del job (mismos campos que get_job_status); None en los latidos
+        
+    Raises:
+        JobEventsLimitExceeded: si ya hay JOB_EVENTS_MAX_STREAMS suscripciones abiertas
+    """
+    global _active_job_streams
+    if _active_job_streams >= JOB_EVENTS_MAX_STREAMS:
+        raise JobEventsLimitExceeded(
+            f"Se alcanzó el máximo de {JOB_EVENTS_MAX_STREAMS} suscripciones simultáneas"
+        )
+    _active_job_streams += 1
+    
+    pubsub = pubsub_redis_client.pubsub()
+    try:
+        await pubsub.subscribe(_job_events_channel(job_id))
+        job_status = await async_redis_client.hgetall(_job_status_key(job_id))
+        if not job_status:
+            return
+        yield job_status
+        
+        deadline = time.monotonic() + JOB_EVENTS_MAX_SECONDS
+        while job_status.get("status") not in (JobStatus.COMPLETED, JobStatus.FAILED):
+            if time.monotonic() >= deadline:
+                return
+            event = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=JOB_EVENTS_HEARTBEAT_SECONDS
+            )
+            if event is None:
+                yield None  # Latido: mantiene abierta la conexión a través de proxies
+                continue
+            job_status = orjson.loads(event["data"])
+            yield job_status
+    finally:
+        _active_job_streams -= 1
+        await pubsub.reset()
 
 
 def save_job_result(job_id: str, result: Dict[str, Any]) -> None:
@@ -184,9 +467,9 @@ def save_job_result(job_id: str, result: Dict[str, Any]) -> None:
         raise Exception("Redis no está disponible")
     
     redis_client.setex(
-        f"{JOB_RESULT_PREFIX}{job_id}",
+        _job_result_key(job_id),
         JOB_TTL,
-        json.dumps(result)
+        orjson.dumps(result)  # orjson serializa datetime nativamente (ISO-8601)
     )
 
 
@@ -195,12 +478,28 @@ def get_queue_size() -> int:
     Obtener tamaño actual de la cola de tareas.
     
     Returns:
-        Número de mensajes pendientes en la cola
+        Número de mensajes en el stream (sin entregar o entregados sin confirmar;
+        los confirmados se eliminan con XDEL)
     """
     if not redis_client:
         return 0
     
-    return redis_client.llen(TAREA_QUEUE)
+    return redis_client.xlen(TAREA_QUEUE)
+
+
+def _parse_stream_entries(entries) -> List[Dict[str, Any]]:
+    """
+    Decodificar entradas del stream (id, campos) en mensajes. Cada mensaje lleva
+    su stream_id, necesario para confirmarlo (ack_tarea_messages).
+    """
+    messages = []
+    for stream_id, fields in entries:
+        if not fields:
+            continue  # Entrada eliminada mientras estaba pendiente
+        message = orjson.loads(fields[b"data"])
+        message["stream_id"] = stream_id.decode()
+        messages.append(message)
+    return messages
 
 
 def dequeue_tarea_creation() -> Optional[Dict[str, Any]]:
@@ -210,22 +509,155 @@ def dequeue_tarea_creation() -> Optional[Dict[str, Any]]:
     Returns:
         Mensaje de la cola o None si timeout
     """
+    messages = dequeue_tarea_batch(max_count=1)
+    
+    return messages[0] if messages else None
+
+
+def dequeue_tarea_batch(max_count: int = 32, timeout: int = 5) -> List[Dict[str, Any]]:
+    """
+    Leer hasta max_count mensajes nuevos del stream para este consumidor en un solo
+    round-trip (XREADGROUP; bloqueante con timeout).
+    
+    Los mensajes quedan pendientes en el consumer group hasta confirmarlos con
+    ack_tarea_messages (o requeue_tarea_creation).
+    
+    Args:
+        max_count: Máximo de mensajes a leer
+        timeout: Segundos de espera si no hay mensajes nuevos
+        
+    Returns:
+        Mensajes leídos, en orden de llegada (lista vacía si timeout)
+    """
+    if not redis_client:
+        raise Exception("Redis no está disponible")
+    
+    result = redis_client.xreadgroup(
+        TAREA_CONSUMER_GROUP,
+        CONSUMER_NAME,
+        {TAREA_QUEUE: ">"},
+        count=max_count,
+        block=timeout * 1000
+    )
+    
+    if not result:
+        return []
+    
+    stream_name, entries = result[0]
+    return _parse_stream_entries(entries)
+
+
+def claim_stale_tarea_messages(max_count: int = 32) -> List[Dict[str, Any]]:
+    """
+    Reclamar para este consumidor los mensajes entregados a otro worker que siguen
+    sin confirmar tras PENDING_CLAIM_IDLE_MS (XAUTOCLAIM).
+    
+    Args:
+        max_count: Máximo de mensajes a reclamar
+        
+    Returns:
+        Mensajes reclamados (lista vacía si no hay abandonados)
+    """
+    if not redis_client:
+        raise Exception("Redis no está disponible")
+    
+    result = redis_client.xautoclaim(
+        TAREA_QUEUE,
+        TAREA_CONSUMER_GROUP,
+        CONSUMER_NAME,
+        min_idle_time=PENDING_CLAIM_IDLE_MS,
+        count=max_count
+    )
+    
+    return _parse_stream_entries(result[1])
+
+
+def ack_tarea_messages(stream_ids: List[str]) -> None:
+    """
+    Confirmar mensajes procesados: XACK los quita de los pendientes del grupo y
+    XDEL del stream, así su largo refleja solo el trabajo por hacer.
+    
+    Args:
+        stream_ids: IDs de las entradas a confirmar
+    """
+    if not redis_client:
+        raise Exception("Redis no está disponible")
+    
+    if not stream_ids:
+        return
+    
+    pipe = redis_client.pipeline()
+    _queue_ack(pipe, stream_ids)
+    pipe.execute()
+
+
+def _queue_ack(pipe: redis.client.Pipeline, stream_ids: List[str]) -> None:
+    """Agregar a un pipeline la confirmación de entradas (ver ack_tarea_messages)"""
+    pipe.xack(TAREA_QUEUE, TAREA_CONSUMER_GROUP, *stream_ids)
+    pipe.xdel(TAREA_QUEUE, *stream_ids)
+
+
+def record_worker_batch(batch_size: int, ema_latency_ms: float) -> None:
+    """
+    Registrar un lote procesado por el worker (HINCRBY de lotes y mensajes, latencia
+    EMA por mensaje); expuesto en get_queue_stats para ajustar el tamaño de lote.
+    
+    Args:
+        batch_size: Mensajes del lote
+        ema_latency_ms: Latencia media móvil por mensaje en milisegundos
+    """
     if not redis_client:
         raise Exception("Redis no está disponible")
     
-    # BLPOP: operación bloqueante con timeout de 5 segundos
-    result = redis_client.blpop(TAREA_QUEUE, timeout=5)
+    pipe = redis_client.pipeline(transaction=False)
+    _queue_worker_batch(pipe, batch_size, ema_latency_ms)
+    pipe.execute()
+
+
+def _queue_worker_batch(pipe: redis.client.Pipeline, batch_size: int, ema_latency_ms: float) -> None:
+    """Agregar a un pipeline el registro de un lote (ver record_worker_batch)"""
+    pipe.hincrby(WORKER_METRICS, "batches", 1)
+    pipe.hincrby(WORKER_METRICS, "messages", batch_size)
+    pipe.hset(WORKER_METRICS, "ema_latency_ms", round(ema_latency_ms, 3))
+
+
+def complete_tarea_batch(
+    completions: List[Dict[str, Any]],
+    stream_ids: List[str],
+    batch_size: int,
+    ema_latency_ms: float
+) -> None:
+    """
+    Cerrar un lote del worker en un solo round-trip (pipeline sin MULTI): estados
+    "completed" con sus resultados, confirmación de los mensajes terminados y
+    métricas del lote.
+    
+    Dentro del pipeline los comandos se ejecutan en orden, así que el resultado de
+    cada job sigue escribiéndose antes de publicar su evento de finalización.
     
-    if result:
-        queue_name, message_data = result
-        return json.loads(message_data)
+    Args:
+        completions: Argumentos de update_job_status de cada job completado
+        stream_ids: IDs de las entradas del stream a confirmar
+        batch_size: Mensajes del lote
+        ema_latency_ms: Latencia media móvil por mensaje en milisegundos
+    """
+    if not redis_client:
+        raise Exception("Redis no está disponible")
     
-    return None
+    updated_at = datetime.utcnow().isoformat()
+    pipe = redis_client.pipeline(transaction=False)
+    for completion in completions:
+        _queue_job_status(pipe, updated_at=updated_at, **completion)
+    if stream_ids:
+        _queue_ack(pipe, stream_ids)
+    _queue_worker_batch(pipe, batch_size, ema_latency_ms)
+    pipe.execute()
 
 
 def requeue_tarea_creation(message: Dict[str, Any], max_retries: int = 3) -> bool:
     """
-    Reencolar mensaje que falló en el procesamiento.
+    Reencolar mensaje que falló en el procesamiento. En ambos casos la entrada
+    original del stream queda confirmada.
     
     Args:
         message: Mensaje original
@@ -238,23 +670,32 @@ def requeue_tarea_creation(message: Dict[str, Any], max_retries: int = 3) -> boo
         raise Exception("Redis no está disponible")
     
     retry_count = message.get("retry_count", 0) + 1
+    stream_id = message.pop("stream_id", None)
     
     if retry_count > max_retries:
-        # Marcar job como fallido
+        # Marcar job como fallido definitivamente
+        redis_client.incr(JOBS_FAILED_TOTAL)
         update_job_status(
             message["job_id"],
             JobStatus.FAILED,
             f"Job fallido después de {max_retries} reintentos",
             error="Máximo de reintentos excedido"
         )
+        if stream_id:
+            ack_tarea_messages([stream_id])
         return False
     
     # Actualizar contador de reintentos
     message["retry_count"] = retry_count
     message["last_retry_at"] = datetime.utcnow().isoformat()
     
-    # Reencolar mensaje
-    redis_client.rpush(TAREA_QUEUE, json.dumps(message))
+    # Reencolar como entrada nueva y confirmar la original en el mismo round-trip
+    pipe = redis_client.pipeline()
+    pipe.xadd(TAREA_QUEUE, {"data": orjson.dumps(message)})
+    if stream_id:
+        pipe.xack(TAREA_QUEUE, TAREA_CONSUMER_GROUP, stream_id)
+        pipe.xdel(TAREA_QUEUE, stream_id)
+    pipe.execute()
     
     return True
 
@@ -272,9 +713,56 @@ def get_queue_stats() -> Dict[str, Any]:
             "redis_available": False
         }
     
+    # Minutos de la ventana, del más antiguo al actual
+    current_minute = int(time.time() // 60) * 60
+    minutes = [
+        current_minute - 60 * offset
+        for offset in range(METRICS_WINDOW_MINUTES - 1, -1, -1)
+    ]
+    
+    # Largo del stream, pendientes del grupo, contadores, series por minuto y
+    # duraciones en un solo round-trip
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.xlen(TAREA_QUEUE)
+    pipe.xpending(TAREA_QUEUE, TAREA_CONSUMER_GROUP)
+    pipe.mget(JOBS_ENQUEUED_TOTAL, JOBS_COMPLETED_TOTAL, JOBS_FAILED_TOTAL)
+    pipe.mget([f"{JOBS_ENQUEUED_PER_MINUTE_PREFIX}{m}" for m in minutes])
+    pipe.mget([f"{JOBS_COMPLETED_PER_MINUTE_PREFIX}{m}" for m in minutes])
+    pipe.lrange(JOB_DURATIONS, 0, -1)
+    pipe.hgetall(WORKER_METRICS)
+    (
+        queue_size,
+        pending,
+        (enqueued, completed, failed),
+        enqueued_per_minute,
+        completed_per_minute,
+        durations,
+        worker_metrics
+    ) = pipe.execute()
+    
+    # Percentil 95 (nearest-rank) sobre las últimas duraciones registradas
+    p95_duration_ms = None
+    if durations:
+        durations = sorted(float(d) for d in durations)
+        p95_duration_ms = durations[math.ceil(0.95 * len(durations)) - 1]
+    
+    # Tamaño medio de lote del worker desde que se registran métricas
+    batches = int(worker_metrics.get(b"batches", 0))
+    avg_batch_size = round(int(worker_metrics.get(b"messages", 0)) / batches, 2) if batches else None
+    
     return {
-        "queue_size": get_queue_size(),
+        "queue_size": queue_size,
         "redis_available": True,
-        "queue_name": TAREA_QUEUE
+        "queue_name": TAREA_QUEUE,
+        "pending_count": pending["pending"],  # Entregados a un worker, sin confirmar
+        "enqueued_total": int(enqueued or 0),
+        "completed_total": int(completed or 0),
+        "failed_total": int(failed or 0),
+        "window_start": minutes[0],
+        "enqueued_per_minute": [int(v or 0) for v in enqueued_per_minute],
+        "completed_per_minute": [int(v or 0) for v in completed_per_minute],
+        "p95_duration_ms": p95_duration_ms,
+        "avg_batch_size": avg_batch_size,
+        "ema_latency_ms": float(worker_metrics[b"ema_latency_ms"]) if b"ema_latency_ms" in worker_metrics else None
     }
 
@@ -3,11 +3,12 @@ Worker para procesamiento de tareas en background.
 Implementa el patrón Queue-Based Load Leveling consumiendo mensajes de Redis.
 """
 
+import logging
 import time
 import signal
 import sys
-from datetime import datetime
-from sqlalchemy.orm import Session
+from typing import TYPE_CHECKING, List
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 
 from app.config import SessionLocal
@@ -15,9 +16,44 @@ from app.models import Tarea
 from app.services import queue_service as queue
 from app.services import cache_service as cache
 
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
 # Bandera para shutdown graceful
 shutdown_requested = False
 
+# Lotes adaptativos: el tamaño sigue a la cola acumulada (más amortización bajo carga,
+# lotes de 1 con la cola vacía) y se acota para que un lote no supere el presupuesto
+# de tiempo según la latencia por mensaje observada (media móvil exponencial)
+WORKER_MAX_BATCH_SIZE = 32
+WORKER_BATCH_BUDGET_SECONDS = 0.5
+LATENCY_EMA_ALPHA = 0.2
+
+# El estado "processing" se escribe antes del INSERT solo si se espera que el lote tarde
+# al menos esto (latencia media por mensaje x mensajes): en lotes rápidos nadie llega a
+# observarlo antes del estado final
+PROCESSING_STATUS_DELAY_SECONDS = 0.05
+
+logger = logging.getLogger(__name__)
+
+# INSERT que devuelve las columnas generadas o normalizadas por la base: el resultado
+# del job se arma sin objetos ORM ni un SELECT posterior (refresh).
+# Idempotente por job_id: la cola entrega at-least-once (un mensaje reclamado tras una
+# caída puede llegar después del commit); ante un job_id ya insertado, el DO UPDATE
+# sin cambios devuelve la fila existente en lugar de crear una tarea duplicada
+_INSERT_TAREA = pg_insert(Tarea)
+INSERT_TAREA_RETURNING = _INSERT_TAREA.on_conflict_do_update(
+    index_elements=[Tarea.job_id],
+    set_={"job_id": _INSERT_TAREA.excluded.job_id}
+).returning(
+    Tarea.id,
+    Tarea.job_id,
+    Tarea.estado,
+    Tarea.prioridad,
+    Tarea.fecha_creacion,
+    Tarea.fecha_vencimiento
+)
+
 
 def signal_handler(signum, frame):
     """Manejar señales de terminación para shutdown graceful"""
@@ -26,10 +62,41 @@ def signal_handler(signum, frame):
     shutdown_requested = True
 
 
-def process_tarea_creation(message: dict, db: Session) -> dict:
+def mark_processing_if_slow(messages: List[dict], ema_latency: float) -> None:
+    """
+    Marcar los jobs de un lote como "processing" antes de procesarlo, en un solo
+    round-trip, si la latencia observada anticipa que el lote tardará al menos
+    PROCESSING_STATUS_DELAY_SECONDS; en lotes rápidos se omite.
+    
+    Args:
+        messages: Mensajes del lote
+        ema_latency: Latencia media móvil por mensaje en segundos
+    """
+    if ema_latency * len(messages) < PROCESSING_STATUS_DELAY_SECONDS:
+        return
+    
+    try:
+        queue.update_jobs_status([
+            {
+                "job_id": message["job_id"],
+                "status": queue.JobStatus.PROCESSING,
+                "message": "Procesando creación de tarea..."
+            }
+            for message in messages
+        ])
+    except Exception as e:
+        # Estado informativo: si no se puede escribir, el lote se procesa igual
+        logger.warning("No se pudo marcar jobs como processing: %s", e)
+
+
+def process_tarea_creation(message: dict, db: "Session") -> dict:
     """
     Procesar mensaje de creación de tarea.
     
+    Los fallos se registran en Redis al momento; el estado "completed" (con el
+    resultado) se devuelve en "completion" para que el loop lo escriba junto con el
+    resto del lote (queue.complete_tarea_batch).
+    
     Args:
         message: Mensaje de la cola con datos de la tarea
         db: Sesión de base de datos
@@ -39,52 +106,27 @@ def process_tarea_creation(message: dict, db: Session) -> dict:
     """
     job_id = message["job_id"]
     tarea_data = message["data"]
+    started = time.monotonic()
     
     try:
-        # Actualizar estado a "processing"
-        queue.update_job_status(
-            job_id,
-            queue.JobStatus.PROCESSING,
-            "Procesando creación de tarea..."
-        )
-        
-        # Crear tarea en la base de datos
-        db_tarea = Tarea(**tarea_data)
-        db.add(db_tarea)
+        # Crear tarea en la base de datos (INSERT ... RETURNING, sin refresh)
+        row = db.execute(INSERT_TAREA_RETURNING, {**tarea_data, "job_id": job_id}).one()
         db.commit()
-        db.refresh(db_tarea)
         
         # Invalidar caché de tareas
         cache.invalidate_tarea_cache()
         
-        # Preparar resultado
-        tarea_result = {
-            "id": db_tarea.id,
-            "titulo": db_tarea.titulo,
-            "descripcion": db_tarea.descripcion,
-            "estado": db_tarea.estado,
-            "prioridad": db_tarea.prioridad,
-            "fecha_creacion": db_tarea.fecha_creacion.isoformat() if db_tarea.fecha_creacion else None,
-            "fecha_vencimiento": db_tarea.fecha_vencimiento.isoformat() if db_tarea.fecha_vencimiento else None,
-            "proyecto_id": db_tarea.proyecto_id,
-            "usuario_responsable_id": db_tarea.usuario_responsable_id,
-            "usuario_responsable": None,  # No cargamos relaciones aquí para optimizar
-        }
-        
-        # Actualizar estado a "completed"
-        queue.update_job_status(
-            job_id,
-            queue.JobStatus.COMPLETED,
-            f"Tarea '{db_tarea.titulo}' creada exitosamente"
-        )
-        
-        # Guardar resultado
-        queue.save_job_result(job_id, {"tarea": tarea_result})
-        
         return {
             "success": True,
-            "tarea_id": db_tarea.id,
-            "titulo": db_tarea.titulo
+            "tarea_id": row.id,
+            "titulo": tarea_data["titulo"],
+            "completion": {
+                "job_id": job_id,
+                "status": queue.JobStatus.COMPLETED,
+                "message": f"Tarea '{tarea_data['titulo']}' creada exitosamente",
+                "duration_ms": (time.monotonic() - started) * 1000,
+                "result": {"tarea": _inserted_tarea_result(tarea_data, row)}
+            }
         }
         
     except IntegrityError as e:
@@ -120,6 +162,99 @@ def process_tarea_creation(message: dict, db: Session) -> dict:
         }
 
 
+def _inserted_tarea_result(tarea_data: dict, row) -> dict:
+    """Resultado de un job a partir de los datos encolados y la fila de INSERT ... RETURNING"""
+    return {
+        "id": row.id,
+        "titulo": tarea_data["titulo"],
+        "descripcion": tarea_data.get("descripcion"),
+        "estado": row.estado,
+        "prioridad": row.prioridad,
+        "fecha_creacion": row.fecha_creacion,
+        "fecha_vencimiento": row.fecha_vencimiento,
+        "proyecto_id": tarea_data["proyecto_id"],
+        "usuario_responsable_id": tarea_data.get("usuario_responsable_id"),
+        "usuario_responsable": None,  # No cargamos relaciones aquí para optimizar
+    }
+
+
+def process_tarea_batch(messages: List[dict], db: "Session") -> List[dict]:
+    """
+    Procesar un lote de mensajes de creación de tarea en una sola transacción.
+    
+    Como en process_tarea_creation, cada resultado exitoso lleva su "completion"
+    para escribirlo junto con el lote.
+    Si la transacción falla (p. ej. una FK inválida), se deshace y los mensajes se
+    procesan de a uno con process_tarea_creation, para que solo falle (y se
+    reencole) el mensaje responsable.
+    
+    Args:
+        messages: Mensajes de la cola con datos de las tareas
+        db: Sesión de base de datos
+        
+    Returns:
+        Resultado de cada mensaje, en el mismo orden (ver process_tarea_creation)
+    """
+    if len(messages) == 1:
+        return [process_tarea_creation(messages[0], db)]
+    
+    started = time.monotonic()
+    
+    try:
+        # Un único INSERT multi-fila (executemany con insertmanyvalues); las filas se
+        # asocian a cada mensaje por job_id
+        rows = db.execute(
+            INSERT_TAREA_RETURNING,
+            [{**message["data"], "job_id": message["job_id"]} for message in messages]
+        ).all()
+        db.commit()
+    except Exception:
+        db.rollback()
+        return [process_tarea_creation(message, db) for message in messages]
+    
+    # Invalidar caché de tareas una sola vez por lote
+    cache.invalidate_tarea_cache()
+    
+    # Cada job del lote registra la duración del lote completo
+    duration_ms = (time.monotonic() - started) * 1000
+    rows_by_job = {row.job_id: row for row in rows}
+    results = []
+    for message in messages:
+        tarea_data = message["data"]
+        row = rows_by_job[message["job_id"]]
+        results.append({
+            "success": True,
+            "tarea_id": row.id,
+            "titulo": tarea_data["titulo"],
+            "completion": {
+                "job_id": message["job_id"],
+                "status": queue.JobStatus.COMPLETED,
+                "message": f"Tarea '{tarea_data['titulo']}' creada exitosamente",
+                "duration_ms": duration_ms,
+                "result": {"tarea": _inserted_tarea_result(tarea_data, row)}
+            }
+        })
+    
+    return results
+
+
+def next_batch_size(queue_size: int, ema_latency: float) -> int:
+    """
+    Tamaño del próximo lote a extraer.
+    
+    Args:
+        queue_size: Mensajes pendientes en la cola
+        ema_latency: Latencia media por mensaje en segundos (0 si aún no hay datos)
+        
+    Returns:
+        Entre 1 y WORKER_MAX_BATCH_SIZE
+    """
+    batch_size = min(queue_size, WORKER_MAX_BATCH_SIZE)
+    if ema_latency > 0:
+        batch_size = min(batch_size, int(WORKER_BATCH_BUDGET_SECONDS / ema_latency))
+    return max(1, batch_size)
+
+
 def run_worker():
     """
     Ejecutar el worker principal que consume mensajes de la cola.
@@ -130,10 +265,13 @@ def run_worker():
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
+    # Conectar la caché para poder invalidar listas de tareas al crear
+    cache.init_redis()
+    
     print("=" * 60)
     print("🚀 Worker de Queue-Based Load Leveling iniciado")
     print("=" * 60)
-    print(f"📋 Cola: {queue.TAREA_QUEUE}")
+    print(f"📋 Cola: {queue.TAREA_QUEUE} (grupo {queue.TAREA_CONSUMER_GROUP}, consumidor {queue.CONSUMER_NAME})")
     print(f"🔧 Redis: {queue.REDIS_HOST}:{queue.REDIS_PORT} (DB {queue.REDIS_DB_QUEUE})")
     print(f"⏰ Esperando mensajes... (CTRL+C para detener)")
     print("=" * 60)
@@ -141,43 +279,83 @@ def run_worker():
     processed_count = 0
     failed_count = 0
     start_time = time.time()
+    ema_latency = 0.0
+    next_claim_at = 0.0
+    
+    # Una sola sesión para todo el loop: cada lote termina en commit o rollback, que
+    # devuelven la conexión al pool; el identity map guarda referencias débiles, así
+    # que no acumula las tareas ya procesadas
+    db = SessionLocal()
     
     while not shutdown_requested:
         try:
-            # Obtener mensaje de la cola (bloqueante con timeout)
-            message = queue.dequeue_tarea_creation()
+            # Periódicamente, retomar primero los mensajes que un worker caído dejó
+            # sin confirmar
+            messages = []
+            if time.monotonic() >= next_claim_at:
+                messages = queue.claim_stale_tarea_messages(WORKER_MAX_BATCH_SIZE)
+                next_claim_at = time.monotonic() + queue.PENDING_CLAIM_IDLE_MS / 1000
+            
+            # Obtener un lote de mensajes nuevos (bloqueante con timeout); con la cola
+            # vacía se pide 1 y XREADGROUP espera el próximo mensaje sin girar en vacío
+            if not messages:
+                batch_size = next_batch_size(queue.get_queue_size(), ema_latency)
+                messages = queue.dequeue_tarea_batch(batch_size)
             
-            if message is None:
+            if not messages:
                 # Timeout - no hay mensajes, continuar esperando
                 continue
             
-            job_id = message.get("job_id", "unknown")
-            message_type = message.get("type", "unknown")
+            tarea_messages = []
+            ack_ids = []  # Mensajes terminados, a confirmar en el stream
+            for message in messages:
+                job_id = message.get("job_id", "unknown")
+                message_type = message.get("type", "unknown")
+                
+                print(f"\n📨 [Job {job_id[:8]}...] Mensaje recibido: {message_type}")
+                
+                if message_type == "create_tarea":
+                    tarea_messages.append(message)
+                else:
+                    print(f"⚠ [Job {job_id[:8]}...] Tipo de mensaje desconocido: {message_type}")
+                    ack_ids.append(message["stream_id"])
+            
+            if not tarea_messages:
+                queue.ack_tarea_messages(ack_ids)
+                continue
+            
+            completions = []
             
-            print(f"\n📨 [Job {job_id[:8]}...] Mensaje recibido: {message_type}")
+            # "processing" antes del INSERT, solo si el lote se anticipa lento
+            mark_processing_if_slow(tarea_messages, ema_latency)
             
-            # Crear sesión de base de datos para este mensaje
-            db = SessionLocal()
+            batch_started = time.monotonic()
+            results = process_tarea_batch(tarea_messages, db)
             
-            try:
-                if message_type == "create_tarea":
-                    result = process_tarea_creation(message, db)
-                    
-                    if result["success"]:
-                        processed_count += 1
-                        print(f"✓ [Job {job_id[:8]}...] Tarea '{result['titulo']}' creada (ID: {result['tarea_id']})")
-                    else:
-                        failed_count += 1
-                        print(f"✗ [Job {job_id[:8]}...] Error: {result['error']}")
-                        
-                        # Intentar reencolar si no excede reintentos
-                        if queue.requeue_tarea_creation(message, max_retries=3):
-                            print(f"↻ [Job {job_id[:8]}...] Reencolado para reintento")
+            latency = (time.monotonic() - batch_started) / len(tarea_messages)
+            ema_latency = latency if ema_latency == 0 else (
+                LATENCY_EMA_ALPHA * latency + (1 - LATENCY_EMA_ALPHA) * ema_latency
+            )
+            
+            for message, result in zip(tarea_messages, results):
+                job_id = message["job_id"]
+                
+                if result["success"]:
+                    processed_count += 1
+                    completions.append(result["completion"])
+                    ack_ids.append(message["stream_id"])
+                    print(f"✓ [Job {job_id[:8]}...] Tarea '{result['titulo']}' creada (ID: {result['tarea_id']})")
                 else:
-                    print(f"⚠ [Job {job_id[:8]}...] Tipo de mensaje desconocido: {message_type}")
+                    failed_count += 1
+                    print(f"✗ [Job {job_id[:8]}...] Error: {result['error']}")
                     
-            finally:
-                db.close()
+                    # Intentar reencolar si no excede reintentos (confirma la entrada original)
+                    if queue.requeue_tarea_creation(message, max_retries=3):
+                        print(f"↻ [Job {job_id[:8]}...] Reencolado para reintento")
+            
+            # Resultados, estados "completed", confirmaciones y métricas de todo el
+            # lote en un solo round-trip
+            queue.complete_tarea_batch(completions, ack_ids, len(tarea_messages), ema_latency * 1000)
                 
         except KeyboardInterrupt:
             print("\n⚠ Interrupción detectada. Finalizando...")
@@ -186,8 +364,11 @@ def run_worker():
         except Exception as e:
             failed_count += 1
             print(f"✗ Error al procesar mensaje: {str(e)}")
+            db.rollback()  # Dejar la sesión lista para el próximo lote
             time.sleep(1)  # Pausa breve antes de continuar
     
+    db.close()
+    
     # Estadísticas finales
     elapsed_time = time.time() - start_time
     print("\n" + "=" * 60)
@@ -207,6 +388,7 @@ def run_worker():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     try:
         run_worker()
     except Exception as e:
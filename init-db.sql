@@ -4,6 +4,9 @@
 -- Crear extensión UUID para generar IDs únicos (opcional)
 -- CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Crear extensión CITEXT para emails sin distinción de mayúsculas
+CREATE EXTENSION IF NOT EXISTS citext;
+
 -- Configurar timezone
 SET timezone = 'UTC';
 
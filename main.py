@@ -4,23 +4,26 @@ Implementa arquitectura modular con componentes independientes y sin estado.
 Cumple con principios ACID, escalabilidad horizontal y despliegue en contenedores.
 """
 
-from fastapi import FastAPI, HTTPException, status, Depends
+import logging
+import orjson
+from fastapi import FastAPI, HTTPException, status, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse, HTMLResponse
 from contextlib import asynccontextmanager
-import uvicorn
 from pathlib import Path
 from sqlalchemy.orm import Session
 
 # Importar configuración centralizada (External Configuration Store Pattern)
-from app.config import settings, create_tables, test_connection, check_db_health, get_db
+from app.config import settings, check_configuration, create_tables, test_connection, check_db_health, get_db
+
+# Configurar logging en el punto de entrada (no al importar módulos internos)
+logging.basicConfig(level=settings.LOG_LEVEL.upper())
 
 # Importar servicios
 from app.services import cache_service as cache
 
 # Importar middleware Gatekeeper
-from app.middlewares.gatekeeper import gatekeeper_middleware
+from app.middlewares.gatekeeper import GatekeeperMiddleware
 
 # Importar routers de cada componente
 from app.routers import usuarios, proyectos, tareas, auth
@@ -34,6 +37,14 @@ async def lifespan(app: FastAPI):
     """
     # Startup: Verificar conexión y crear tablas de base de datos con retry
     print("🚀 Iniciando API Mini Gestor de Proyectos...")
+    
+    # Mostrar advertencias y resumen de configuración (External Configuration Store)
+    check_configuration()
+    
+    # Leer la demo web una sola vez: /demo la sirve desde memoria
+    demo_file = Path(__file__).parent / "demo.html"
+    app.state.demo_html = demo_file.read_bytes() if demo_file.exists() else None
+    
     try:
         # Primero verificar que podemos conectar a la base de datos
         test_connection()
@@ -65,6 +76,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown: Limpiar recursos si es necesario
     cache.close_redis()
+    await cache.close_async_redis()
     print("🛑 API Mini Gestor de Proyectos detenida")
 
 # Crear instancia de FastAPI con configuración
@@ -120,7 +132,8 @@ app = FastAPI(
         "name": "MIT License",
         "url": "https://opensource.org/licenses/MIT",
     },
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse  # orjson: serialización JSON más rápida que json estándar
 )
 
 # Configurar CORS para permitir requests desde diferentes orígenes
@@ -136,8 +149,8 @@ app.add_middleware(
 # Agregar middleware Gatekeeper para seguridad
 # Este middleware valida tokens, verifica permisos y filtra solicitudes maliciosas
 # Nota: En FastAPI, los middlewares HTTP se ejecutan en orden inverso al registro
-from starlette.middleware.base import BaseHTTPMiddleware
-app.add_middleware(BaseHTTPMiddleware, dispatch=gatekeeper_middleware)
+# Se registra como middleware ASGI puro (sin el overhead de BaseHTTPMiddleware)
+app.add_middleware(GatekeeperMiddleware)
 
 # Registrar router de autenticación (Gatekeeper + Federated Identity)
 app.include_router(
@@ -165,6 +178,25 @@ app.include_router(
     tags=["GestorTareas"] 
 )
 
+# Cuerpo del endpoint raíz: es estático, se serializa una sola vez al importar
+_ROOT_BODY = orjson.dumps({
+    "message": "Mini Gestor de Proyectos API",
+    "status": "Operacional",
+    "version": "1.0.0",
+    "docs": "/docs",
+    "redoc": "/redoc",
+    "componentes": [
+        "Autenticación (/api/v1/auth) - Gatekeeper + Federated Identity",
+        "GestorUsuarios (/api/v1/usuarios)",
+        "GestorProyectos (/api/v1/proyectos)", 
+        "GestorTareas (/api/v1/tareas)"
+    ],
+    "patrones_seguridad": [
+        "Gatekeeper - Control de acceso centralizado",
+        "Federated Identity - Autenticación con LDAP"
+    ]
+})
+
 # Endpoint raíz para verificación de estado
 @app.get("/", tags=["Sistema"])
 async def root():
@@ -172,23 +204,7 @@ async def root():
     Endpoint raíz para verificar que la API está funcionando.
     Útil para health checks en contenedores.
     """
-    return {
-        "message": "Mini Gestor de Proyectos API",
-        "status": "Operacional",
-        "version": "1.0.0",
-        "docs": "/docs",
-        "redoc": "/redoc",
-        "componentes": [
-            "Autenticación (/api/v1/auth) - Gatekeeper + Federated Identity",
-            "GestorUsuarios (/api/v1/usuarios)",
-            "GestorProyectos (/api/v1/proyectos)", 
-            "GestorTareas (/api/v1/tareas)"
-        ],
-        "patrones_seguridad": [
-            "Gatekeeper - Control de acceso centralizado",
-            "Federated Identity - Autenticación con LDAP"
-        ]
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 # Endpoint de health check para Docker
 @app.get("/health", tags=["Sistema"])
@@ -265,16 +281,16 @@ async def demo_page():
     Interfaz web interactiva para demostración del sistema.
     Incluye gestión de usuarios, proyectos, tareas y visualización del sistema de retry.
     """
-    demo_file = Path(__file__).parent / "demo.html"
-    if demo_file.exists():
-        return HTMLResponse(content=demo_file.read_text(), status_code=200)
+    demo_html = getattr(app.state, "demo_html", None)
+    if demo_html is not None:
+        return HTMLResponse(content=demo_html, status_code=200)
     else:
         raise HTTPException(status_code=404, detail="Demo page not found")
 
 # Manejo global de errores
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=404,
         content={
             "detail": "Endpoint no encontrado",
@@ -285,7 +301,7 @@ async def not_found_handler(request, exc):
 
 @app.exception_handler(500)
 async def internal_error_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "detail": "Error interno del servidor",
@@ -295,17 +311,28 @@ async def internal_error_handler(request, exc):
 
 # Punto de entrada para ejecutar la aplicación
 if __name__ == "__main__":
+    # Solo al ejecutar el archivo directamente: con "uvicorn main:app" ya está cargado
+    import uvicorn
+    
     # Configuración desde External Configuration Store
     # Los parámetros se obtienen de variables de entorno
     print(f"\n🚀 Iniciando servidor en {settings.API_HOST}:{settings.API_PORT}")
     print(f"🌍 Entorno: {settings.ENVIRONMENT}")
-    print(f"🔄 Hot Reload: {'Activado' if settings.API_RELOAD else 'Desactivado'}")
+    # Hot reload solo en desarrollo: duplica procesos y memoria y ralentiza el arranque
+    reload = settings.API_RELOAD and settings.is_development()
+    
+    print(f"🔄 Hot Reload: {'Activado' if reload else 'Desactivado'}")
     print(f"📊 Log Level: {settings.LOG_LEVEL}\n")
     
     uvicorn.run(
         "main:app",
         host=settings.API_HOST,
         port=settings.API_PORT,
-        reload=settings.API_RELOAD,
+        reload=reload,
+        workers=1 if reload else settings.API_WORKERS,
+        # "auto" elige uvloop y httptools (uvicorn[standard]) cuando están instalados
+        # y cae a asyncio/h11 donde no existen (p. ej. uvloop en Windows)
+        loop="auto",
+        http="auto",
         log_level=settings.LOG_LEVEL
     )
\ No newline at end of file
@@ -2,37 +2,106 @@
 """
 Script de Verificación de Configuración - External Configuration Store Pattern
 Verifica que todas las variables de configuración estén correctamente definidas.
+
+Uso (desde la raíz del proyecto):
+    python -m scripts.verify_config
+    python scripts/verify_config.py
 """
 
-import sys
 import os
+import re
+import sys
+from pathlib import Path
+
+# Directorio raíz del proyecto (se calcula una sola vez)
+ROOT = Path(__file__).resolve().parents[1]
+
+# Ejecutado como archivo suelto, la raíz no está en sys.path; con
+# "python -m scripts.verify_config" ya lo está y no se agrega otra entrada
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# app.config se importa dentro de verify_all, solo si existe el archivo .env
+
+
+# Problemas críticos: "CRÍTICO", "crítico", "CRITICAL" (con o sin tilde)
+_CRITICAL_RE = re.compile(r"cr[ií]tic(?:o|al)", re.IGNORECASE)
 
-# Agregar el directorio raíz al path para importar módulos
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Ancho de la columna de claves en print_info
+_KEY_WIDTH = 30
 
-from app.config import settings
+# Máscara para valores secretos (se muestran como máximo 20 asteriscos)
+_MASK = "*" * 20
+
+# Separadores y banner del reporte (constantes de módulo)
+_BAR70 = "=" * 70
+_TOP = "╔" + "═" * 68 + "╗"
+_BOT = "╚" + "═" * 68 + "╝"
+_BANNER = "\n".join((
+    _TOP,
+    "║" + " " * 10 + "VERIFICACIÓN DE CONFIGURACIÓN EXTERNA" + " " * 20 + "║",
+    "║" + " " * 10 + "External Configuration Store Pattern" + " " * 21 + "║",
+    _BOT,
+))
+
+# Salida acumulada: se escribe de una sola vez al finalizar (ver flush_output)
+_out: list[str] = []
+
+
+def emit(line: str):
+    """Agrega una línea al buffer de salida"""
+    _out.append(line)
+
+
+def flush_output():
+    """
+    Escribe todo el buffer en stdout con una única llamada.
+    Si stdout es UTF-8 y tiene descriptor, el reporte se codifica una vez y se
+    escribe con os.write (sin pasar por TextIOWrapper); si no, usa sys.stdout.
+    """
+    if not _out:
+        return
+    text = "\n".join(_out) + "\n"
+    _out.clear()
+    sys.stdout.flush()
+    
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, OSError, ValueError):
+        fd = None
+    
+    encoding = (getattr(sys.stdout, "encoding", None) or "").lower().replace("-", "")
+    if fd is None or encoding != "utf8":
+        sys.stdout.write(text)
+        sys.stdout.flush()
+        return
+    
+    # os.write puede escribir parcialmente (p.ej. en pipes)
+    view = memoryview(text.encode("utf-8"))
+    while view:
+        view = view[os.write(fd, view):]
 
 
 def print_header(title: str):
     """Imprime un encabezado decorado"""
-    print("\n" + "=" * 70)
-    print(f"  {title}")
-    print("=" * 70)
+    emit("\n" + _BAR70)
+    emit(f"  {title}")
+    emit(_BAR70)
 
 
 def print_success(message: str):
     """Imprime mensaje de éxito"""
-    print(f"✅ {message}")
+    emit(f"✅ {message}")
 
 
 def print_warning(message: str):
     """Imprime mensaje de advertencia"""
-    print(f"⚠️  {message}")
+    emit(f"⚠️  {message}")
 
 
 def print_error(message: str):
     """Imprime mensaje de error"""
-    print(f"❌ {message}")
+    emit(f"❌ {message}")
 
 
 def print_info(key: str, value: str, is_secret: bool = False):
@@ -40,13 +109,24 @@ def print_info(key: str, value: str, is_secret: bool = False):
     if is_secret:
         # Ocultar valor secreto, mostrar solo longitud
         if value and len(value) > 0:
-            display_value = f"{'*' * min(len(value), 20)} (longitud: {len(value)})"
+            display_value = f"{_MASK[:len(value)]} (longitud: {len(value)})"
         else:
             display_value = "⚠️  NO DEFINIDO"
     else:
         display_value = value
     
-    print(f"  {key:30} : {display_value}")
+    emit(f"  {key.ljust(_KEY_WIDTH)} : {display_value}")
+
+
+def snapshot_settings(settings) -> dict:
+    """
+    Copia los valores de configuración a un diccionario plano.
+    Incluye las constantes de clase (APP_NAME, JWT_ALGORITHM, ...) y las
+    variables leídas en __init__; los verificadores leen de este snapshot.
+    """
+    cfg = {key: value for key, value in vars(type(settings)).items() if key.isupper()}
+    cfg.update((key, value) for key, value in vars(settings).items() if key.isupper())
+    return cfg
 
 
 def verify_environment_file():
@@ -54,7 +134,9 @@ def verify_environment_file():
     print_header("VERIFICACIÓN DE ARCHIVO .env")
     
     env_file = ".env"
-    if os.path.exists(env_file):
+    # Ruta absoluta: el resultado no depende del directorio de trabajo y
+    # coincide con el .env que encuentra load_dotenv() desde app/config
+    if (ROOT / env_file).is_file():
         print_success(f"Archivo {env_file} encontrado")
         return True
     else:
@@ -64,128 +146,155 @@ def verify_environment_file():
         return False
 
 
-def verify_database_config():
-    """Verifica configuración de base de datos"""
-    print_header("CONFIGURACIÓN DE BASE DE DATOS")
-    
-    issues = []
-    
-    print_info("POSTGRES_USER", settings.POSTGRES_USER)
-    print_info("POSTGRES_PASSWORD", settings.POSTGRES_PASSWORD, is_secret=True)
-    print_info("POSTGRES_DB", settings.POSTGRES_DB)
-    print_info("DATABASE_URL", settings.DATABASE_URL)
-    
-    # Verificar configuración de reintentos
-    print_info("DB_MAX_RETRY_ATTEMPTS", str(settings.DB_MAX_RETRY_ATTEMPTS))
-    print_info("DB_RETRY_MIN_WAIT", f"{settings.DB_RETRY_MIN_WAIT}s")
-    print_info("DB_RETRY_MAX_WAIT", f"{settings.DB_RETRY_MAX_WAIT}s")
-    
-    # Validaciones
-    if settings.is_production() and settings.POSTGRES_PASSWORD == "password":
-        issues.append("Contraseña de base de datos débil en producción")
-    
-    return issues
-
-
-def verify_redis_config():
-    """Verifica configuración de Redis"""
-    print_header("CONFIGURACIÓN DE REDIS (Cache-Aside)")
-    
-    print_info("REDIS_HOST", settings.REDIS_HOST)
-    print_info("REDIS_PORT", str(settings.REDIS_PORT))
-    print_info("CACHE_TTL", f"{settings.CACHE_TTL}s")
-    
-    return []
-
-
-def verify_ldap_config():
-    """Verifica configuración de LDAP"""
-    print_header("CONFIGURACIÓN DE LDAP (Federated Identity)")
-    
-    print_info("LDAP_SERVER", settings.LDAP_SERVER)
-    print_info("LDAP_BASE_DN", settings.LDAP_BASE_DN)
-    print_info("LDAP_USER_DN_TEMPLATE", settings.LDAP_USER_DN_TEMPLATE)
-    
-    if settings.LDAP_BIND_USER:
-        print_info("LDAP_BIND_USER", settings.LDAP_BIND_USER)
-        print_info("LDAP_BIND_PASSWORD", settings.LDAP_BIND_PASSWORD or "", is_secret=True)
-    else:
-        print_info("LDAP_BIND_USER", "No configurado (modo bind directo)")
-    
-    return []
-
-
-def verify_jwt_config():
-    """Verifica configuración de JWT"""
-    print_header("CONFIGURACIÓN DE JWT (Gatekeeper)")
-    
-    issues = []
-    
-    print_info("JWT_SECRET_KEY", settings.JWT_SECRET_KEY, is_secret=True)
-    print_info("JWT_ALGORITHM", settings.JWT_ALGORITHM)
-    print_info("ACCESS_TOKEN_EXPIRE_MINUTES", f"{settings.ACCESS_TOKEN_EXPIRE_MINUTES} minutos")
-    
-    # Validaciones críticas
-    if settings.JWT_SECRET_KEY == "your-secret-key-change-in-production":
-        if settings.is_production():
-            issues.append("CRÍTICO: JWT_SECRET_KEY usando valor por defecto en producción!")
-        else:
-            print_warning("JWT_SECRET_KEY usando valor por defecto (OK para desarrollo)")
-    
-    if len(settings.JWT_SECRET_KEY) < 32:
-        issues.append("JWT_SECRET_KEY muy corta (mínimo recomendado: 32 caracteres)")
-    
-    return issues
-
-
-def verify_app_config():
-    """Verifica configuración de la aplicación"""
-    print_header("CONFIGURACIÓN DE APLICACIÓN")
-    
-    issues = []
-    
-    print_info("APP_NAME", settings.APP_NAME)
-    print_info("APP_VERSION", settings.APP_VERSION)
-    print_info("ENVIRONMENT", settings.ENVIRONMENT)
-    print_info("API_HOST", settings.API_HOST)
-    print_info("API_PORT", str(settings.API_PORT))
-    print_info("API_RELOAD", str(settings.API_RELOAD))
-    print_info("LOG_LEVEL", settings.LOG_LEVEL)
-    
-    # Validaciones
-    if settings.is_production() and settings.API_RELOAD:
-        issues.append("API_RELOAD activado en producción (desactivar para mejor rendimiento)")
-    
-    if settings.is_production() and settings.LOG_LEVEL in ["debug", "DEBUG"]:
-        issues.append("LOG_LEVEL en debug en producción (cambiar a warning o error)")
-    
-    return issues
-
-
-def verify_security_config():
-    """Verifica configuración de seguridad"""
-    print_header("CONFIGURACIÓN DE SEGURIDAD")
-    
+def _seconds(value) -> str:
+    """Formatea un valor en segundos"""
+    return str(value) + "s"
+
+
+def _minutes(value) -> str:
+    """Formatea un valor en minutos"""
+    return str(value) + " minutos"
+
+
+def _ldap_bind_user(value) -> str:
+    """Muestra el usuario de bind LDAP o el modo bind directo"""
+    return value or "No configurado (modo bind directo)"
+
+
+# =========================================
+# VALIDADORES: (cfg, is_prod) -> problema o None
+# Los marcados como solo-producción en SECTIONS no se ejecutan fuera de ella
+# =========================================
+
+def _check_db_password(cfg: dict, is_prod: bool):
+    if cfg["POSTGRES_PASSWORD"] == "password":
+        return "Contraseña de base de datos débil en producción"
+    return None
+
+
+def _check_jwt_secret(cfg: dict, is_prod: bool):
+    # El valor por defecto tiene 36 caracteres: ambos casos son excluyentes
+    jwt_key = cfg["JWT_SECRET_KEY"]
+    if jwt_key == "your-secret-key-change-in-production":
+        if is_prod:
+            return "CRÍTICO: JWT_SECRET_KEY usando valor por defecto en producción!"
+        print_warning("JWT_SECRET_KEY usando valor por defecto (OK para desarrollo)")
+    elif len(jwt_key) < 32:
+        return "JWT_SECRET_KEY muy corta (mínimo recomendado: 32 caracteres)"
+    return None
+
+
+def _check_api_reload(cfg: dict, is_prod: bool):
+    if cfg["API_RELOAD"]:
+        return "API_RELOAD activado en producción (desactivar para mejor rendimiento)"
+    return None
+
+
+def _check_log_level(cfg: dict, is_prod: bool):
+    if cfg["LOG_LEVEL"] in ["debug", "DEBUG"]:
+        return "LOG_LEVEL en debug en producción (cambiar a warning o error)"
+    return None
+
+
+def _check_cors(cfg: dict, is_prod: bool):
+    if "*" in frozenset(cfg["CORS_ORIGINS"]):
+        return "CORS_ORIGINS permite todos los orígenes en producción (riesgo de seguridad)"
+    return None
+
+
+# Campos por sección: (clave, es_secreto, formateador). Sin formateador el
+# valor se muestra tal cual y se omite si no está definido (None).
+DB_FIELDS = (
+    ("POSTGRES_USER", False, None),
+    ("POSTGRES_PASSWORD", True, None),
+    ("POSTGRES_DB", False, None),
+    ("DATABASE_URL", False, None),
+    ("DB_MAX_RETRY_ATTEMPTS", False, str),
+    ("DB_RETRY_MIN_WAIT", False, _seconds),
+    ("DB_RETRY_MAX_WAIT", False, _seconds),
+)
+
+REDIS_FIELDS = (
+    ("REDIS_HOST", False, None),
+    ("REDIS_PORT", False, str),
+    ("CACHE_TTL", False, _seconds),
+)
+
+LDAP_FIELDS = (
+    ("LDAP_SERVER", False, None),
+    ("LDAP_BASE_DN", False, None),
+    ("LDAP_USER_DN_TEMPLATE", False, None),
+    ("LDAP_BIND_USER", False, _ldap_bind_user),
+    ("LDAP_BIND_PASSWORD", True, None),
+)
+
+JWT_FIELDS = (
+    ("JWT_SECRET_KEY", True, None),
+    ("JWT_ALGORITHM", False, None),
+    ("ACCESS_TOKEN_EXPIRE_MINUTES", False, _minutes),
+)
+
+APP_FIELDS = (
+    ("APP_NAME", False, None),
+    ("APP_VERSION", False, None),
+    ("ENVIRONMENT", False, None),
+    ("API_HOST", False, None),
+    ("API_PORT", False, str),
+    ("API_RELOAD", False, str),
+    ("LOG_LEVEL", False, None),
+)
+
+SECURITY_FIELDS = (
+    ("CORS_ORIGINS", False, str),
+    ("RATE_LIMIT_REQUESTS", False, str),
+    ("RATE_LIMIT_WINDOW_SECONDS", False, _seconds),
+)
+
+# Secciones de verificación: (título, campos, validadores)
+# Cada validador es (función, solo_producción)
+SECTIONS = (
+    ("CONFIGURACIÓN DE BASE DE DATOS", DB_FIELDS, ((_check_db_password, True),)),
+    ("CONFIGURACIÓN DE REDIS (Cache-Aside)", REDIS_FIELDS, ()),
+    ("CONFIGURACIÓN DE LDAP (Federated Identity)", LDAP_FIELDS, ()),
+    ("CONFIGURACIÓN DE JWT (Gatekeeper)", JWT_FIELDS, ((_check_jwt_secret, False),)),
+    (
+        "CONFIGURACIÓN DE APLICACIÓN",
+        APP_FIELDS,
+        ((_check_api_reload, True), (_check_log_level, True)),
+    ),
+    ("CONFIGURACIÓN DE SEGURIDAD", SECURITY_FIELDS, ((_check_cors, True),)),
+)
+
+
+def verify_sections(cfg: dict, is_prod: bool) -> list[str]:
+    """Recorre la tabla SECTIONS: imprime cada campo y aplica sus validadores"""
     issues = []
     
-    print_info("CORS_ORIGINS", str(settings.CORS_ORIGINS))
-    print_info("RATE_LIMIT_REQUESTS", str(settings.RATE_LIMIT_REQUESTS))
-    print_info("RATE_LIMIT_WINDOW_SECONDS", f"{settings.RATE_LIMIT_WINDOW_SECONDS}s")
-    
-    # Validaciones
-    if settings.is_production() and "*" in settings.CORS_ORIGINS:
-        issues.append("CORS_ORIGINS permite todos los orígenes en producción (riesgo de seguridad)")
+    for title, fields, validators in SECTIONS:
+        print_header(title)
+        
+        for key, is_secret, formatter in fields:
+            value = cfg[key]
+            if formatter is not None:
+                value = formatter(value)
+            elif value is None:
+                continue
+            print_info(key, value, is_secret=is_secret)
+        
+        for validator, prod_only in validators:
+            if prod_only and not is_prod:
+                continue
+            issue = validator(cfg, is_prod)
+            if issue:
+                issues.append(issue)
     
     return issues
 
 
 def verify_all():
     """Ejecuta todas las verificaciones"""
-    print("\n")
-    print("╔" + "═" * 68 + "╗")
-    print("║" + " " * 10 + "VERIFICACIÓN DE CONFIGURACIÓN EXTERNA" + " " * 20 + "║")
-    print("║" + " " * 10 + "External Configuration Store Pattern" + " " * 21 + "║")
-    print("╚" + "═" * 68 + "╝")
+    emit("\n")
+    emit(_BANNER)
     
     all_issues = []
     
@@ -198,13 +307,16 @@ def verify_all():
         print_info("Acción requerida", "Crear archivo .env basado en .env.example")
         return False
     
+    # Importación diferida: evita construir Settings (y cargar el módulo de
+    # base de datos) cuando la verificación falla por falta de .env
+    from app.config import settings
+    
+    # La configuración no cambia durante la ejecución: se lee una sola vez
+    cfg = snapshot_settings(settings)
+    is_prod = settings.is_production()
+    
     # Verificar cada sección
-    all_issues.extend(verify_database_config())
-    all_issues.extend(verify_redis_config())
-    all_issues.extend(verify_ldap_config())
-    all_issues.extend(verify_jwt_config())
-    all_issues.extend(verify_app_config())
-    all_issues.extend(verify_security_config())
+    all_issues.extend(verify_sections(cfg, is_prod))
     
     # Agregar validaciones del módulo settings
     all_issues.extend(settings.validate_config())
@@ -218,14 +330,12 @@ def verify_all():
         return True
     else:
         print_warning(f"Se encontraron {len(all_issues)} problemas:")
-        print()
-        for i, issue in enumerate(all_issues, 1):
-            print(f"  {i}. {issue}")
-        print()
+        emit("")
+        emit("\n".join(f"  {i}. {issue}" for i, issue in enumerate(all_issues, 1)))
+        emit("")
         
         # Determinar severidad
-        critical_keywords = ["CRÍTICO", "crítico", "CRITICAL"]
-        has_critical = any(keyword in issue for issue in all_issues for keyword in critical_keywords)
+        has_critical = any(_CRITICAL_RE.search(issue) for issue in all_issues)
         
         if has_critical:
             print_error("Hay problemas CRÍTICOS que deben resolverse antes de producción")
@@ -241,18 +351,23 @@ def main():
         success = verify_all()
         
         print_header("AYUDA")
-        print("  📚 Ver plantillas de configuración: ENV_TEMPLATE.md")
-        print("  📖 Documentación completa: EXTERNAL_CONFIGURATION_STORE.md")
-        print("  🔧 Generar JWT secret: openssl rand -hex 32")
-        print()
+        emit("  📚 Ver plantillas de configuración: ENV_TEMPLATE.md")
+        emit("  📖 Documentación completa: EXTERNAL_CONFIGURATION_STORE.md")
+        emit("  🔧 Generar JWT secret: openssl rand -hex 32")
+        emit("")
+        flush_output()
         
         sys.exit(0 if success else 1)
         
     except Exception as e:
         print_header("ERROR")
         print_error(f"Error durante verificación: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        flush_output()
+        # Traceback completo solo en debug. Se lee el entorno (ya cargado desde
+        # .env) y no settings, porque el error puede venir de importar app.config
+        if os.getenv("LOG_LEVEL", "info").upper() == "DEBUG":
+            import traceback
+            traceback.print_exc()
         sys.exit(2)
 
 